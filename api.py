@@ -0,0 +1,139 @@
+"""장애 사례 검색/답변 HTTP API (알림 시스템, ChatOps 봇 연동용)
+
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+
+워커 프로세스마다 AzureClients/캐시를 1개씩 만들어 모든 요청이 공유한다.
+(LLM 분석/임베딩 디스크 캐시는 워커 간에도 공유됨)
+"""
+import json
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+load_dotenv(override=True)
+
+from config import Config
+from azure_client import get_azure_clients
+from document_processor import DocumentProcessor
+from vector_store import VectorStore, SELECT_PROFILES
+from chatbot import IncidentChatbot
+from telemetry import render_prometheus
+
+
+class SearchFilters(BaseModel):
+    """검색 조건 (지정한 항목만 적용, 목록은 하나라도 일치하면 포함)"""
+
+    incident_types: List[str] = []
+    tags: List[str] = []
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+
+class SearchRequest(SearchFilters):
+    query: str = Field(min_length=1)
+    top_k: int = Field(default=5, ge=1, le=50)
+    profile: str = "chat"
+
+
+class AnswerRequest(SearchFilters):
+    query: str = Field(min_length=1)
+    stream: bool = False
+
+
+def _filters(request: SearchFilters) -> Dict[str, Any]:
+    return {
+        "incident_types": request.incident_types,
+        "tags": request.tags,
+        "date_from": request.date_from,
+        "date_to": request.date_to,
+    }
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    azure_clients = get_azure_clients(Config())
+    doc_processor = DocumentProcessor(azure_clients)
+    vector_store = VectorStore(azure_clients, doc_processor)
+    app.state.azure_clients = azure_clients
+    app.state.vector_store = vector_store
+    app.state.chatbot = IncidentChatbot(azure_clients, vector_store)
+    yield
+    await azure_clients.close_async_clients()
+
+
+app = FastAPI(title="장애 사례 검색 API", lifespan=lifespan)
+
+
+@app.get("/healthz")
+async def healthz() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+@app.post("/search")
+async def search(request: SearchRequest) -> Dict[str, List[Dict[str, Any]]]:
+    """유사 장애 사례 검색 (보고서 단위, file_path는 SAS URL)"""
+    if request.profile not in SELECT_PROFILES:
+        raise HTTPException(status_code=400, detail=f"알 수 없는 profile: {request.profile}")
+    results = await app.state.vector_store.search_similar_documents_async(
+        request.query,
+        top_k=request.top_k,
+        profile=request.profile,
+        filters=_filters(request),
+    )
+    return {"results": results}
+
+
+@app.post("/answer")
+async def answer(request: AnswerRequest):
+    """장애 대응 답변 생성
+
+    stream=true면 NDJSON으로 응답한다. 첫 줄은 {"related_documents": [...]},
+    이후 줄은 {"delta": "..."} 형태의 답변 조각.
+    """
+    chatbot: IncidentChatbot = app.state.chatbot
+    if not request.stream:
+        return await chatbot.answer_query_async(request.query, filters=_filters(request))
+
+    result = await chatbot.answer_query_stream_async(
+        request.query, filters=_filters(request)
+    )
+
+    async def ndjson():
+        header = {
+            "related_documents": result["related_documents"],
+            "cached": result.get("cached", False),
+        }
+        yield json.dumps(header, ensure_ascii=False, default=str) + "\n"
+        async for delta in result["stream"]:
+            yield json.dumps({"delta": delta}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@app.get("/facets")
+async def facets() -> Dict[str, List[Dict[str, Any]]]:
+    """검색 필터 선택지 (장애 유형/태그별 보고서 건수)"""
+    return await asyncio.to_thread(app.state.vector_store.get_facets)
+
+
+@app.get("/documents/{parent_id}")
+async def get_document(parent_id: str) -> Dict[str, Any]:
+    """보고서 전체 내용 조회"""
+    document: Optional[Dict[str, Any]] = await asyncio.to_thread(
+        app.state.vector_store.get_full_document, parent_id
+    )
+    if document is None:
+        raise HTTPException(status_code=404, detail="문서를 찾을 수 없습니다.")
+    return document
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    """단계별 누적 통계 (Prometheus text 형식, 워커 프로세스별)"""
+    return render_prometheus()
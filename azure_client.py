@@ -1,50 +1,287 @@
-from azure.identity import DefaultAzureCredential
 from azure.search.documents import SearchClient
+from azure.search.documents.aio import SearchClient as AsyncSearchClient
 from azure.search.documents.indexes import SearchIndexClient
 from azure.search.documents.indexes.models import *
 from azure.storage.blob import BlobServiceClient
-from openai import AzureOpenAI
+from azure.storage.blob.aio import BlobServiceClient as AsyncBlobServiceClient
+from azure.core.pipeline.transport import RequestsTransport, AioHttpTransport
+from openai import AzureOpenAI, AsyncAzureOpenAI
 from azure.core.credentials import AzureKeyCredential
 import json
-from typing import List, Dict, Any
+import asyncio
+import threading
+import aiohttp
+import httpx
+import requests
+from typing import List, Dict, Any, Optional
 from config import Config
 
 
+# 임베딩 모델 기본 차원 (EMBEDDING_DIMENSIONS를 지정하지 않은 경우)
+DEFAULT_EMBEDDING_DIMENSIONS = 1536
+
+# 인덱스 복사(마이그레이션) 시 요청 1회당 문서 수
+_MIGRATION_BATCH_SIZE = 500
+
+# 인덱스 전체 순회 시 요청 1회당 문서 수
+_SCAN_PAGE_SIZE = 1000
+
+
+def versioned_index_name(base_name: str, version: int) -> str:
+    """스키마 버전별 인덱스 이름 (버전 1은 기존 이름 그대로, 이후는 "<이름>-v<버전>")"""
+    return base_name if version <= 1 else f"{base_name}-v{version}"
+
+
+def iter_index_documents(
+    search_client,
+    select: List[str],
+    filter: Optional[str] = None,
+    page_size: int = _SCAN_PAGE_SIZE,
+):
+    """filter에 맞는 인덱스 문서 전체를 순회
+
+    search("*") 결과를 그대로 순회하면 SDK가 $skip으로 다음 페이지를 요청하는데 서비스는
+    $skip 100,000 초과를 거부한다. 그래서 upload_date 오름차순으로 page_size개씩 가져오고
+    다음 페이지는 "upload_date gt <마지막 값>" 조건으로 이어 받는다. 페이지 경계에 걸린 같은
+    upload_date 레코드(한 보고서의 청크)는 eq 조건으로 한 번에 다시 조회한다.
+    """
+    select = list(dict.fromkeys([*select, "upload_date"]))
+
+    def query(condition: str, **kwargs):
+        expression = f"({filter}) and {condition}" if filter else condition
+        return search_client.search(
+            search_text="*", filter=expression, select=select, **kwargs
+        )
+
+    # upload_date가 없는 레코드는 정렬 범위 밖이므로 먼저 따로 조회
+    yield from query("upload_date eq null")
+
+    condition = "upload_date ne null"
+    while True:
+        page = list(query(condition, order_by=["upload_date asc"], top=page_size))
+        if not page:
+            return
+        last = page[-1]["upload_date"]
+        yield from (document for document in page if document["upload_date"] != last)
+        if len(page) < page_size:
+            yield from (document for document in page if document["upload_date"] == last)
+            return
+        yield from query(f"upload_date eq {last}")
+        condition = f"upload_date gt {last}"
+
+
 class AzureClients:
+    """Azure 클라이언트 모음 (각 클라이언트는 최초 사용 시 생성)
+
+    Streamlit 세션마다 새로 만들지 말고 get_azure_clients()로 프로세스 공용
+    인스턴스를 사용한다. 검색 인덱스 생성/갱신은 provision_search_index()
+    (또는 `python azure_client.py`)로 명시적으로 1회 수행한다.
+
+    async_* 클라이언트는 처음 사용한 이벤트 루프에 묶이며, 다른 루프에서
+    접근하면 이전 루프의 클라이언트를 닫고 그 루프용으로 새로 만든다.
+    서버에서는 lifespan 종료 시 close_async_clients()로 정리한다.
+    """
+
     def __init__(self, config: Config):
         self.config = config
         # Search용 KeyCredential 준비
         self.search_key_credential = AzureKeyCredential(
             self.config.AZURE_SEARCH_ADMIN_KEY
         )
-        self.credential = DefaultAzureCredential()
-        self._setup_clients()
-        self._setup_search_index()
-
-    def _setup_clients(self):
-        """Azure 클라이언트 초기화"""
-        # Search 클라이언트(API Key 인증)
-        self.search_client = SearchClient(
-            endpoint=self.config.AZURE_SEARCH_ENDPOINT,
-            index_name=self.config.AZURE_SEARCH_INDEX_NAME,
-            credential=self.search_key_credential,
-        )
+        self._lock = threading.RLock()
+        self._transport = None
+        self._search_client = None
+        self._search_index_client = None
+        self._blob_client = None
+        self._openai_client = None
+        self._index_provisioned = False
+        self._async_loop = None
+        self._async: Dict[str, Any] = {}
+        self._closing_tasks: set = set()
 
-        self.search_index_client = SearchIndexClient(
-            endpoint=self.config.AZURE_SEARCH_ENDPOINT,
-            credential=self.search_key_credential,
-        )
+    def _azure_transport(self) -> RequestsTransport:
+        """Search/Blob 클라이언트가 함께 쓰는 HTTP 연결 풀"""
+        with self._lock:
+            if self._transport is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=self.config.HTTP_POOL_SIZE,
+                    pool_maxsize=self.config.HTTP_POOL_SIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._transport = RequestsTransport(
+                    session=session, session_owner=False
+                )
+            return self._transport
 
-        self.blob_client = BlobServiceClient.from_connection_string(
-            self.config.AZURE_STORAGE_CONNECTION_STRING
+    @property
+    def search_index_name(self) -> str:
+        """현재 스키마 버전(AZURE_SEARCH_INDEX_VERSION)의 검색 인덱스 이름"""
+        return versioned_index_name(
+            self.config.AZURE_SEARCH_INDEX_NAME, self.config.AZURE_SEARCH_INDEX_VERSION
         )
 
-        # OpenAI 클라이언트
-        self.openai_client = AzureOpenAI(
-            azure_endpoint=self.config.AZURE_OPENAI_ENDPOINT,
-            api_key=self.config.AZURE_OPENAI_API_KEY,
-            api_version=self.config.AZURE_OPENAI_API_VERSION,
-        )
+    @property
+    def search_client(self) -> SearchClient:
+        """Search 클라이언트(API Key 인증), SEARCH_BACKEND=local이면 로컬 검색 백엔드"""
+        with self._lock:
+            if self._search_client is None and self.config.SEARCH_BACKEND == "local":
+                from local_search import LocalSearchClient
+
+                self._search_client = LocalSearchClient(
+                    self.config.LOCAL_SEARCH_PATH, self.config.LOCAL_SEARCH_FLUSH_SECONDS
+                )
+            if self._search_client is None:
+                self._search_client = SearchClient(
+                    endpoint=self.config.AZURE_SEARCH_ENDPOINT,
+                    index_name=self.search_index_name,
+                    credential=self.search_key_credential,
+                    transport=self._azure_transport(),
+                )
+            return self._search_client
+
+    @property
+    def search_index_client(self) -> SearchIndexClient:
+        with self._lock:
+            if self._search_index_client is None:
+                self._search_index_client = SearchIndexClient(
+                    endpoint=self.config.AZURE_SEARCH_ENDPOINT,
+                    credential=self.search_key_credential,
+                    transport=self._azure_transport(),
+                )
+            return self._search_index_client
+
+    @property
+    def blob_client(self) -> BlobServiceClient:
+        with self._lock:
+            if self._blob_client is None:
+                self._blob_client = BlobServiceClient.from_connection_string(
+                    self.config.AZURE_STORAGE_CONNECTION_STRING,
+                    transport=self._azure_transport(),
+                )
+            return self._blob_client
+
+    @property
+    def openai_client(self) -> AzureOpenAI:
+        """OpenAI 클라이언트"""
+        with self._lock:
+            if self._openai_client is None:
+                self._openai_client = AzureOpenAI(
+                    azure_endpoint=self.config.AZURE_OPENAI_ENDPOINT,
+                    api_key=self.config.AZURE_OPENAI_API_KEY,
+                    api_version=self.config.AZURE_OPENAI_API_VERSION,
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=self.config.HTTP_POOL_SIZE,
+                            max_keepalive_connections=self.config.HTTP_POOL_SIZE,
+                        )
+                    ),
+                )
+            return self._openai_client
+
+    def _async_clients(self) -> Dict[str, Any]:
+        """현재 이벤트 루프용 비동기 클라이언트 모음 (루프가 바뀌면 이전 클라이언트를 닫고 새로 생성)"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._async_loop is not loop:
+                stale_loop, stale = self._async_loop, self._async
+                self._async_loop = loop
+                self._async = {}
+                if stale:
+                    self._close_stale_clients(stale_loop, stale)
+            return self._async
+
+    def _close_stale_clients(self, loop, clients: Dict[str, Any]):
+        """이전 이벤트 루프의 클라이언트 정리 (그 루프가 아직 실행 중이면 그 루프에서, 아니면 현재 루프에서)"""
+        if loop is not None and loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close_clients(clients), loop)
+            return
+        task = asyncio.get_running_loop().create_task(self._close_clients(clients))
+        self._closing_tasks.add(task)
+        task.add_done_callback(self._closing_tasks.discard)
+
+    def _async_azure_transport(self) -> AioHttpTransport:
+        """비동기 Search/Blob 클라이언트가 함께 쓰는 HTTP 연결 풀"""
+        clients = self._async_clients()
+        if "transport" not in clients:
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.config.HTTP_POOL_SIZE)
+            )
+            clients["session"] = session
+            clients["transport"] = AioHttpTransport(
+                session=session, session_owner=False
+            )
+        return clients["transport"]
+
+    @property
+    def async_search_client(self) -> AsyncSearchClient:
+        """비동기 Search 클라이언트, SEARCH_BACKEND=local이면 로컬 검색 백엔드"""
+        clients = self._async_clients()
+        if "search" not in clients:
+            if self.config.SEARCH_BACKEND == "local":
+                from local_search import AsyncLocalSearchClient
+
+                clients["search"] = AsyncLocalSearchClient(self.search_client)
+            else:
+                clients["search"] = AsyncSearchClient(
+                    endpoint=self.config.AZURE_SEARCH_ENDPOINT,
+                    index_name=self.search_index_name,
+                    credential=self.search_key_credential,
+                    transport=self._async_azure_transport(),
+                )
+        return clients["search"]
+
+    @property
+    def async_blob_client(self) -> AsyncBlobServiceClient:
+        clients = self._async_clients()
+        if "blob" not in clients:
+            clients["blob"] = AsyncBlobServiceClient.from_connection_string(
+                self.config.AZURE_STORAGE_CONNECTION_STRING,
+                transport=self._async_azure_transport(),
+            )
+        return clients["blob"]
+
+    @property
+    def async_openai_client(self) -> AsyncAzureOpenAI:
+        clients = self._async_clients()
+        if "openai" not in clients:
+            clients["openai"] = AsyncAzureOpenAI(
+                azure_endpoint=self.config.AZURE_OPENAI_ENDPOINT,
+                api_key=self.config.AZURE_OPENAI_API_KEY,
+                api_version=self.config.AZURE_OPENAI_API_VERSION,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.config.HTTP_POOL_SIZE,
+                        max_keepalive_connections=self.config.HTTP_POOL_SIZE,
+                    )
+                ),
+            )
+        return clients["openai"]
+
+    async def close_async_clients(self):
+        """현재 이벤트 루프의 비동기 클라이언트와 연결 풀 정리 (서버 종료 시 호출)"""
+        await self._close_clients(self._async_clients())
+
+    async def _close_clients(self, clients: Dict[str, Any]):
+        for name in ("search", "blob", "openai", "session"):
+            client = clients.pop(name, None)
+            if client is None:
+                continue
+            try:
+                await client.close()
+            except Exception as e:
+                print(f"비동기 클라이언트 정리 중 오류: {e}")
+        clients.pop("transport", None)
+
+    def provision_search_index(self, force: bool = False):
+        """검색 인덱스 생성/갱신 (프로세스당 1회, force=True면 다시 수행)"""
+        with self._lock:
+            if self._index_provisioned and not force:
+                return
+            if self.config.SEARCH_BACKEND != "local":
+                self._setup_search_index()
+            self._index_provisioned = True
 
     def _setup_search_index(self):
         """검색 인덱스 생성"""
@@ -53,37 +290,248 @@ class AzureClients:
             SearchableField(name="title", type=SearchFieldDataType.String),
             SearchableField(name="content", type=SearchFieldDataType.String),
             SearchableField(name="summary", type=SearchFieldDataType.String),
-            SearchableField(name="incident_type", type=SearchFieldDataType.String),
+            # 검색 필터/선택지(facet)용
+            SearchableField(
+                name="incident_type",
+                type=SearchFieldDataType.String,
+                filterable=True,
+                facetable=True,
+            ),
             SearchableField(name="root_cause", type=SearchFieldDataType.String),
             SearchableField(name="emergency_actions", type=SearchFieldDataType.String),
             SearchField(
                 name="content_vector",
                 type=SearchFieldDataType.Collection(SearchFieldDataType.Single),
                 searchable=True,
-                vector_search_dimensions=1536,
+                vector_search_dimensions=self.vector_dimensions,
                 vector_search_profile_name="default-vector-profile",
             ),
             SimpleField(name="file_path", type=SearchFieldDataType.String),
-            SimpleField(name="upload_date", type=SearchFieldDataType.DateTimeOffset),
+            SimpleField(
+                name="upload_date",
+                type=SearchFieldDataType.DateTimeOffset,
+                filterable=True,
+                sortable=True,
+                facetable=True,
+            ),
+            # 시스템/서비스 태그 (검색 필터/선택지용)
+            SimpleField(
+                name="tags",
+                type=SearchFieldDataType.Collection(SearchFieldDataType.String),
+                filterable=True,
+                facetable=True,
+            ),
+            # 중복 판별용 해시 키 (필터 조회 전용)
+            SimpleField(
+                name="title_hash", type=SearchFieldDataType.String, filterable=True
+            ),
+            SimpleField(
+                name="content_hash", type=SearchFieldDataType.String, filterable=True
+            ),
+            # 청크 레코드가 속한 원본 보고서 id와 청크 순번
+            SimpleField(
+                name="parent_id", type=SearchFieldDataType.String, filterable=True
+            ),
+            SimpleField(
+                name="chunk_index",
+                type=SearchFieldDataType.Int32,
+                filterable=True,
+                sortable=True,
+            ),
+            # 청크 임베딩 입력에 쓰인 섹션 제목 (재임베딩 시 같은 입력 재구성)
+            SimpleField(name="chunk_heading", type=SearchFieldDataType.String),
+            # 청크 본문의 원문 내 시작 위치(문자), 전체 보기에서 앞 청크와 겹친 부분을 정확히 빼는 데 사용
+            SimpleField(name="chunk_offset", type=SearchFieldDataType.Int32),
+            # 레코드를 만든 분석 프롬프트 버전과 임베딩 모델 (재인덱싱 대상 조회용)
+            SimpleField(
+                name="analysis_prompt_version",
+                type=SearchFieldDataType.String,
+                filterable=True,
+            ),
+            SimpleField(
+                name="embedding_model",
+                type=SearchFieldDataType.String,
+                filterable=True,
+            ),
         ]
 
-        vector_search = VectorSearch(
+        index = SearchIndex(
+            name=self.search_index_name,
+            fields=fields,
+            vector_search=self._vector_search(),
+        )
+
+        try:
+            self.search_index_client.create_or_update_index(index)
+        except Exception as e:
+            print(f"인덱스 생성 중 오류: {e}")
+            # 기존 인덱스의 벡터 차원/HNSW 구성/필드 속성은 제자리에서 바꿀 수 없음
+            print(
+                "벡터 차원/HNSW/압축 설정이나 필드 속성을 바꿨다면 AZURE_SEARCH_INDEX_VERSION을 올리고 "
+                "`python azure_client.py --migrate`로 새 인덱스를 만드세요."
+            )
+
+    @property
+    def vector_dimensions(self) -> int:
+        """content_vector 차원 (EMBEDDING_DIMENSIONS, 없으면 모델 기본 차원)"""
+        return self.config.EMBEDDING_DIMENSIONS or DEFAULT_EMBEDDING_DIMENSIONS
+
+    def _vector_search(self) -> VectorSearch:
+        """벡터 검색 구성 (HNSW 파라미터와 선택적 양자화 압축)"""
+        config = self.config
+        algorithm = HnswAlgorithmConfiguration(
+            name="default-algorithm",
+            parameters=HnswParameters(
+                m=config.VECTOR_HNSW_M,
+                ef_construction=config.VECTOR_HNSW_EF_CONSTRUCTION,
+                ef_search=config.VECTOR_HNSW_EF_SEARCH,
+                metric=config.VECTOR_METRIC,
+            ),
+        )
+
+        # 압축 시 양자화 벡터로 후보를 oversampling배 찾고 원본(전정밀도) 벡터로 재채점
+        compression_options = {
+            "rerank_with_original_vectors": config.VECTOR_RESCORE,
+            "default_oversampling": config.VECTOR_OVERSAMPLING if config.VECTOR_RESCORE else None,
+        }
+        compressions = []
+        if config.VECTOR_COMPRESSION == "scalar":
+            compressions.append(
+                ScalarQuantizationCompression(
+                    compression_name="default-compression",
+                    parameters=ScalarQuantizationParameters(
+                        quantized_data_type=VectorSearchCompressionTarget.INT8
+                    ),
+                    **compression_options,
+                )
+            )
+        elif config.VECTOR_COMPRESSION == "binary":
+            compressions.append(
+                BinaryQuantizationCompression(
+                    compression_name="default-compression", **compression_options
+                )
+            )
+        elif config.VECTOR_COMPRESSION != "none":
+            raise ValueError(f"지원하지 않는 VECTOR_COMPRESSION: {config.VECTOR_COMPRESSION}")
+
+        return VectorSearch(
             profiles=[
                 VectorSearchProfile(
                     name="default-vector-profile",
                     algorithm_configuration_name="default-algorithm",
+                    compression_name="default-compression" if compressions else None,
                 )
             ],
-            algorithms=[HnswAlgorithmConfiguration(name="default-algorithm")],
+            algorithms=[algorithm],
+            compressions=compressions or None,
         )
 
-        index = SearchIndex(
-            name=self.config.AZURE_SEARCH_INDEX_NAME,
-            fields=fields,
-            vector_search=vector_search,
+    def migrate_search_index(self) -> int:
+        """현재 스키마 버전의 인덱스를 만들고 직전 버전 인덱스의 문서를 복사 (복사한 문서 수 반환)
+
+        벡터 차원이 같으면 벡터까지 그대로 복사하고, 다르면 벡터 없이 복사한 뒤
+        embedding_model을 비워 `python reindex.py`가 새 차원으로 다시 임베딩하게 한다.
+        이전 인덱스는 삭제하지 않는다 (검증 후 직접 삭제).
+        """
+        self.provision_search_index(force=True)
+        if self.config.SEARCH_BACKEND == "local":
+            return 0
+
+        target = self.search_index_name
+        existing = set(self.search_index_client.list_index_names())
+        source = None
+        for version in range(self.config.AZURE_SEARCH_INDEX_VERSION - 1, 0, -1):
+            name = versioned_index_name(self.config.AZURE_SEARCH_INDEX_NAME, version)
+            if name in existing:
+                source = name
+                break
+        if source is None:
+            print(f"'{target}' 이전 버전의 인덱스가 없어 복사를 건너뜁니다.")
+            return 0
+
+        source_index = self.search_index_client.get_index(source)
+        target_fields = {
+            field.name for field in self.search_index_client.get_index(target).fields
+        }
+        source_dimensions = next(
+            (
+                field.vector_search_dimensions
+                for field in source_index.fields
+                if field.name == "content_vector"
+            ),
+            None,
         )
+        keep_vectors = source_dimensions == self.vector_dimensions
+        select = [
+            field.name
+            for field in source_index.fields
+            if field.name in target_fields
+            and not field.hidden
+            and (keep_vectors or field.name != "content_vector")
+        ]
 
-        try:
-            self.search_index_client.create_or_update_index(index)
-        except Exception as e:
-            print(f"인덱스 생성 중 오류: {e}")
+        source_client = SearchClient(
+            endpoint=self.config.AZURE_SEARCH_ENDPOINT,
+            index_name=source,
+            credential=self.search_key_credential,
+            transport=self._azure_transport(),
+        )
+        copied = 0
+        batch: List[Dict[str, Any]] = []
+
+        def flush():
+            nonlocal copied
+            results = self.search_client.merge_or_upload_documents(batch)
+            copied += sum(1 for result in results if result.succeeded)
+            batch.clear()
+
+        for result in iter_index_documents(source_client, select):
+            document = {key: value for key, value in result.items() if not key.startswith("@")}
+            if not keep_vectors:
+                document["embedding_model"] = ""
+            batch.append(document)
+            if len(batch) >= _MIGRATION_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+
+        print(f"'{source}' -> '{target}' 문서 {copied}건 복사")
+        if not keep_vectors:
+            print(
+                f"벡터 차원이 달라({source_dimensions} -> {self.vector_dimensions}) 벡터는 복사하지 않았습니다. "
+                "`python reindex.py`로 다시 임베딩하세요."
+            )
+        return copied
+
+
+_SHARED_CLIENTS: Optional[AzureClients] = None
+_SHARED_CLIENTS_LOCK = threading.Lock()
+
+
+def get_azure_clients(config: Optional[Config] = None) -> AzureClients:
+    """프로세스 공용 AzureClients 반환 (최초 호출 시 1회 생성)"""
+    global _SHARED_CLIENTS
+    with _SHARED_CLIENTS_LOCK:
+        if _SHARED_CLIENTS is None:
+            _SHARED_CLIENTS = AzureClients(config or Config())
+        return _SHARED_CLIENTS
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="검색 인덱스 생성/갱신")
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="AZURE_SEARCH_INDEX_VERSION 인덱스를 만들고 이전 버전 인덱스의 문서를 복사",
+    )
+    args = parser.parse_args()
+
+    # 배포 시 또는 인덱스 스키마 변경 시 1회 실행하는 부트스트랩 단계
+    clients = get_azure_clients()
+    if args.migrate:
+        clients.migrate_search_index()
+    else:
+        clients.provision_search_index()
+    print(f"검색 인덱스 '{clients.search_index_name}' 준비 완료")
@@ -0,0 +1,310 @@
+"""검색/답변 경로 지연시간 벤치마크
+
+실제 IncidentChatbot -> VectorStore -> DocumentProcessor 코드를 그대로 실행하되,
+OpenAI/Search/Blob은 지연시간을 주입할 수 있는 로컬 대역으로 교체한다.
+
+    python benchmarks/retrieval_benchmark.py --sizes 1000,10000,100000 --users 1,8
+
+단계별 p50/p95/p99(ms)와 동시 사용자 수별 처리량(query/s)을 출력한다.
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Dict, List, Callable, Any
+
+# 벤치마크는 캐시가 꺼진 상태(cold)를 기본으로 측정 (모듈 import 전에 설정)
+os.environ.setdefault("LLM_CACHE_PATH", "")
+os.environ.setdefault("AZURE_STORAGE_KEY", "YmVuY2htYXJrLWFjY291bnQta2V5LWZvci1zYXM=")
+os.environ.setdefault("AZURE_OPENAI_EMBEDDING_MODEL", "bench-embedding")
+os.environ.setdefault("AZURE_OPENAI_CHAT_MODEL", "bench-chat")
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import chatbot as chatbot_module
+import vector_store as vector_store_module
+from config import Config
+from azure_client import AzureClients
+from document_processor import DocumentProcessor
+from vector_store import VectorStore
+from chatbot import IncidentChatbot
+from local_search import LocalSearchClient
+
+
+STAGES = [
+    "answer_query",
+    "search_similar_documents",
+    "generate_embedding",
+    "search_client.search",
+    "_generate_sas_urls",
+    "chat_completion",
+]
+
+SYSTEMS = ["결제", "인증", "주문", "정산", "회원", "배송", "검색", "알림"]
+SYMPTOMS = [
+    "DB connection pool exhausted",
+    "API 응답 지연",
+    "네트워크 패킷 유실",
+    "디스크 사용률 100%",
+    "메모리 누수로 인한 OOM",
+    "인증서 만료",
+    "방화벽 정책 오류",
+    "배치 작업 지연",
+]
+CAUSES = [
+    "슬로우 쿼리로 커넥션 반환 지연",
+    "L4 스위치 설정 오류",
+    "로그 파일 미정리",
+    "배포 후 캐시 설정 누락",
+    "트래픽 급증에 따른 스레드 고갈",
+]
+
+
+class StageRecorder:
+    """단계별 소요시간(ms) 수집"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    self.samples[stage].append(elapsed)
+
+        return timed
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+            for stage, values in self.samples.items()
+            if values
+        }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def fake_vector_array(text: str, dim: int) -> np.ndarray:
+    """텍스트 해시로 결정되는 정규화 벡터 (float32 배열)"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def fake_vector(text: str, dim: int) -> List[float]:
+    """텍스트 해시로 결정되는 정규화 벡터"""
+    return fake_vector_array(text, dim).tolist()
+
+
+class FakeOpenAI:
+    """임베딩/채팅 응답을 지연시간만큼 기다린 뒤 돌려주는 OpenAI 대역"""
+
+    def __init__(self, dim: int, embedding_latency: float, chat_latency: float):
+        self.dim = dim
+        self.embedding_latency = embedding_latency
+        self.chat_latency = chat_latency
+        self.embeddings = SimpleNamespace(create=self._embed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+
+    def _embed(self, input, model, **kwargs):
+        time.sleep(self.embedding_latency)
+        inputs = [input] if isinstance(input, str) else input
+        return SimpleNamespace(
+            data=[
+                SimpleNamespace(index=i, embedding=fake_vector(text, self.dim))
+                for i, text in enumerate(inputs)
+            ],
+            usage=SimpleNamespace(prompt_tokens=sum(len(text) for text in inputs)),
+        )
+
+    def _complete(self, model, messages, **kwargs):
+        time.sleep(self.chat_latency)
+        message = SimpleNamespace(content="#### **오류/이상징후 사례**\n(벤치마크 응답)")
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message)],
+            usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0),
+        )
+
+
+class LatencySearchClient:
+    """검색 호출마다 네트워크 지연시간을 더하는 SearchClient 대역"""
+
+    def __init__(self, inner: LocalSearchClient, latency: float):
+        self.inner = inner
+        self.latency = latency
+
+    def search(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return self.inner.search(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.inner, name)
+
+
+def build_corpus(path: str, size: int, dim: int, seed: int = 7) -> LocalSearchClient:
+    """합성 장애보고서 코퍼스 생성 (같은 경로에 이미 있으면 재사용)
+
+    문서 목록과 벡터 행렬을 만든 뒤 load_documents로 한 번에 저장한다.
+    """
+    client = LocalSearchClient(path)
+    if client.get_document_count() == size and client._vectors.shape[1] == dim:
+        return client
+
+    rng = random.Random(seed)
+    documents = []
+    vectors = np.empty((size, dim), dtype=np.float32)
+    for i in range(size):
+        system = rng.choice(SYSTEMS)
+        symptom = rng.choice(SYMPTOMS)
+        cause = rng.choice(CAUSES)
+        title = f"{2020 + i % 5}-{1 + i % 12:02d} {system} 시스템 {symptom} 장애 #{i}"
+        content = f"{system} 시스템에서 {symptom} 현상이 발생하였다. 원인은 {cause}. " * 5
+        documents.append(
+            {
+                "id": f"bench-{i}",
+                "parent_id": f"bench-{i}",
+                "chunk_index": 0,
+                "title": title,
+                "content": content,
+                "summary": f"{system} {symptom}",
+                "incident_type": "시스템 장애",
+                "root_cause": cause,
+                "emergency_actions": "서비스 재기동 및 설정 원복",
+                "file_path": f"https://benchaccount.blob.core.windows.net/reports/{i}_{system}.docx",
+                "upload_date": "2024-01-01T00:00:00+09:00",
+            }
+        )
+        vectors[i] = fake_vector_array(title, dim)
+    client.load_documents(documents, vectors)
+    return client
+
+
+def build_chatbot(args, corpus: LocalSearchClient, recorder: StageRecorder) -> IncidentChatbot:
+    """실제 클래스에 로컬 대역 클라이언트를 주입하고 단계별 계측 연결"""
+    azure_clients = AzureClients(Config())
+    fake_openai = FakeOpenAI(args.dim, args.embedding_latency, args.chat_latency)
+    fake_openai.chat.completions.create = recorder.wrap(
+        "chat_completion", fake_openai.chat.completions.create
+    )
+    search_client = LatencySearchClient(corpus, args.search_latency)
+    search_client.search = recorder.wrap("search_client.search", search_client.search)
+    azure_clients._openai_client = fake_openai
+    azure_clients._search_client = search_client
+
+    doc_processor = DocumentProcessor(azure_clients)
+    doc_processor.generate_embedding = recorder.wrap(
+        "generate_embedding", doc_processor.generate_embedding
+    )
+    vector_store = VectorStore(azure_clients, doc_processor)
+    vector_store._generate_sas_urls = recorder.wrap(
+        "_generate_sas_urls", vector_store._generate_sas_urls
+    )
+    vector_store.search_similar_documents = recorder.wrap(
+        "search_similar_documents", vector_store.search_similar_documents
+    )
+    chatbot = IncidentChatbot(azure_clients, vector_store)
+    chatbot.answer_query = recorder.wrap("answer_query", chatbot.answer_query)
+    return chatbot
+
+
+def run(args, size: int, users: int) -> Dict[str, Any]:
+    corpus_path = os.path.join(args.corpus_dir, f"{size}_{args.dim}")
+    corpus = build_corpus(corpus_path, size, args.dim)
+    recorder = StageRecorder()
+    chatbot = build_chatbot(args, corpus, recorder)
+
+    rng = random.Random(size)
+    queries = [
+        f"{rng.choice(SYSTEMS)} {rng.choice(SYMPTOMS)}" for _ in range(args.queries)
+    ]
+
+    def ask(query: str):
+        if not args.warm_cache:
+            vector_store_module._QUERY_EMBEDDING_CACHE.clear()
+            chatbot_module._ANSWER_CACHE.clear()
+            vector_store_module._SAS_CACHE.clear()
+        chatbot.answer_query(query)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        list(executor.map(ask, queries))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "corpus_size": size,
+        "users": users,
+        "queries": len(queries),
+        "throughput_qps": len(queries) / elapsed if elapsed else 0.0,
+        "stages_ms": recorder.summary(),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(
+        f"\n[corpus={report['corpus_size']:,} users={report['users']}] "
+        f"{report['queries']} queries, {report['throughput_qps']:.1f} query/s"
+    )
+    print(f"  {'stage':<28}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for stage, stats in report["stages_ms"].items():
+        print(
+            f"  {stage:<28}{stats['count']:>7}"
+            f"{stats['p50']:>10.2f}{stats['p95']:>10.2f}{stats['p99']:>10.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색/답변 경로 지연시간 벤치마크")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="코퍼스 크기 목록")
+    parser.add_argument("--users", default="1,8", help="동시 사용자 수 목록")
+    parser.add_argument("--queries", type=int, default=200, help="실행별 질의 수")
+    parser.add_argument("--dim", type=int, default=1536, help="임베딩 차원")
+    parser.add_argument("--embedding-latency", type=float, default=0.05, help="임베딩 지연(초)")
+    parser.add_argument("--search-latency", type=float, default=0.03, help="검색 지연(초)")
+    parser.add_argument("--chat-latency", type=float, default=0.5, help="답변 생성 지연(초)")
+    parser.add_argument("--warm-cache", action="store_true", help="질의/답변 캐시를 비우지 않음")
+    parser.add_argument(
+        "--corpus-dir",
+        default=os.path.join(tempfile.gettempdir(), "incident_bench_corpus"),
+        help="합성 코퍼스 저장 경로 (재실행 시 재사용)",
+    )
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    reports = []
+    for size in [int(v) for v in args.sizes.split(",")]:
+        for users in [int(v) for v in args.users.split(",")]:
+            report = run(args, size, users)
+            print_report(report)
+            reports.append(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""벡터 검색 재현율/지연시간 리포트
+
+현재 검색 인덱스(AZURE_SEARCH_INDEX_VERSION)의 HNSW/압축 설정으로 찾은 최근접 이웃을
+같은 인덱스의 전수 탐색(exhaustive, 원본 벡터 기준) 결과와 비교한다.
+
+    python benchmarks/vector_recall.py --samples 200 --k 10
+    python benchmarks/vector_recall.py --queries queries.txt --oversampling 2,5,10
+
+질의 벡터는 인덱스에 저장된 청크 벡터를 표본으로 쓰거나(기본), --queries 파일의
+질의문(한 줄에 1개)을 임베딩해 만든다. recall@k와 근사/전수 검색의 p50/p95(ms)를 출력한다.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from azure_client import get_azure_clients, iter_index_documents
+from document_processor import DocumentProcessor
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def sample_query_vectors(search_client, samples: int, seed: int) -> List[Dict[str, Any]]:
+    """인덱스에 저장된 청크 벡터 중 samples개를 질의로 사용 (자기 자신은 정답에서 제외)"""
+    ids = [result["id"] for result in iter_index_documents(search_client, ["id"])]
+    random.Random(seed).shuffle(ids)
+    queries = []
+    for doc_id in ids[:samples]:
+        document = search_client.get_document(doc_id, selected_fields=["id", "content_vector"])
+        if document.get("content_vector"):
+            queries.append({"exclude": doc_id, "vector": document["content_vector"]})
+    return queries
+
+
+def embed_queries(doc_processor: DocumentProcessor, path: str) -> List[Dict[str, Any]]:
+    """질의 파일(한 줄에 질의 1개)을 현재 임베딩 설정으로 임베딩"""
+    with open(path, "r", encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    return [
+        {"exclude": None, "vector": doc_processor.generate_embedding(text)} for text in texts
+    ]
+
+
+def nearest_ids(
+    search_client,
+    vector: List[float],
+    k: int,
+    exclude: Optional[str],
+    exhaustive: bool = False,
+    oversampling: Optional[float] = None,
+) -> tuple:
+    """벡터 검색 1회 (상위 k개 id, 소요시간 ms)"""
+    vector_query = {
+        "vector": vector,
+        # 질의로 쓴 청크 자신이 결과에 포함될 수 있으므로 1개 더 가져옴
+        "k_nearest_neighbors": k + 1,
+        "fields": "content_vector",
+        "kind": "vector",
+        "exhaustive": exhaustive,
+    }
+    if oversampling is not None:
+        vector_query["oversampling"] = oversampling
+    started = time.perf_counter()
+    results = list(
+        search_client.search(
+            search_text=None, vector_queries=[vector_query], select=["id"], top=k + 1
+        )
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    ids = [result["id"] for result in results if result["id"] != exclude]
+    return ids[:k], elapsed
+
+
+def run(search_client, queries: List[Dict[str, Any]], k: int, oversampling: Optional[float]) -> Dict[str, Any]:
+    recalls, ann_ms, exact_ms = [], [], []
+    for query in queries:
+        exact, exact_elapsed = nearest_ids(
+            search_client, query["vector"], k, query["exclude"], exhaustive=True
+        )
+        approx, ann_elapsed = nearest_ids(
+            search_client, query["vector"], k, query["exclude"], oversampling=oversampling
+        )
+        if exact:
+            recalls.append(len(set(approx) & set(exact)) / len(exact))
+        ann_ms.append(ann_elapsed)
+        exact_ms.append(exact_elapsed)
+    return {
+        "oversampling": oversampling,
+        "queries": len(queries),
+        f"recall@{k}": sum(recalls) / len(recalls) if recalls else 0.0,
+        "ann_ms": {"p50": percentile(ann_ms, 50), "p95": percentile(ann_ms, 95)},
+        "exhaustive_ms": {"p50": percentile(exact_ms, 50), "p95": percentile(exact_ms, 95)},
+    }
+
+
+def print_report(config: Config, index_name: str, dimensions: int, k: int, reports: List[Dict[str, Any]]):
+    print(
+        f"\n[index={index_name} dim={dimensions} m={config.VECTOR_HNSW_M} "
+        f"efConstruction={config.VECTOR_HNSW_EF_CONSTRUCTION} efSearch={config.VECTOR_HNSW_EF_SEARCH} "
+        f"metric={config.VECTOR_METRIC} compression={config.VECTOR_COMPRESSION} "
+        f"rescore={config.VECTOR_RESCORE}]"
+    )
+    print(
+        f"  {'oversampling':<14}{'queries':>8}{'recall@' + str(k):>12}"
+        f"{'ann p50':>10}{'ann p95':>10}{'exact p50':>11}{'exact p95':>11}"
+    )
+    for report in reports:
+        oversampling = "default" if report["oversampling"] is None else f"{report['oversampling']:g}"
+        print(
+            f"  {oversampling:<14}{report['queries']:>8}{report[f'recall@{k}']:>12.4f}"
+            f"{report['ann_ms']['p50']:>10.2f}{report['ann_ms']['p95']:>10.2f}"
+            f"{report['exhaustive_ms']['p50']:>11.2f}{report['exhaustive_ms']['p95']:>11.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 검색 재현율/지연시간 리포트 (전수 탐색 대비)")
+    parser.add_argument("--k", type=int, default=10, help="비교할 최근접 이웃 수")
+    parser.add_argument("--samples", type=int, default=200, help="인덱스에서 표본으로 쓸 질의 벡터 수")
+    parser.add_argument("--queries", help="질의문 파일 (한 줄에 1개, 지정 시 표본 대신 사용)")
+    parser.add_argument(
+        "--oversampling",
+        default="",
+        help="비교할 oversampling 값 목록 (예: 2,5,10, 압축 인덱스에서만 의미 있음)",
+    )
+    parser.add_argument("--seed", type=int, default=7, help="표본 추출 시드")
+    parser.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = parser.parse_args()
+
+    azure_clients = get_azure_clients(Config())
+    search_client = azure_clients.search_client
+    if args.queries:
+        queries = embed_queries(DocumentProcessor(azure_clients), args.queries)
+    else:
+        queries = sample_query_vectors(search_client, args.samples, args.seed)
+    if not queries:
+        print("질의로 쓸 벡터가 없습니다.")
+        return
+
+    oversampling_values = [None] + [float(v) for v in args.oversampling.split(",") if v]
+    reports = [run(search_client, queries, args.k, value) for value in oversampling_values]
+    print_report(
+        azure_clients.config,
+        azure_clients.search_index_name,
+        azure_clients.vector_dimensions,
+        args.k,
+        reports,
+    )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""장애보고서 일괄 수집 CLI (디렉터리 또는 Blob 컨테이너 접두어)
+
+    python bulk_ingest.py --dir ./postmortems
+    python bulk_ingest.py --blob-prefix archive/2021/ --workers 8
+    python bulk_ingest.py --dir ./postmortems/payment --tag 결제 --tag PG
+
+- 파일명을 title로 사용한다 (Streamlit 업로드와 동일, 같은 title은 교체).
+- --tag로 지정한 시스템/서비스 태그를 이번에 수집하는 모든 파일에 기록한다 (검색 필터용).
+- 체크포인트(JSONL)에 처리 완료한 파일과 파일 해시를 기록하므로, 중단 후 다시
+  실행하면 완료된 파일은 열지 않고 건너뛴다.
+- 체크포인트에 없더라도 같은 title/본문이 이미 인덱싱되어 있으면 분석/임베딩 없이 건너뛴다.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+from typing import Any, Dict, Iterator, List
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+from config import Config
+from azure_client import get_azure_clients
+from document_processor import DocumentProcessor
+from vector_store import VectorStore
+from ingestion import IngestionPipeline
+
+
+SUPPORTED_FILE_TYPES = ("docx", "pdf", "md", "txt")
+
+
+def file_type_of(name: str) -> str:
+    return name.rsplit(".", 1)[-1].lower() if "." in name else ""
+
+
+def file_fingerprint(path: str) -> str:
+    """파일 내용 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Checkpoint:
+    """처리 완료 파일 기록 (source -> fingerprint, 한 줄씩 추가 기록하여 중단에 안전)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 기록 도중 중단된 마지막 줄
+                        continue
+                    self.done[entry["source"]] = entry["fingerprint"]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def is_done(self, source: str, fingerprint: str) -> bool:
+        return self.done.get(source) == fingerprint
+
+    def mark_done(self, source: str, fingerprint: str, status: str):
+        self.done[source] = fingerprint
+        entry = {"source": source, "fingerprint": fingerprint, "status": status}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def directory_items(root: str) -> Iterator[Dict[str, Any]]:
+    """디렉터리 아래 지원 형식 파일을 수집 대상으로 변환"""
+    for directory, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            file_type = file_type_of(filename)
+            if file_type not in SUPPORTED_FILE_TYPES:
+                continue
+            path = os.path.join(directory, filename)
+            yield {
+                "source": os.path.abspath(path),
+                "fingerprint": file_fingerprint(path),
+                "file_path": path,
+                "title": filename,
+                "file_type": file_type,
+            }
+
+
+def blob_items(azure_clients, prefix: str, temp_dir: str) -> Iterator[Dict[str, Any]]:
+    """Blob 컨테이너 접두어 아래 파일을 수집 대상으로 변환 (다운로드는 처리 직전에 수행)"""
+    container = azure_clients.blob_client.get_container_client(
+        azure_clients.config.AZURE_STORAGE_CONTAINER_NAME
+    )
+    for blob in container.list_blobs(name_starts_with=prefix):
+        filename = blob.name.rsplit("/", 1)[-1]
+        file_type = file_type_of(filename)
+        if file_type not in SUPPORTED_FILE_TYPES:
+            continue
+        content_md5 = blob.content_settings.content_md5 if blob.content_settings else None
+        local_path = os.path.join(
+            temp_dir, hashlib.sha256(blob.name.encode("utf-8")).hexdigest()[:16] + "." + file_type
+        )
+
+        def fetch(name=blob.name, path=local_path):
+            with open(path, "wb") as f:
+                container.download_blob(name).readinto(f)
+
+        yield {
+            "source": f"blob:{blob.name}",
+            "fingerprint": content_md5.hex() if content_md5 else blob.etag,
+            "file_path": local_path,
+            "title": filename,
+            "file_type": file_type,
+            "fetch": fetch,
+            "blob_url": container.get_blob_client(blob.name).url,
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="장애보고서 일괄 수집")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dir", help="장애보고서 디렉터리 (하위 디렉터리 포함)")
+    source.add_argument("--blob-prefix", help="Blob 컨테이너 내 경로 접두어")
+    parser.add_argument("--workers", type=int, default=Config.INGEST_MAX_WORKERS, help="동시 처리 파일 수")
+    parser.add_argument("--batch-size", type=int, default=Config.INGEST_BATCH_SIZE, help="인덱스 업로드 묶음 파일 수")
+    parser.add_argument("--checkpoint", default=Config.INGEST_CHECKPOINT_PATH, help="체크포인트 파일 경로")
+    parser.add_argument("--force", action="store_true", help="체크포인트/기존 인덱스와 관계없이 모두 다시 수집")
+    parser.add_argument("--tag", action="append", default=[], help="시스템/서비스 태그 (여러 번 지정 가능)")
+    args = parser.parse_args()
+
+    azure_clients = get_azure_clients(Config())
+    doc_processor = DocumentProcessor(azure_clients)
+    vector_store = VectorStore(azure_clients, doc_processor)
+    checkpoint = Checkpoint(args.checkpoint)
+    temp_dir = tempfile.mkdtemp(prefix="bulk_ingest_")
+
+    if args.dir:
+        candidates = directory_items(args.dir)
+    else:
+        candidates = blob_items(azure_clients, args.blob_prefix, temp_dir)
+
+    # 같은 title은 하나만 수집 (나중에 발견된 파일 기준)
+    items_by_title: Dict[str, Dict[str, Any]] = {}
+    resumed = 0
+    for item in candidates:
+        if not args.force and checkpoint.is_done(item["source"], item["fingerprint"]):
+            resumed += 1
+            continue
+        if item["title"] in items_by_title:
+            print(f"중복 title '{item['title']}': {item['source']} 기준으로 수집")
+        item["tags"] = args.tag
+        items_by_title[item["title"]] = item
+    items: List[Dict[str, Any]] = list(items_by_title.values())
+
+    print(f"수집 대상 {len(items)}건 (체크포인트로 건너뜀 {resumed}건)")
+    failures: List[Dict[str, Any]] = []
+    counts = {"indexed": 0, "unchanged": 0}
+    start = time.perf_counter()
+
+    def on_progress(result, done, total):
+        item = items_by_title[result["title"]]
+        if item.get("fetch") and os.path.exists(item["file_path"]):
+            os.unlink(item["file_path"])
+        if result["success"]:
+            status = "unchanged" if result["skipped"] else "indexed"
+            counts[status] += 1
+            checkpoint.mark_done(item["source"], item["fingerprint"], status)
+        else:
+            failures.append({"source": item["source"], "error": result["error"]})
+        elapsed = time.perf_counter() - start
+        print(
+            f"[{done}/{total}] {'OK ' if result['success'] else 'ERR'} {result['title']} "
+            f"({done / elapsed:.2f} docs/s)"
+        )
+
+    try:
+        pipeline = IngestionPipeline(
+            vector_store,
+            max_workers=args.workers,
+            batch_size=args.batch_size,
+            skip_unchanged=not args.force,
+        )
+        pipeline.run(items, on_progress)
+    finally:
+        checkpoint.close()
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"\n완료: 인덱싱 {counts['indexed']}건, 변경 없음 {counts['unchanged']}건, "
+        f"체크포인트로 건너뜀 {resumed}건, 실패 {len(failures)}건 "
+        f"/ {elapsed:.1f}초 ({len(items) / elapsed if elapsed else 0.0:.2f} docs/s)"
+    )
+    for failure in failures:
+        print(f"  실패: {failure['source']} - {failure['error']}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import math
+import itertools
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+
+class LRUCache:
+    """프로세스 내 공용 LRU 캐시 (최대 항목 수와 TTL 제한, 스레드 안전)"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """캐시 조회 (없거나 만료되었으면 None)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[1] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: Any, value: Any):
+        """캐시 저장 (최대 항목 수 초과 시 가장 오래 사용되지 않은 항목 삭제)"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """전체 항목 삭제"""
+        with self._lock:
+            self._data.clear()
+
+
+class SemanticAnswerCache:
+    """질의 임베딩 유사도 + 검색된 문서 id 집합 기준 답변 캐시
+
+    검색 결과 문서 집합이 같고 질의 임베딩의 코사인 유사도가 threshold 이상이면
+    같은 질문으로 보고 저장된 답변을 돌려준다.
+    """
+
+    def __init__(self, threshold: float, maxsize: int, ttl: float):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _norm(vector: List[float]) -> float:
+        return math.sqrt(sum(v * v for v in vector))
+
+    def lookup(self, embedding: List[float], doc_ids: Iterable[str]) -> Optional[Any]:
+        """유사 질의의 캐시된 답변 조회 (없으면 None)"""
+        doc_ids = frozenset(doc_ids)
+        norm = self._norm(embedding)
+        now = time.monotonic()
+        best_key, best_score = None, self.threshold
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry["expires"] < now:
+                    del self._entries[key]
+                    continue
+                if entry["doc_ids"] != doc_ids or not norm or not entry["norm"]:
+                    continue
+                dot = sum(a * b for a, b in zip(embedding, entry["embedding"]))
+                score = dot / (norm * entry["norm"])
+                if score >= best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key]["value"]
+
+    def store(self, embedding: List[float], doc_ids: Iterable[str], value: Any):
+        """답변 저장 (최대 항목 수 초과 시 가장 오래 사용되지 않은 항목 삭제)"""
+        if self.maxsize <= 0 or not embedding:
+            return
+        with self._lock:
+            self._entries[next(self._counter)] = {
+                "embedding": list(embedding),
+                "norm": self._norm(embedding),
+                "doc_ids": frozenset(doc_ids),
+                "value": value,
+                "expires": time.monotonic() + self.ttl,
+            }
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, doc_ids: Iterable[str]):
+        """해당 문서가 포함된 답변 항목 삭제 (재인덱싱/삭제 시 호출)"""
+        doc_ids = set(doc_ids)
+        if not doc_ids:
+            return
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry["doc_ids"] & doc_ids:
+                    del self._entries[key]
+
+    def clear(self):
+        """전체 항목 삭제"""
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskCache:
+    """SQLite 기반 내용 주소(content-addressed) 캐시 (용량 초과 시 오래 사용되지 않은 항목부터 삭제)
+
+    API 워커/CLI/Streamlit이 같은 파일을 함께 쓰므로 WAL 모드와 잠금 대기 시간을 사용하고,
+    잠금 등 SQLite 오류는 조회는 미적중, 저장은 생략으로 처리해 호출한 작업을 실패시키지 않는다.
+    """
+
+    # 조회 시 마지막 사용 시각은 이 간격(초)보다 오래된 경우에만 갱신 (적중마다 쓰기 방지)
+    ACCESS_UPDATE_INTERVAL = 60.0
+    # 다른 프로세스가 잠금을 쥐고 있을 때 기다리는 시간(초)
+    BUSY_TIMEOUT = 5.0
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, timeout=self.BUSY_TIMEOUT, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                accessed REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON cache(accessed)")
+        self._conn.commit()
+        # 전체 크기는 시작 시 1회만 합산하고 이후 저장/삭제 시 증감 (다른 프로세스 변경분은 정리 직전에 재합산)
+        self._total = self._sum_size()
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """입력 텍스트, 모델/배포명, 프롬프트 버전 등을 묶어 해시 키 생성"""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """캐시 조회 (없거나 SQLite 오류 시 None)"""
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value, accessed FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                self.errors += 1
+                self.misses += 1
+                print(f"디스크 캐시 조회 중 오류: {e}")
+                return None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            now = time.time()
+            if now - row[1] > self.ACCESS_UPDATE_INTERVAL:
+                try:
+                    self._conn.execute(
+                        "UPDATE cache SET accessed = ? WHERE key = ?", (now, key)
+                    )
+                    self._conn.commit()
+                except sqlite3.Error:
+                    # 사용 시각 갱신은 정리 순서에만 쓰이므로 실패해도 조회 결과는 그대로 반환
+                    self._rollback()
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        """캐시 저장 후 용량 초과분 정리 (SQLite 오류 시 저장 생략)"""
+        data = json.dumps(value, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        with self._lock:
+            try:
+                previous = self._conn.execute(
+                    "SELECT size FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (key, data, size, time.time()),
+                )
+                total = self._evict(self._total + size - (previous[0] if previous else 0))
+                self._conn.commit()
+                # 커밋된 경우에만 반영 (롤백되면 이전 합계 유지)
+                self._total = total
+            except sqlite3.Error as e:
+                self._rollback()
+                self.errors += 1
+                print(f"디스크 캐시 저장 중 오류: {e}")
+
+    def _rollback(self):
+        try:
+            self._conn.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _sum_size(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def _evict(self, total: int) -> int:
+        """전체 크기(total)가 max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 삭제하고 남은 크기 반환
+
+        커밋 전 트랜잭션 안에서 호출되므로 self._total은 바꾸지 않는다.
+        """
+        if total <= self.max_bytes:
+            return total
+        # 다른 프로세스의 저장/삭제를 반영해 실제 크기로 다시 확인
+        total = self._sum_size()
+        if total <= self.max_bytes:
+            return total
+        rows = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed")
+        to_delete = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", to_delete)
+        return total
+
+    def stats(self) -> Dict[str, Any]:
+        """적중/미적중 횟수와 현재 용량"""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+        }
+
+
+_DISK_CACHES: Dict[str, DiskCache] = {}
+_DISK_CACHES_LOCK = threading.Lock()
+
+
+def get_disk_cache(path: str, max_bytes: int) -> Optional[DiskCache]:
+    """경로별 프로세스 공용 DiskCache 반환 (경로가 비어 있거나 열지 못하면 캐시 미사용)"""
+    if not path:
+        return None
+    with _DISK_CACHES_LOCK:
+        if path not in _DISK_CACHES:
+            try:
+                _DISK_CACHES[path] = DiskCache(path, max_bytes)
+            except sqlite3.Error as e:
+                # 캐시를 열지 못해도 캐시 없이 동작 (다음 호출 시 다시 시도)
+                print(f"디스크 캐시 초기화 중 오류: {e}")
+                return None
+        return _DISK_CACHES[path]
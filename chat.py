@@ -3,10 +3,11 @@ from datetime import datetime, timezone, timedelta
 
 from dotenv import load_dotenv
 from chatbot import IncidentChatbot
-from azure_client import AzureClients
+from azure_client import get_azure_clients
 from vector_store import VectorStore
 from document_processor import DocumentProcessor
 from config import Config
+from telemetry import start_metrics_server
 
 load_dotenv(override=True)
 
@@ -49,8 +50,9 @@ def init_session_state():
 
     # 챗봇 인스턴스 생성 (최초 1회만)
     if "chatbot" not in st.session_state:
-        config = Config()
-        azure_clients = AzureClients(config)
+        azure_clients = get_azure_clients(Config())
+        # Streamlit 프로세스의 메트릭 엔드포인트 (METRICS_PORT 설정 시, 프로세스당 1회)
+        start_metrics_server(azure_clients.config.METRICS_PORT)
         doc_processor = DocumentProcessor(azure_clients)
         vector_store = VectorStore(azure_clients, doc_processor)
         st.session_state["chatbot"] = IncidentChatbot(azure_clients, vector_store)
@@ -59,6 +61,85 @@ def init_session_state():
 # if clear_btn:
 def reset_conversation():
     st.session_state["messages"] = []
+    st.session_state["opened_cases"] = {}
+
+
+def render_related_cases(message_index: int, related_cases):
+    """답변에 참고한 사례 목록 표시 (본문은 사용자가 열 때만 조회)"""
+    if not related_cases:
+        return
+    opened_cases = st.session_state.setdefault("opened_cases", {})
+    with st.expander("참고한 장애 사례"):
+        for case in related_cases:
+            case_id = case["id"]
+            st.markdown(f"**{case['title']}**")
+            if case_id not in opened_cases:
+                if st.button("전체 내용 보기", key=f"open_{message_index}_{case_id}"):
+                    with st.spinner("문서 불러오는 중..."):
+                        opened_cases[case_id] = st.session_state[
+                            "chatbot"
+                        ].vector_store.get_full_document(case_id)
+                    st.rerun()
+                continue
+            document = opened_cases[case_id]
+            if document is None:
+                st.warning("문서를 불러오지 못했습니다.")
+                continue
+            if document.get("file_path"):
+                st.markdown(f"[원본 파일]({document['file_path']})")
+            st.text(document.get("content", ""))
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_facets(_vector_store):
+    """검색 조건 선택지 (장애 유형/태그별 보고서 건수, 5분간 재사용)"""
+    try:
+        return _vector_store.get_facets()
+    except Exception as e:
+        print(f"검색 조건 조회 중 오류: {e}")
+        return {}
+
+
+def render_search_filters():
+    """사이드바 검색 조건 (장애 유형, 태그, 등록 기간), 선택한 조건을 filters dict로 반환"""
+    facets = load_facets(st.session_state["chatbot"].vector_store)
+    st.subheader("검색 조건")
+
+    type_counts = {f["value"]: f["count"] for f in facets.get("incident_type", [])}
+    incident_types = st.multiselect(
+        "장애 유형",
+        list(type_counts),
+        format_func=lambda value: f"{value} ({type_counts[value]})",
+        placeholder="전체",
+    )
+    tag_counts = {f["value"]: f["count"] for f in facets.get("tags", [])}
+    tags = st.multiselect(
+        "시스템/서비스 태그",
+        list(tag_counts),
+        format_func=lambda value: f"{value} ({tag_counts[value]})",
+        placeholder="전체",
+    )
+
+    period = st.selectbox("등록 기간", ["전체", "최근 3개월", "최근 12개월", "직접 지정"])
+    today = datetime.now(timezone(timedelta(hours=9))).date()
+    date_from = date_to = None
+    if period == "최근 3개월":
+        date_from = today - timedelta(days=90)
+    elif period == "최근 12개월":
+        date_from = today - timedelta(days=365)
+    elif period == "직접 지정":
+        selected = st.date_input(
+            "기간", value=(today - timedelta(days=365), today), max_value=today
+        )
+        if isinstance(selected, (list, tuple)) and len(selected) == 2:
+            date_from, date_to = selected
+
+    return {
+        "incident_types": incident_types,
+        "tags": tags,
+        "date_from": date_from,
+        "date_to": date_to,
+    }
 
 
 # 세션 상태 초기화
@@ -69,6 +150,8 @@ init_session_state()
 with st.sidebar:
     # 초기화 버튼
     clear_btn = st.button("대화 초기화", type="primary", use_container_width=True)
+    # 검색 조건 (선택한 조건에 맞는 사례 안에서만 검색)
+    search_filters = render_search_filters()
 
 
 # 대화 초기화 처리
@@ -87,26 +170,32 @@ if user_input:
     st.rerun()
 
 # 메시지 기록이 있으면 모두 표시
-for msg in st.session_state["messages"]:
+for index, msg in enumerate(st.session_state["messages"]):
     if msg["role"] == "user":
         with st.chat_message("user"):
             st.write(msg["content"])
     else:
         with st.chat_message("assistant"):
             st.write(msg["content"])
+            render_related_cases(index, msg.get("related_cases"))
 
-# pending 상태면 spinner와 함께 빈 assistant 메시지 출력
+# pending 상태면 관련 사례 검색 후 답변을 스트리밍으로 출력
 if st.session_state.get("pending", False):
     with st.chat_message("assistant"):
-        with st.spinner("답변 생성 중..."):
-            # 답변 생성
-            result = st.session_state["chatbot"].answer_query(
-                st.session_state["pending_question"]
-            )
-            ai_response = result["answer"]
-            st.session_state["messages"].append(
-                {"role": "assistant", "content": ai_response}
+        with st.spinner("관련 사례 검색 중..."):
+            result = st.session_state["chatbot"].answer_query_stream(
+                st.session_state["pending_question"], filters=search_filters
             )
-            st.session_state["pending"] = False
-            st.session_state["pending_question"] = None
-            st.rerun()
+        # 답변 생성 (토큰이 도착하는 대로 표시)
+        ai_response = st.write_stream(result["stream"])
+        # 사례 목록은 id/제목만 보관 (본문은 열람 시 get_full_document로 조회)
+        related_cases = [
+            {"id": doc.get("parent_id") or doc["id"], "title": doc.get("title", "")}
+            for doc in result["related_documents"]
+        ]
+        st.session_state["messages"].append(
+            {"role": "assistant", "content": ai_response, "related_cases": related_cases}
+        )
+        st.session_state["pending"] = False
+        st.session_state["pending_question"] = None
+        st.rerun()
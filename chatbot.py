@@ -1,23 +1,70 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from config import Config
 from azure_client import AzureClients
-from vector_store import VectorStore
+from vector_store import VectorStore, add_invalidation_listener
 from document_processor import DocumentProcessor
+from cache import SemanticAnswerCache
+from telemetry import span, current_span, record_span
+from token_counter import count_tokens
+from context_budget import pack_cases
+import time
+import asyncio
 from datetime import datetime, timezone, timedelta
 
 
+# 유사 질의 답변 캐시 (프로세스 내 공유, 관련 문서 삭제/재인덱싱 시 무효화)
+_ANSWER_CACHE = SemanticAnswerCache(
+    Config.ANSWER_CACHE_THRESHOLD, Config.ANSWER_CACHE_SIZE, Config.ANSWER_CACHE_TTL
+)
+add_invalidation_listener(_ANSWER_CACHE.invalidate)
+
+
+async def _async_iter(*parts: str):
+    """고정 문구를 비동기 스트림 형태로 반환"""
+    for part in parts:
+        yield part
+
+
+def _cache_entry(answer: str, packed_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """답변 캐시 항목 (답변과 프롬프트에 담은 사례 id)"""
+    return {"answer": answer, "case_ids": [doc["id"] for doc in packed_documents]}
+
+
+def _cached_documents(
+    similar_docs: List[Dict[str, Any]], cached_answer: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """캐시된 답변을 만들 때 프롬프트에 담았던 사례만 (캐시 미적중 시 응답과 같은 범위)"""
+    case_ids = set(cached_answer["case_ids"])
+    return [doc for doc in similar_docs if doc["id"] in case_ids]
+
+
 class IncidentChatbot:
     def __init__(self, azure_clients: AzureClients, vector_store: VectorStore):
         self.azure_clients = azure_clients
         self.vector_store = vector_store
         self.openai_client = azure_clients.openai_client
 
-    def answer_query(self, user_query: str) -> Dict[str, Any]:
-        """사용자 질의에 대한 답변 생성"""
+    def answer_query(
+        self, user_query: str, filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """사용자 질의에 대한 답변 생성
+
+        filters(장애 유형/등록일 범위/태그, vector_store.build_search_filter 참고)가 있으면
+        조건에 맞는 사례만 참고한다.
+        """
+        with span("answer_query"):
+            return self._answer_query(user_query, filters)
+
+    def _answer_query(
+        self, user_query: str, filters: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
         try:
             # 유사한 장애 사례 검색
+            query_embedding = self.vector_store.embed_query(user_query)
             similar_docs = self.vector_store.search_similar_documents(
-                user_query, top_k=3
+                user_query,
+                top_k=self.azure_clients.config.CONTEXT_MAX_CASES,
+                filters=filters,
             )
 
             if not similar_docs:
@@ -27,9 +74,378 @@ class IncidentChatbot:
                     "confidence": 0.0,
                 }
 
-            # 컨텍스트 구성
-            context = self._build_context(similar_docs)        
-            prompt = f"""
+            # 같은 사례가 검색된 유사 질의의 답변 재사용
+            doc_ids = [doc["id"] for doc in similar_docs]
+            cached_answer = _ANSWER_CACHE.lookup(query_embedding, doc_ids)
+            current_span().set(cache_hit=cached_answer is not None)
+            if cached_answer is not None:
+                return {
+                    "answer": cached_answer["answer"],
+                    "related_documents": _cached_documents(similar_docs, cached_answer),
+                    "cached": True,
+                }
+
+            built = self._build_prompt(user_query, similar_docs)
+            prompt = built["prompt"]
+
+            # AI 답변 생성
+            with span("completion") as current:
+                response = self.openai_client.chat.completions.create(
+                    **self._completion_request(prompt)
+                )
+                usage = getattr(response, "usage", None)
+                if usage:
+                    current.set(
+                        prompt_tokens=usage.prompt_tokens,
+                        completion_tokens=usage.completion_tokens,
+                    )
+
+            answer = response.choices[0].message.content
+            _ANSWER_CACHE.store(
+                query_embedding, doc_ids, _cache_entry(answer, similar_docs[: built["cases"]])
+            )
+
+            return {
+                "answer": answer,
+                "related_documents": similar_docs[: built["cases"]],
+                "prompt_tokens": built["prompt_tokens"],
+            }
+
+        except Exception as e:
+            print(f"답변 생성 중 오류: {e}")
+            current_span().set(error=type(e).__name__)
+            return {
+                "answer": "답변 생성 중 오류가 발생했습니다.",
+                "related_documents": [],
+                "confidence": 0.0,
+            }
+
+    async def answer_query_async(
+        self, user_query: str, filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """answer_query의 비동기 버전 (같은 프로세스에서 여러 질의를 동시에 처리)"""
+        with span("answer_query"):
+            return await self._answer_query_async(user_query, filters)
+
+    async def _answer_query_async(
+        self, user_query: str, filters: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        # 템플릿 토큰 계산은 질의만 있으면 되므로 임베딩/검색/SAS 서명과 겹쳐 수행
+        overhead_task = asyncio.create_task(
+            asyncio.to_thread(self._prompt_overhead, user_query)
+        )
+        try:
+            # 유사한 장애 사례 검색
+            query_embedding = await self.vector_store.embed_query_async(user_query)
+            similar_docs = await self.vector_store.search_similar_documents_async(
+                user_query,
+                top_k=self.azure_clients.config.CONTEXT_MAX_CASES,
+                filters=filters,
+            )
+
+            if not similar_docs:
+                return {
+                    "answer": "관련된 장애 사례를 찾을 수 없습니다.",
+                    "related_documents": [],
+                    "confidence": 0.0,
+                }
+
+            # 같은 사례가 검색된 유사 질의의 답변 재사용
+            doc_ids = [doc["id"] for doc in similar_docs]
+            cached_answer = _ANSWER_CACHE.lookup(query_embedding, doc_ids)
+            current_span().set(cache_hit=cached_answer is not None)
+            if cached_answer is not None:
+                return {
+                    "answer": cached_answer["answer"],
+                    "related_documents": _cached_documents(similar_docs, cached_answer),
+                    "cached": True,
+                }
+
+            built = await asyncio.to_thread(
+                self._build_prompt, user_query, similar_docs, await overhead_task
+            )
+
+            # AI 답변 생성
+            with span("completion") as current:
+                response = await self.azure_clients.async_openai_client.chat.completions.create(
+                    **self._completion_request(built["prompt"])
+                )
+                usage = getattr(response, "usage", None)
+                if usage:
+                    current.set(
+                        prompt_tokens=usage.prompt_tokens,
+                        completion_tokens=usage.completion_tokens,
+                    )
+
+            answer = response.choices[0].message.content
+            _ANSWER_CACHE.store(
+                query_embedding, doc_ids, _cache_entry(answer, similar_docs[: built["cases"]])
+            )
+
+            return {
+                "answer": answer,
+                "related_documents": similar_docs[: built["cases"]],
+                "prompt_tokens": built["prompt_tokens"],
+            }
+
+        except Exception as e:
+            print(f"답변 생성 중 오류: {e}")
+            current_span().set(error=type(e).__name__)
+            return {
+                "answer": "답변 생성 중 오류가 발생했습니다.",
+                "related_documents": [],
+                "confidence": 0.0,
+            }
+        finally:
+            overhead_task.cancel()
+
+    def answer_query_stream(
+        self, user_query: str, filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """사용자 질의에 대한 답변을 스트리밍으로 생성
+
+        관련 문서는 검색 직후 바로 반환하고, 답변은 "stream" 제너레이터가
+        텍스트 조각(delta) 단위로 내보낸다. filters는 answer_query와 같다.
+        """
+        try:
+            # 유사한 장애 사례 검색
+            with span("answer_query_retrieval"):
+                query_embedding = self.vector_store.embed_query(user_query)
+                similar_docs = self.vector_store.search_similar_documents(
+                    user_query,
+                    top_k=self.azure_clients.config.CONTEXT_MAX_CASES,
+                    filters=filters,
+                )
+        except Exception as e:
+            print(f"답변 생성 중 오류: {e}")
+            similar_docs = None
+
+        if similar_docs is None:
+            return {
+                "stream": iter(["답변 생성 중 오류가 발생했습니다."]),
+                "related_documents": [],
+            }
+
+        if not similar_docs:
+            return {
+                "stream": iter(["관련된 장애 사례를 찾을 수 없습니다."]),
+                "related_documents": [],
+            }
+
+        # 같은 사례가 검색된 유사 질의의 답변 재사용
+        doc_ids = [doc["id"] for doc in similar_docs]
+        cached_answer = _ANSWER_CACHE.lookup(query_embedding, doc_ids)
+        record_span("answer_cache", 0.0, cache_hit=cached_answer is not None)
+        if cached_answer is not None:
+            return {
+                "stream": iter([cached_answer["answer"]]),
+                "related_documents": _cached_documents(similar_docs, cached_answer),
+                "cached": True,
+            }
+
+        try:
+            built = self._build_prompt(user_query, similar_docs)
+        except Exception as e:
+            print(f"답변 생성 중 오류: {e}")
+            return {
+                "stream": iter(["답변 생성 중 오류가 발생했습니다."]),
+                "related_documents": [],
+            }
+        prompt = built["prompt"]
+
+        def generate():
+            # 제너레이터는 소비 시점이 달라 span 대신 직접 측정해 기록
+            parts = []
+            start = time.perf_counter()
+            first_token_ms = None
+            try:
+                response = self.openai_client.chat.completions.create(
+                    stream=True, **self._completion_request(prompt)
+                )
+                for chunk in response:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - start) * 1000
+                        parts.append(delta)
+                        yield delta
+            except Exception as e:
+                print(f"답변 생성 중 오류: {e}")
+                record_span(
+                    "completion_stream",
+                    (time.perf_counter() - start) * 1000,
+                    error=type(e).__name__,
+                )
+                yield "\n\n답변 생성 중 오류가 발생했습니다."
+                return
+
+            answer = "".join(parts)
+            record_span(
+                "completion_stream",
+                (time.perf_counter() - start) * 1000,
+                first_token_ms=first_token_ms,
+                prompt_tokens=built["prompt_tokens"],
+                completion_tokens=count_tokens(answer),
+            )
+            _ANSWER_CACHE.store(
+                query_embedding, doc_ids, _cache_entry(answer, similar_docs[: built["cases"]])
+            )
+
+        return {
+            "stream": generate(),
+            "related_documents": similar_docs[: built["cases"]],
+            "prompt_tokens": built["prompt_tokens"],
+        }
+
+    async def answer_query_stream_async(
+        self, user_query: str, filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """answer_query_stream의 비동기 버전 ("stream"은 async 제너레이터)"""
+        overhead_task = asyncio.create_task(
+            asyncio.to_thread(self._prompt_overhead, user_query)
+        )
+        try:
+            # 유사한 장애 사례 검색
+            with span("answer_query_retrieval"):
+                query_embedding = await self.vector_store.embed_query_async(user_query)
+                similar_docs = await self.vector_store.search_similar_documents_async(
+                    user_query,
+                    top_k=self.azure_clients.config.CONTEXT_MAX_CASES,
+                    filters=filters,
+                )
+
+            if not similar_docs:
+                overhead_task.cancel()
+                return {
+                    "stream": _async_iter("관련된 장애 사례를 찾을 수 없습니다."),
+                    "related_documents": [],
+                }
+
+            # 같은 사례가 검색된 유사 질의의 답변 재사용
+            doc_ids = [doc["id"] for doc in similar_docs]
+            cached_answer = _ANSWER_CACHE.lookup(query_embedding, doc_ids)
+            record_span("answer_cache", 0.0, cache_hit=cached_answer is not None)
+            if cached_answer is not None:
+                overhead_task.cancel()
+                return {
+                    "stream": _async_iter(cached_answer["answer"]),
+                    "related_documents": _cached_documents(similar_docs, cached_answer),
+                    "cached": True,
+                }
+
+            built = await asyncio.to_thread(
+                self._build_prompt, user_query, similar_docs, await overhead_task
+            )
+        except Exception as e:
+            print(f"답변 생성 중 오류: {e}")
+            overhead_task.cancel()
+            return {
+                "stream": _async_iter("답변 생성 중 오류가 발생했습니다."),
+                "related_documents": [],
+            }
+
+        async def generate():
+            # 제너레이터는 소비 시점이 달라 span 대신 직접 측정해 기록
+            parts = []
+            start = time.perf_counter()
+            first_token_ms = None
+            try:
+                response = await self.azure_clients.async_openai_client.chat.completions.create(
+                    stream=True, **self._completion_request(built["prompt"])
+                )
+                async for chunk in response:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        if first_token_ms is None:
+                            first_token_ms = (time.perf_counter() - start) * 1000
+                        parts.append(delta)
+                        yield delta
+            except Exception as e:
+                print(f"답변 생성 중 오류: {e}")
+                record_span(
+                    "completion_stream",
+                    (time.perf_counter() - start) * 1000,
+                    error=type(e).__name__,
+                )
+                yield "\n\n답변 생성 중 오류가 발생했습니다."
+                return
+
+            answer = "".join(parts)
+            record_span(
+                "completion_stream",
+                (time.perf_counter() - start) * 1000,
+                first_token_ms=first_token_ms,
+                prompt_tokens=built["prompt_tokens"],
+                completion_tokens=count_tokens(answer),
+            )
+            _ANSWER_CACHE.store(
+                query_embedding, doc_ids, _cache_entry(answer, similar_docs[: built["cases"]])
+            )
+
+        return {
+            "stream": generate(),
+            "related_documents": similar_docs[: built["cases"]],
+            "prompt_tokens": built["prompt_tokens"],
+        }
+
+    def _prompt_overhead(self, user_query: str) -> Dict[str, Any]:
+        """사례 없이 구성한 프롬프트와 그 입력 토큰 수 (템플릿+질의+시스템 메시지)"""
+        base_prompt = self._render_prompt(user_query, [])
+        return {
+            "base_prompt": base_prompt,
+            "tokens": sum(
+                count_tokens(message["content"])
+                for message in self._completion_request(base_prompt)["messages"]
+            ),
+        }
+
+    def _build_prompt(
+        self,
+        user_query: str,
+        similar_docs: List[Dict[str, Any]],
+        overhead: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """검색된 사례를 토큰 예산에 맞춰 담아 답변 생성 프롬프트 구성
+
+        overhead는 미리 계산한 _prompt_overhead(user_query) 결과 (없으면 여기서 계산).
+        반환: {"prompt": 프롬프트, "cases": 담은 사례 수, "prompt_tokens": 입력 토큰 수}
+        """
+        config = self.azure_clients.config
+        with span("prompt_build") as current:
+            # 사례 없이 구성한 프롬프트를 뺀 나머지가 컨텍스트 예산
+            overhead = overhead or self._prompt_overhead(user_query)
+            base_prompt = overhead["base_prompt"]
+            overhead_tokens = overhead["tokens"]
+            packed = pack_cases(
+                similar_docs,
+                budget_tokens=config.PROMPT_INPUT_BUDGET_TOKENS - overhead_tokens,
+                max_cases=config.CONTEXT_MAX_CASES,
+                field_max_tokens=config.CONTEXT_FIELD_MAX_TOKENS,
+                render=self._build_context,
+            )
+            prompt = self._render_prompt(user_query, packed["documents"])
+            prompt_tokens = overhead_tokens + count_tokens(prompt) - count_tokens(base_prompt)
+            current.set(
+                prompt_tokens=prompt_tokens,
+                context_tokens=packed["context_tokens"],
+                cases=len(packed["documents"]),
+                dropped_cases=packed["dropped"],
+                truncated=packed["truncated"],
+            )
+            return {
+                "prompt": prompt,
+                "cases": len(packed["documents"]),
+                "prompt_tokens": prompt_tokens,
+            }
+
+    def _render_prompt(self, user_query: str, similar_docs: List[Dict[str, Any]]) -> str:
+        # 컨텍스트 구성
+        context = self._build_context(similar_docs)        
+        prompt = f"""
               당신은 IT 시스템 장애 대응 전문가입니다. 아래 정보를 바탕으로 정확하고 실행 가능한 대응 방안을 제시해주세요.
 
               ## 사용자 질의
@@ -112,36 +528,22 @@ class IncidentChatbot:
               5. 임시 우회 방안 검토 및 적용
 
               """
-
-            # AI 답변 생성
-
-            response = self.openai_client.chat.completions.create(
-                model=self.azure_clients.config.AZURE_OPENAI_CHAT_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "당신은 IT 장애 대응 전문가입니다. 과거 장애 사례를 바탕으로 정확하고 실용적인 조언을 제공합니다.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.2,
-                max_tokens=4096,
-            )
-
-            answer = response.choices[0].message.content
-
-            return {
-                "answer": answer,
-                "related_documents": similar_docs,
-            }
-
-        except Exception as e:
-            print(f"답변 생성 중 오류: {e}")
-            return {
-                "answer": "답변 생성 중 오류가 발생했습니다.",
-                "related_documents": [],
-                "confidence": 0.0,
-            }
+        return prompt
+
+    def _completion_request(self, prompt: str) -> Dict[str, Any]:
+        """답변 생성용 chat completion 요청 파라미터"""
+        return {
+            "model": self.azure_clients.config.AZURE_OPENAI_CHAT_MODEL,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "당신은 IT 장애 대응 전문가입니다. 과거 장애 사례를 바탕으로 정확하고 실용적인 조언을 제공합니다.",
+                },
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.2,
+            "max_tokens": self.azure_clients.config.ANSWER_MAX_TOKENS,
+        }
 
     def _build_context(self, documents: List[Dict[str, Any]]) -> str:
         """문서들로부터 컨텍스트 구성"""
@@ -0,0 +1,99 @@
+from typing import Any, Iterable, List, Dict, Tuple
+from token_counter import count_tokens, split_at_tokens
+
+
+def chunk_sections(
+    sections: Iterable[Dict[str, str]], max_tokens: int, overlap_tokens: int
+) -> List[Dict[str, Any]]:
+    """섹션(heading, text) 목록을 토큰 한도 내 청크(heading, text, offset) 목록으로 분할
+
+    sections는 한 번만 순회하므로 sections_from_blocks() 제너레이터를 그대로 넘겨도 된다.
+
+    - 작은 섹션은 한도 안에서 다음 섹션과 합친다 (청크는 항상 섹션 경계에서 시작).
+    - 한도를 넘는 섹션은 문단 단위로 나누고, 앞 청크의 끝부분을 overlap_tokens만큼 겹친다.
+    - 한 문단이 한도를 넘으면 토큰 경계에서 자른다.
+    - 청크 text는 원문(섹션 text를 줄바꿈으로 이은 본문)을 그대로 잘라낸 것이고,
+      offset은 원문에서의 시작 위치(문자)다. join_chunks()로 겹침 없이 원문을 복원한다.
+    """
+    merged: List[Dict[str, str]] = []
+    for section in sections:
+        text = section.get("text", "").strip()
+        if not text:
+            continue
+        heading = section.get("heading", "")
+        if merged:
+            last = merged[-1]
+            combined = f"{last['text']}\n{text}"
+            if count_tokens(combined) <= max_tokens:
+                last["text"] = combined
+                continue
+        merged.append({"heading": heading, "text": text})
+
+    chunks: List[Dict[str, Any]] = []
+    section_offset = 0
+    for section in merged:
+        for start, text in _split_text(section["text"], max_tokens, overlap_tokens):
+            chunks.append(
+                {"heading": section["heading"], "text": text, "offset": section_offset + start}
+            )
+        section_offset += len(section["text"]) + 1
+    return chunks
+
+
+def join_chunks(chunks: List[Dict[str, Any]]) -> str:
+    """chunk_sections() 결과(offset 순)를 원문으로 복원 (앞 청크와 겹친 부분은 한 번만 포함)"""
+    joined = ""
+    for chunk in chunks:
+        offset = chunk["offset"]
+        if offset <= len(joined):
+            joined = joined[:offset] + chunk["text"]
+        else:
+            # 청크 사이에서 빠진 문단 구분(줄바꿈/빈 줄)
+            joined += "\n" * (offset - len(joined)) + chunk["text"]
+    return joined
+
+
+def _split_text(text: str, max_tokens: int, overlap_tokens: int) -> List[Tuple[int, str]]:
+    """문단 단위로 토큰 한도 내 조각(시작 위치, 원문 조각)으로 분할 (조각 간 overlap 유지)"""
+    if count_tokens(text) <= max_tokens:
+        return [(0, text)]
+
+    # 문단(줄)과 한도를 넘는 문단의 토큰 경계 조각을 원문 위치(start, end)로 수집
+    spans: List[Tuple[int, int]] = []
+    position = 0
+    for paragraph in text.split("\n"):
+        start = position
+        position += len(paragraph) + 1
+        if not paragraph.strip():
+            continue
+        while count_tokens(paragraph) > max_tokens:
+            head, paragraph = split_at_tokens(paragraph, max_tokens)
+            if not head:
+                # 토큰 한도가 문자 하나보다 작으면 한 글자씩 진행
+                head, paragraph = paragraph[:1], paragraph[1:]
+            spans.append((start, start + len(head)))
+            start += len(head)
+        if paragraph.strip():
+            spans.append((start, start + len(paragraph)))
+
+    def piece(first: Tuple[int, int], last: Tuple[int, int]) -> str:
+        return text[first[0] : last[1]]
+
+    pieces: List[Tuple[int, str]] = []
+    current: List[Tuple[int, int]] = []
+    for span in spans:
+        if current and count_tokens(piece(current[0], span)) > max_tokens:
+            pieces.append((current[0][0], piece(current[0], current[-1])))
+            # 이전 조각의 끝 문단들을 overlap 한도 내에서 이어 붙임
+            overlap: List[Tuple[int, int]] = []
+            for previous in reversed(current):
+                if count_tokens(piece(previous, span)) > max_tokens:
+                    break
+                if count_tokens(piece(previous, current[-1])) > overlap_tokens:
+                    break
+                overlap.insert(0, previous)
+            current = overlap
+        current.append(span)
+    if current:
+        pieces.append((current[0][0], piece(current[0], current[-1])))
+    return pieces
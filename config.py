@@ -14,12 +14,27 @@ class Config:
     AZURE_SEARCH_ADMIN_KEY = os.getenv('AZURE_SEARCH_ADMIN_KEY')
     AZURE_SEARCH_ENDPOINT = f"https://{AZURE_SEARCH_SERVICE_NAME}.search.windows.net"
     AZURE_SEARCH_INDEX_NAME = os.getenv('AZURE_SEARCH_INDEX_NAME')
+    # 인덱스 스키마 버전 (1이면 AZURE_SEARCH_INDEX_NAME 그대로, 2 이상이면 "<이름>-v<버전>" 인덱스 사용)
+    # 벡터 차원/HNSW/압축 설정이나 기존 필드 속성을 바꿀 때 올리고 `python azure_client.py --migrate` 실행
+    AZURE_SEARCH_INDEX_VERSION = int(os.getenv('AZURE_SEARCH_INDEX_VERSION', '1'))
+
+    # 벡터 인덱스(HNSW) 설정 (기본값은 Azure AI Search 기본값)
+    VECTOR_HNSW_M = int(os.getenv('VECTOR_HNSW_M', '4'))
+    VECTOR_HNSW_EF_CONSTRUCTION = int(os.getenv('VECTOR_HNSW_EF_CONSTRUCTION', '400'))
+    VECTOR_HNSW_EF_SEARCH = int(os.getenv('VECTOR_HNSW_EF_SEARCH', '500'))
+    VECTOR_METRIC = os.getenv('VECTOR_METRIC', 'cosine')
+    # 벡터 압축 ('none', 'scalar'(int8), 'binary'), 압축 시 후보를 OVERSAMPLING배 가져와 원본 벡터로 재채점
+    VECTOR_COMPRESSION = os.getenv('VECTOR_COMPRESSION', 'none')
+    VECTOR_RESCORE = os.getenv('VECTOR_RESCORE', 'true').lower() == 'true'
+    VECTOR_OVERSAMPLING = float(os.getenv('VECTOR_OVERSAMPLING', '10'))
     
     # Azure OpenAI 설정
     AZURE_OPENAI_ENDPOINT = os.getenv('AZURE_OPENAI_ENDPOINT')
     AZURE_OPENAI_API_KEY = os.getenv('AZURE_OPENAI_API_KEY')
     AZURE_OPENAI_API_VERSION = os.getenv('AZURE_OPENAI_API_VERSION')
     AZURE_OPENAI_EMBEDDING_MODEL = os.getenv('AZURE_OPENAI_EMBEDDING_MODEL') 
+    # 임베딩 차원 (0이면 모델 기본 1536, text-embedding-3-* 모델은 줄인 차원으로 요청 가능)
+    EMBEDDING_DIMENSIONS = int(os.getenv('EMBEDDING_DIMENSIONS', '0'))
     AZURE_OPENAI_CHAT_MODEL = os.getenv('AZURE_OPENAI_CHAT_MODEL') 
     
     # Azure Storage 설정
@@ -32,5 +47,71 @@ class Config:
     # 애플리케이션 설정
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER')
     ALLOWED_EXTENSIONS = os.getenv('ALLOWED_EXTENSIONS')
-    # ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt', 'md'}  
-    
\ No newline at end of file
+    # ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt', 'md'}
+
+    # 대량 수집(ingestion) 설정
+    INGEST_MAX_WORKERS = int(os.getenv('INGEST_MAX_WORKERS', '4'))
+    INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', '10'))
+    # 텍스트 추출 프로세스 풀 설정 (작업 프로세스 수 0이면 현재 프로세스에서 추출)
+    EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', '2'))
+    EXTRACTION_TIMEOUT_SECONDS = int(os.getenv('EXTRACTION_TIMEOUT_SECONDS', '120'))
+    EXTRACTION_PDF_PAGES_PER_SHARD = int(os.getenv('EXTRACTION_PDF_PAGES_PER_SHARD', '20'))
+    # 이보다 작은 파일은 프로세스 간 전달 비용이 더 크므로 현재 프로세스에서 추출
+    EXTRACTION_PROCESS_MIN_KB = int(os.getenv('EXTRACTION_PROCESS_MIN_KB', '512'))
+    # 장애 유형 키워드 파일 ({"유형": ["키워드", ...]} JSON, 비우면 기본 키워드 사용)
+    INCIDENT_KEYWORDS_PATH = os.getenv('INCIDENT_KEYWORDS_PATH', '')
+    # 일괄 수집 CLI(bulk_ingest.py) 체크포인트 경로
+    INGEST_CHECKPOINT_PATH = os.getenv('INGEST_CHECKPOINT_PATH', '.cache/ingest_checkpoint.jsonl')
+
+    # LLM 분석/임베딩 디스크 캐시 설정 (경로를 비우면 캐시 미사용)
+    LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', '.cache/llm_cache.sqlite3')
+    LLM_CACHE_MAX_MB = int(os.getenv('LLM_CACHE_MAX_MB', '512'))
+
+    # 질의 임베딩 메모리 캐시 설정
+    QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '1024'))
+    QUERY_EMBEDDING_CACHE_TTL = int(os.getenv('QUERY_EMBEDDING_CACHE_TTL', '3600'))
+
+    # 유사 질의 답변 캐시 설정 (답변 내 SAS 링크가 만료되지 않도록 TTL은 SAS_REFRESH_MARGIN_SECONDS 이하로)
+    ANSWER_CACHE_THRESHOLD = float(os.getenv('ANSWER_CACHE_THRESHOLD', '0.95'))
+    ANSWER_CACHE_SIZE = int(os.getenv('ANSWER_CACHE_SIZE', '256'))
+    ANSWER_CACHE_TTL = int(os.getenv('ANSWER_CACHE_TTL', '1800'))
+
+    # Blob SAS 링크 설정
+    # - SAS_MODE: blob(파일별 서명) / container(컨테이너 단위 서명 1개를 모든 파일에 재사용)
+    # - 서명은 (유효시간 - 갱신 여유) 동안 재사용하므로, 갱신 여유는 답변 캐시 TTL 이상으로 둔다
+    SAS_MODE = os.getenv('SAS_MODE', 'blob')
+    SAS_EXPIRY_SECONDS = int(os.getenv('SAS_EXPIRY_SECONDS', '3600'))
+    SAS_REFRESH_MARGIN_SECONDS = int(os.getenv('SAS_REFRESH_MARGIN_SECONDS', '1800'))
+    SAS_CACHE_SIZE = int(os.getenv('SAS_CACHE_SIZE', '4096'))
+
+    # HTTP 연결 풀 크기 (프로세스 공용 클라이언트 기준)
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '20'))
+
+    # 청크 인덱싱 설정
+    CHUNK_MAX_TOKENS = int(os.getenv('CHUNK_MAX_TOKENS', '800'))
+    CHUNK_OVERLAP_TOKENS = int(os.getenv('CHUNK_OVERLAP_TOKENS', '100'))
+    # 청크 검색 시 보고서 단위로 묶기 전에 가져올 배수
+    CHUNK_SEARCH_OVERSAMPLE = int(os.getenv('CHUNK_SEARCH_OVERSAMPLE', '3'))
+
+    # 답변 프롬프트 토큰 예산 (시스템 메시지+템플릿+사례 컨텍스트 합계 기준)
+    PROMPT_INPUT_BUDGET_TOKENS = int(os.getenv('PROMPT_INPUT_BUDGET_TOKENS', '6000'))
+    CONTEXT_MAX_CASES = int(os.getenv('CONTEXT_MAX_CASES', '3'))
+    CONTEXT_FIELD_MAX_TOKENS = int(os.getenv('CONTEXT_FIELD_MAX_TOKENS', '400'))
+    ANSWER_MAX_TOKENS = int(os.getenv('ANSWER_MAX_TOKENS', '4096'))
+
+    # 임베딩 묶음 요청 설정
+    EMBEDDING_BATCH_MAX_ITEMS = int(os.getenv('EMBEDDING_BATCH_MAX_ITEMS', '64'))
+    EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv('EMBEDDING_BATCH_MAX_TOKENS', '100000'))
+    EMBEDDING_MAX_INPUT_TOKENS = int(os.getenv('EMBEDDING_MAX_INPUT_TOKENS', '8000'))
+    EMBEDDING_MAX_RETRIES = int(os.getenv('EMBEDDING_MAX_RETRIES', '2'))
+
+    # 검색 백엔드 설정 ('azure' 또는 로컬 오프라인 검색 'local')
+    SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'azure')
+    LOCAL_SEARCH_PATH = os.getenv('LOCAL_SEARCH_PATH', '.local_search')
+    # 로컬 백엔드의 변경 사항을 디스크에 저장하는 최소 간격(초), 0이면 쓰기마다 저장
+    LOCAL_SEARCH_FLUSH_SECONDS = float(os.getenv('LOCAL_SEARCH_FLUSH_SECONDS', '30'))
+
+    # 단계별 계측 설정 (JSONL 경로/Prometheus 포트를 비우면 미사용)
+    METRICS_JSONL_PATH = os.getenv('METRICS_JSONL_PATH', '')
+    # Streamlit 앱 전용 (HTTP API는 워커별 GET /metrics 사용)
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
@@ -0,0 +1,67 @@
+from typing import Any, Callable, Dict, List
+from token_counter import count_tokens, truncate_to_tokens
+
+
+# 토큰 한도에 맞춰 자르는 사례 필드 (제목/링크는 자르지 않음)
+TRUNCATABLE_FIELDS = ("summary", "root_cause", "emergency_actions")
+
+# 필드 한도를 줄여도 이보다 작게는 자르지 않음
+MIN_FIELD_TOKENS = 48
+
+TRUNCATION_MARK = " …(이하 생략)"
+
+
+def truncate_fields(document: Dict[str, Any], field_max_tokens: int) -> Dict[str, Any]:
+    """사례 필드별로 토큰 한도를 넘는 부분을 잘라낸 사본 반환"""
+    packed = dict(document)
+    for field in TRUNCATABLE_FIELDS:
+        value = packed.get(field)
+        if isinstance(value, str) and count_tokens(value) > field_max_tokens:
+            packed[field] = truncate_to_tokens(value, field_max_tokens).rstrip() + TRUNCATION_MARK
+    return packed
+
+
+def pack_cases(
+    documents: List[Dict[str, Any]],
+    budget_tokens: int,
+    max_cases: int,
+    field_max_tokens: int,
+    render: Callable[[List[Dict[str, Any]]], str],
+) -> Dict[str, Any]:
+    """검색된 사례를 유사도 순으로 토큰 예산 안에 채워 넣기
+
+    - 사례마다 필드를 field_max_tokens로 자르고, 그래도 남은 예산을 넘으면
+      필드 한도를 절반씩 줄여(MIN_FIELD_TOKENS까지) 다시 맞춘다.
+    - 맞출 수 없는 사례부터는 제외한다. 단, 첫 사례는 최소 한도로라도 포함한다.
+    - render는 사례 목록을 프롬프트 컨텍스트 문자열로 바꾸는 함수.
+
+    반환: {"documents": 잘라낸 사례 목록, "context_tokens": 컨텍스트 토큰 수,
+           "dropped": 예산 때문에 제외한 사례 수, "truncated": 필드 절단 여부}
+    """
+    packed: List[Dict[str, Any]] = []
+    used_tokens = 0
+    truncated = False
+
+    candidates = documents[:max_cases]
+    for document in candidates:
+        remaining = budget_tokens - used_tokens
+        limit = field_max_tokens
+        while True:
+            case = truncate_fields(document, limit)
+            case_tokens = count_tokens(render([case]))
+            if case_tokens <= remaining or limit <= MIN_FIELD_TOKENS:
+                break
+            limit = max(MIN_FIELD_TOKENS, limit // 2)
+
+        if case_tokens > remaining and packed:
+            break
+        truncated = truncated or case != document
+        packed.append(case)
+        used_tokens += case_tokens
+
+    return {
+        "documents": packed,
+        "context_tokens": count_tokens(render(packed)) if packed else 0,
+        "dropped": len(candidates) - len(packed),
+        "truncated": truncated,
+    }
@@ -1,53 +1,141 @@
 import re
+import time
+import asyncio
 from datetime import datetime
-from typing import Dict, List
-import docx
-import PyPDF2
+from typing import Any, Dict, Iterator, List, Optional
 from config import Config
 from azure_client import AzureClients
 from azure.storage.blob import BlobServiceClient
 from azure_client import AzureClients
 import json
+from cache import DiskCache, get_disk_cache
+from token_counter import count_tokens, truncate_to_tokens
+from telemetry import span, current_span
+from incident_classifier import get_incident_classifier
+from urllib.parse import urlparse, unquote
+from extraction import (
+    STRUCTURE_VERSION,
+    ExtractionTimeout,
+    iter_blocks,
+    sections_from_blocks,
+)
+
+
+# 분석 실패 시 각 항목에 채워지는 값
+ANALYSIS_FAILED = "분석 실패"
+
+# 분석 프롬프트 변경 시 올려서 이전 캐시 결과를 무효화
+ANALYSIS_PROMPT_VERSION = "1"
+
+def embedding_signature(config: Config) -> str:
+    """레코드/캐시에 기록하는 임베딩 식별자 (차원을 줄여 요청하면 "모델@차원")"""
+    model = config.AZURE_OPENAI_EMBEDDING_MODEL
+    return f"{model}@{config.EMBEDDING_DIMENSIONS}" if config.EMBEDDING_DIMENSIONS else model
+
+
+def embedding_request_options(config: Config) -> Dict[str, Any]:
+    """임베딩 요청 추가 인자 (EMBEDDING_DIMENSIONS가 있으면 dimensions)"""
+    return {"dimensions": config.EMBEDDING_DIMENSIONS} if config.EMBEDDING_DIMENSIONS else {}
+
+
+def _is_input_error(error: Exception) -> bool:
+    """요청 입력 때문에 거절된 오류 (400: 토큰 한도 초과, 잘못된 입력 등)"""
+    return getattr(error, "status_code", None) == 400
+
+
+def _is_retryable(error: Exception) -> bool:
+    """다시 요청하면 성공할 수 있는 오류 (연결 오류, 408/409/429, 5xx)"""
+    status = getattr(error, "status_code", None)
+    return status is None or status in (408, 409, 429) or status >= 500
+
+
+# 원본 Blob 옆에 저장하는 구조화 문서(추출 결과)의 이름 접미사
+STRUCTURE_SUFFIX = ".structure.json"
 
 
 class DocumentProcessor:
     def __init__(self, azure_clients: AzureClients):
         self.azure_clients = azure_clients
         self.openai_client = azure_clients.openai_client
+        config = azure_clients.config
+        self.cache = get_disk_cache(
+            config.LLM_CACHE_PATH, config.LLM_CACHE_MAX_MB * 1024 * 1024
+        )
+        self.incident_classifier = get_incident_classifier(config.INCIDENT_KEYWORDS_PATH)
 
     def extract_text_from_file(self, file_path: str, file_type: str) -> str:
         """파일에서 텍스트 추출"""
+        return "\n".join(
+            section["text"] for section in self.extract_sections(file_path, file_type)
+        )
+
+    def extract_sections(self, file_path: str, file_type: str) -> List[Dict[str, str]]:
+        """파일에서 섹션(heading, text) 단위로 텍스트 추출 (DOCX는 제목 스타일, PDF는 페이지 기준)"""
+        return self.document_sections(self.extract_document(file_path, file_type))
+
+    def extract_document(self, file_path: str, file_type: str) -> Dict[str, Any]:
+        """파일을 구조화 문서(제목/문단/표/페이지 블록)로 추출
+
+        반환: {"version": STRUCTURE_VERSION, "file_type": ..., "blocks": [...]}
+        추출에 실패하면 blocks가 빈 목록이다.
+        """
+        with span("extraction", file_type=file_type) as current:
+            blocks = self._extract_blocks(file_path, file_type)
+            current.set(
+                blocks=len(blocks),
+                tables=sum(block["type"] == "table" for block in blocks),
+            )
+            return {"version": STRUCTURE_VERSION, "file_type": file_type, "blocks": blocks}
+
+    def _extract_blocks(self, file_path: str, file_type: str) -> List[Dict[str, Any]]:
         try:
-            if file_type == "docx":
-                return self._extract_from_docx(file_path)
-            elif file_type == "pdf":
-                return self._extract_from_pdf(file_path)
-            elif file_type in ["txt", "md"]:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    return f.read()
+            return list(self.iter_blocks(file_path, file_type))
+        except ExtractionTimeout as e:
+            print(f"텍스트 추출 중 오류: {e} ({file_path})")
+            current_span().set(error=type(e).__name__)
         except Exception as e:
             print(f"텍스트 추출 중 오류: {e}")
-            return ""
+        return []
+
+    def document_sections(self, document: Dict[str, Any]) -> List[Dict[str, str]]:
+        """구조화 문서를 섹션(heading, text) 목록으로 변환 (표는 마크다운 표 텍스트)"""
+        return list(sections_from_blocks(document["blocks"]))
+
+    def iter_blocks(self, file_path: str, file_type: str) -> Iterator[Dict[str, Any]]:
+        """구조화 문서 블록을 추출되는 대로 내보내는 제너레이터"""
+        config = self.azure_clients.config
+        return iter_blocks(
+            file_path,
+            file_type,
+            workers=config.EXTRACTION_WORKERS,
+            timeout=config.EXTRACTION_TIMEOUT_SECONDS,
+            pages_per_shard=max(1, config.EXTRACTION_PDF_PAGES_PER_SHARD),
+            min_process_bytes=config.EXTRACTION_PROCESS_MIN_KB * 1024,
+        )
 
     def _extract_from_docx(self, file_path: str) -> str:
         """DOCX 파일에서 텍스트 추출"""
-        doc = docx.Document(file_path)
-        text = []
-        for paragraph in doc.paragraphs:
-            text.append(paragraph.text)
-        return "\n".join(text)
+        return self.extract_text_from_file(file_path, "docx")
 
     def _extract_from_pdf(self, file_path: str) -> str:
         """PDF 파일에서 텍스트 추출"""
-        text = []
-        with open(file_path, "rb") as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text.append(page.extract_text())
-        return "\n".join(text)
+        return self.extract_text_from_file(file_path, "pdf")
 
     def analyze_incident_report(self, content: str) -> Dict[str, str]:
-        """장애보고서 분석 및 4가지 요약 생성"""
+        """장애보고서 분석 및 4가지 요약 생성 (동일 본문/모델/프롬프트 버전은 캐시 재사용)"""
+        with span("analysis", chars=len(content)):
+            return self._analyze_incident_report(content)
+
+    def _analyze_incident_report(self, content: str) -> Dict[str, str]:
+        model = self.azure_clients.config.AZURE_OPENAI_CHAT_MODEL
+        cache_key = DiskCache.make_key(
+            "analysis", model, ANALYSIS_PROMPT_VERSION, content
+        )
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            current_span().set(cache_hit=cached is not None)
+            if cached is not None:
+                return cached
 
         prompt = f"""
 다음 장애보고서를 분석하여 아래 4가지 항목으로 요약해주세요:
@@ -74,7 +162,7 @@ class DocumentProcessor:
         try:
             response = self.openai_client.chat.completions.create(
                 # model="gpt-4o-mini",
-                model=self.azure_clients.config.AZURE_OPENAI_CHAT_MODEL,
+                model=model,
                 messages=[
                     {
                         "role": "system",
@@ -85,6 +173,12 @@ class DocumentProcessor:
                 temperature=0.3,
                 max_tokens=2000,
             )
+            usage = getattr(response, "usage", None)
+            if usage:
+                current_span().set(
+                    prompt_tokens=usage.prompt_tokens,
+                    completion_tokens=usage.completion_tokens,
+                )
 
             result = response.choices[0].message.content
             # JSON 부분 추출
@@ -92,32 +186,180 @@ class DocumentProcessor:
             json_end = result.rfind("}") + 1
             json_str = result[json_start:json_end]
 
-            return json.loads(json_str)
+            analysis = json.loads(json_str)
+            if self.cache:
+                self.cache.set(cache_key, analysis)
+            return analysis
 
         except Exception as e:
             print(f"문서 분석 중 오류: {e}")
+            current_span().set(error=type(e).__name__)
             return {
-                "incident_symptoms_and_causes": "분석 실패",
-                "emergency_actions": "분석 실패",
-                "document_summary": "분석 실패",
-                "image_descriptions": "분석 실패",
+                "incident_symptoms_and_causes": ANALYSIS_FAILED,
+                "emergency_actions": ANALYSIS_FAILED,
+                "document_summary": ANALYSIS_FAILED,
+                "image_descriptions": ANALYSIS_FAILED,
             }
 
     def generate_embedding(self, text: str) -> List[float]:
-        """텍스트 임베딩 생성"""
-        try:
-            response = self.openai_client.embeddings.create(
-                input=text,
-                # model="text-embedding-3-small"
-                model=self.azure_clients.config.AZURE_OPENAI_EMBEDDING_MODEL,
-            )
-            return response.data[0].embedding
-        except Exception as e:
-            print(f"임베딩 생성 중 오류: {e}")
+        """텍스트 임베딩 생성 (동일 텍스트/모델은 캐시 재사용)"""
+        return self.generate_embeddings([text])[0]
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """여러 텍스트 임베딩을 묶음 요청으로 생성 (입력 순서 유지, 실패한 항목은 빈 리스트)
+
+        캐시에 없는 텍스트만 항목 수/토큰 한도 내 묶음으로 나눠 요청하고,
+        실패한 묶음만 재시도한다.
+        """
+        with span("embedding", inputs=len(texts)):
+            return self._generate_embeddings(texts)
+
+    def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        config = self.azure_clients.config
+        model = config.AZURE_OPENAI_EMBEDDING_MODEL
+        signature = embedding_signature(config)
+        embeddings: List[List[float]] = [[] for _ in texts]
+
+        # 캐시 조회
+        missing = []
+        for i, text in enumerate(texts):
+            cached = None
+            if self.cache:
+                cached = self.cache.get(DiskCache.make_key("embedding", signature, text))
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                missing.append(i)
+        current_span().set(
+            cache_hits=len(texts) - len(missing), cache_hit=not missing
+        )
+
+        # 항목 수/토큰 한도 내 묶음 구성
+        batches: List[List[int]] = []
+        batch_tokens = 0
+        for i in missing:
+            tokens = min(count_tokens(texts[i]), config.EMBEDDING_MAX_INPUT_TOKENS)
+            if (
+                not batches
+                or len(batches[-1]) >= config.EMBEDDING_BATCH_MAX_ITEMS
+                or batch_tokens + tokens > config.EMBEDDING_BATCH_MAX_TOKENS
+            ):
+                batches.append([])
+                batch_tokens = 0
+            batches[-1].append(i)
+            batch_tokens += tokens
+
+        for batch in batches:
+            try:
+                vectors = self._request_embeddings(
+                    [
+                        truncate_to_tokens(texts[i], config.EMBEDDING_MAX_INPUT_TOKENS)
+                        for i in batch
+                    ],
+                    model,
+                )
+            except Exception as e:
+                # 인증/할당량/네트워크 등 입력과 무관한 오류는 남은 묶음도 실패하므로 중단
+                print(f"임베딩 생성 중 오류: {e}")
+                current_span().set(error=type(e).__name__)
+                break
+            for i, vector in zip(batch, vectors):
+                if not vector:
+                    continue
+                embeddings[i] = vector
+                if self.cache:
+                    self.cache.set(DiskCache.make_key("embedding", signature, texts[i]), vector)
+
+        return embeddings
+
+    def _request_embeddings(self, inputs: List[str], model: str) -> List[List[float]]:
+        """임베딩 묶음 요청
+
+        일시적 오류(429/5xx/연결 오류)는 재시도하고, 재시도 후에도 실패하거나 인증 등
+        재시도해도 소용없는 오류면 그대로 raise한다. 입력 때문에 거절된 경우(400: 토큰 초과 등)만
+        절반으로 나눠 다시 요청해 문제 입력만 빈 벡터로 남긴다.
+        """
+        retries = self.azure_clients.config.EMBEDDING_MAX_RETRIES
+        error = None
+        for attempt in range(retries + 1):
+            try:
+                response = self.openai_client.embeddings.create(
+                    input=inputs,
+                    # model="text-embedding-3-small"
+                    model=model,
+                    **embedding_request_options(self.azure_clients.config),
+                )
+                usage = getattr(response, "usage", None)
+                if usage:
+                    current = current_span()
+                    current.set(
+                        prompt_tokens=current.attributes.get("prompt_tokens", 0)
+                        + usage.prompt_tokens
+                    )
+                vectors: List[List[float]] = [[] for _ in inputs]
+                for item in response.data:
+                    vectors[item.index] = item.embedding
+                return vectors
+            except Exception as e:
+                if _is_input_error(e):
+                    error = e
+                    break
+                if attempt >= retries or not _is_retryable(e):
+                    raise
+                time.sleep(2**attempt)
+
+        if len(inputs) > 1:
+            middle = len(inputs) // 2
+            return self._request_embeddings(
+                inputs[:middle], model
+            ) + self._request_embeddings(inputs[middle:], model)
+
+        print(f"임베딩 입력 오류: {error}")
+        current_span().set(error=type(error).__name__)
+        return [[]]
+
+    async def generate_embedding_async(self, text: str) -> List[float]:
+        """단일 텍스트 임베딩 비동기 생성 (질의 경로용, 캐시/재시도 규칙은 동기 버전과 동일)"""
+        config = self.azure_clients.config
+        model = config.AZURE_OPENAI_EMBEDDING_MODEL
+        cache_key = DiskCache.make_key("embedding", embedding_signature(config), text)
+        with span("embedding", inputs=1) as current:
+            cached = self.cache.get(cache_key) if self.cache else None
+            current.set(cache_hits=int(cached is not None), cache_hit=cached is not None)
+            if cached is not None:
+                return cached
+
+            retries = config.EMBEDDING_MAX_RETRIES
+            for attempt in range(retries + 1):
+                try:
+                    response = await self.azure_clients.async_openai_client.embeddings.create(
+                        input=[truncate_to_tokens(text, config.EMBEDDING_MAX_INPUT_TOKENS)],
+                        model=model,
+                        **embedding_request_options(config),
+                    )
+                    usage = getattr(response, "usage", None)
+                    if usage:
+                        current.set(prompt_tokens=usage.prompt_tokens)
+                    vector = response.data[0].embedding
+                    if self.cache:
+                        self.cache.set(cache_key, vector)
+                    return vector
+                except Exception as e:
+                    error = e
+                    if attempt >= retries or not _is_retryable(e):
+                        break
+                    await asyncio.sleep(2**attempt)
+
+            print(f"임베딩 생성 중 오류: {error}")
+            current.set(error=type(error).__name__)
             return []
 
     def upload_to_blob_storage(self, file_path: str, blob_name: str) -> str:
         """파일을 Blob Storage에 업로드"""
+        with span("blob_upload"):
+            return self._upload_to_blob_storage(file_path, blob_name)
+
+    def _upload_to_blob_storage(self, file_path: str, blob_name: str) -> str:
         try:
             blob_client = self.azure_clients.blob_client.get_blob_client(
                 container=self.azure_clients.config.AZURE_STORAGE_CONTAINER_NAME,
@@ -130,22 +372,55 @@ class DocumentProcessor:
             return blob_client.url
         except Exception as e:
             print(f"Blob 업로드 중 오류: {e}")
+            current_span().set(error=type(e).__name__)
             return ""
 
+    def upload_document_structure(self, blob_url: str, document: Dict[str, Any]) -> bool:
+        """구조화 문서를 원본 Blob 옆({blob_name}.structure.json)에 저장
+
+        재분석/재청크/재임베딩 시 원본 DOCX/PDF를 다시 파싱하지 않고 이 파일을 읽는다.
+        """
+        with span("structure_upload", blocks=len(document["blocks"])) as current:
+            try:
+                payload = json.dumps(document, ensure_ascii=False, separators=(",", ":"))
+                self._structure_blob_client(blob_url).upload_blob(
+                    payload.encode("utf-8"), overwrite=True
+                )
+                return True
+            except Exception as e:
+                print(f"구조화 문서 업로드 중 오류: {e}")
+                current.set(error=type(e).__name__)
+                return False
+
+    def load_document_structure(self, blob_url: str) -> Optional[Dict[str, Any]]:
+        """원본 Blob 옆에 저장된 구조화 문서 (없거나 형식 버전이 다르면 None)"""
+        with span("structure_load") as current:
+            try:
+                blob_client = self._structure_blob_client(blob_url)
+                document = json.loads(blob_client.download_blob().readall())
+            except Exception as e:
+                # 구조화 문서 도입 이전에 수집된 Blob은 사이드카가 없음
+                current.set(error=type(e).__name__)
+                return None
+            current.set(hit=document.get("version") == STRUCTURE_VERSION)
+            if document.get("version") != STRUCTURE_VERSION:
+                return None
+            return document
+
+    def _structure_blob_client(self, blob_url: str):
+        parsed_url = urlparse(blob_url)
+        container_name, _, blob_name = parsed_url.path.lstrip("/").partition("/")
+        return self.azure_clients.blob_client.get_blob_client(
+            container=container_name, blob=unquote(blob_name) + STRUCTURE_SUFFIX
+        )
+
     def extract_incident_type(self, content: str) -> str:
-        content_lower = content.lower()
-        if any(word in content_lower for word in ["네트워크", "network", "통신"]):
-            return "네트워크 장애"
-        elif any(word in content_lower for word in ["데이터베이스", "database", "db"]):
-            return "데이터베이스 장애"
-        elif any(word in content_lower for word in ["서버", "server", "시스템"]):
-            return "시스템 장애"
-        elif any(word in content_lower for word in ["방화벽", "firewall", "보안"]):
-            return "보안 장애"
-        elif any(word in content_lower for word in ["앱", "app", "애플리케이션"]):
-            return "애플리케이션 장애"
-        else:
-            return "기타"
+        """대표 장애 유형 (키워드가 가장 많이 일치한 유형, 없으면 "기타")"""
+        return self.incident_classifier.primary_label(content)
+
+    def classify_incident(self, content: str) -> Dict[str, int]:
+        """유형별 키워드 일치 횟수 (다중 유형, 일치 횟수 내림차순)"""
+        return self.incident_classifier.classify(content)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,302 @@
+"""문서 텍스트 추출 (큰 파일은 프로세스 풀에서 수행)
+
+PDF는 페이지 범위 단위로 나눠 여러 프로세스에서 동시에 추출하고, 앞 범위부터
+순서대로 블록을 내보낸다. 작업마다 전용 프로세스를 쓰므로 파일별 제한시간을 넘기면
+그 파일의 프로세스만 종료되고, 비정상 PDF 하나가 수집 전체를 멈추지 않는다.
+"""
+import os
+import time
+import threading
+import multiprocessing
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import docx
+import docx.table
+import PyPDF2
+
+
+class ExtractionTimeout(TimeoutError):
+    """파일별 추출 제한시간 초과"""
+
+
+# ---- 구조화 문서 형식 ----
+#
+# 추출 결과는 블록 목록으로 표현하고, 분석/청크 분할/임베딩은 이를 섹션으로 변환해 사용한다.
+#   {"type": "heading", "level": 1, "text": "..."}
+#   {"type": "paragraph", "text": "..."}
+#   {"type": "table", "rows": [["셀", ...], ...]}
+#   {"type": "page", "page": 3, "text": "..."}          (PDF)
+
+# 블록 형식이나 섹션 변환 규칙을 바꾸면 올려서 이전 구조화 문서 캐시를 무효화
+STRUCTURE_VERSION = 1
+
+
+def render_table(rows: List[List[str]]) -> str:
+    """표를 마크다운 표 형식 텍스트로 변환"""
+    if not rows:
+        return ""
+    width = max(len(row) for row in rows)
+    lines = []
+    for index, row in enumerate(rows):
+        cells = [cell.replace("\n", " ").replace("|", "/").strip() for cell in row]
+        cells += [""] * (width - len(cells))
+        lines.append("| " + " | ".join(cells) + " |")
+        if index == 0:
+            lines.append("|" + "---|" * width)
+    return "\n".join(lines)
+
+
+def sections_from_blocks(blocks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, str]]:
+    """블록을 섹션(heading, text)으로 묶어 순서대로 내보냄
+
+    제목 블록에서 새 섹션을 시작하고, PDF 페이지는 페이지마다 섹션 하나(heading "p.N")가 된다.
+    """
+    heading, lines = "", []
+    for block in blocks:
+        kind = block["type"]
+        if kind in ("heading", "page"):
+            if lines:
+                yield {"heading": heading, "text": "\n".join(lines)}
+            if kind == "page":
+                yield {"heading": f"p.{block['page']}", "text": block["text"] or ""}
+                heading, lines = "", []
+                continue
+            heading = block["text"]
+            lines = ["#" * block.get("level", 1) + " " + block["text"]]
+        elif kind == "table":
+            lines.append(render_table(block["rows"]))
+        else:
+            lines.append(block["text"])
+    if lines:
+        yield {"heading": heading, "text": "\n".join(lines)}
+
+
+# ---- 추출 함수 (작업 프로세스에서 실행되므로 모듈 최상위에 정의) ----
+
+
+def pdf_page_count(file_path: str) -> int:
+    with open(file_path, "rb") as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def extract_pdf_pages(file_path: str, start: int, stop: int) -> List[Dict[str, Any]]:
+    """PDF의 [start, stop) 페이지를 페이지 블록으로 추출"""
+    blocks = []
+    with open(file_path, "rb") as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page_number in range(start, min(stop, len(pdf_reader.pages))):
+            blocks.append(
+                {
+                    "type": "page",
+                    "page": page_number + 1,
+                    "text": pdf_reader.pages[page_number].extract_text(),
+                }
+            )
+    return blocks
+
+
+def _heading_level(style_name: str) -> int:
+    """제목 스타일 이름의 수준 ("Heading 2" -> 2, Title -> 1), 제목이 아니면 0"""
+    if style_name.startswith("Title"):
+        return 1
+    if not style_name.startswith(("Heading", "제목")):
+        return 0
+    digits = "".join(ch for ch in style_name if ch.isdigit())
+    return int(digits) if digits else 1
+
+
+def extract_docx_blocks(file_path: str) -> List[Dict[str, Any]]:
+    """DOCX 본문의 문단/제목/표를 문서 순서대로 블록으로 추출"""
+    doc = docx.Document(file_path)
+    blocks: List[Dict[str, Any]] = []
+    for item in doc.iter_inner_content():
+        if isinstance(item, docx.table.Table):
+            rows = []
+            for row in item.rows:
+                # 가로 병합된 셀은 같은 셀이 반복되므로 한 번만 사용
+                cells, seen = [], set()
+                for cell in row.cells:
+                    if id(cell._tc) in seen:
+                        continue
+                    seen.add(id(cell._tc))
+                    cells.append(cell.text)
+                rows.append(cells)
+            if rows:
+                blocks.append({"type": "table", "rows": rows})
+            continue
+
+        style_name = item.style.name if item.style is not None else ""
+        level = _heading_level(style_name)
+        if level and item.text.strip():
+            blocks.append({"type": "heading", "level": level, "text": item.text.strip()})
+        else:
+            blocks.append({"type": "paragraph", "text": item.text})
+    return blocks
+
+
+def markdown_blocks(text: str) -> List[Dict[str, Any]]:
+    """텍스트/마크다운을 '#' 제목 기준으로 블록 분리"""
+    blocks = []
+    for line in text.split("\n"):
+        if line.startswith("#"):
+            level = len(line) - len(line.lstrip("#"))
+            blocks.append({"type": "heading", "level": level, "text": line.lstrip("#").strip()})
+        else:
+            blocks.append({"type": "paragraph", "text": line})
+    return blocks
+
+
+# ---- 작업 프로세스 ----
+
+
+def _run_shard(conn, fn: Callable, args: Tuple):
+    try:
+        conn.send(("ok", fn(*args)))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+class _Shard:
+    """추출 작업 1개를 전용 프로세스에서 실행 (제한시간 초과 시 다른 작업에 영향 없이 종료 가능)"""
+
+    def __init__(self, context, fn: Callable, *args):
+        self._conn, child_conn = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=_run_shard, args=(child_conn, fn, args), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def result(self, deadline: float) -> Any:
+        if not self._conn.poll(max(0.0, deadline - time.monotonic())):
+            raise ExtractionTimeout("텍스트 추출 시간 초과")
+        try:
+            status, value = self._conn.recv()
+        except EOFError:
+            raise RuntimeError(f"추출 프로세스 비정상 종료 (exitcode={self.process.exitcode})")
+        if status == "error":
+            raise RuntimeError(value)
+        return value
+
+    def stop(self):
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self._conn.close()
+
+
+_CONTEXT = None
+_SLOTS: Optional[threading.BoundedSemaphore] = None
+_SLOTS_LOCK = threading.Lock()
+
+
+def _process_context(workers: int):
+    """프로세스 생성 방식과 전체 동시 실행 수 제한 (최초 호출 시 1회 설정)"""
+    global _CONTEXT, _SLOTS
+    with _SLOTS_LOCK:
+        if _CONTEXT is None:
+            # Streamlit 등 스레드가 있는 프로세스를 그대로 fork하지 않도록 forkserver/spawn 사용
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                _CONTEXT = multiprocessing.get_context("forkserver")
+                _CONTEXT.set_forkserver_preload([__name__])
+            else:
+                _CONTEXT = multiprocessing.get_context("spawn")
+            _SLOTS = threading.BoundedSemaphore(workers)
+        return _CONTEXT, _SLOTS
+
+
+def iter_blocks(
+    file_path: str,
+    file_type: str,
+    workers: int,
+    timeout: float,
+    pages_per_shard: int,
+    min_process_bytes: int,
+) -> Iterator[Dict[str, Any]]:
+    """파일의 블록을 문서 순서대로 내보내는 제너레이터
+
+    workers가 0이거나 파일이 min_process_bytes보다 작으면 현재 프로세스에서 추출한다.
+    그 외에는 작업 프로세스(프로세스 전체에서 최대 workers개)에서 추출하며, PDF는
+    pages_per_shard 페이지씩 나눠 동시에 처리한다. 전체 추출이 timeout(초)을 넘기면
+    이 파일의 작업 프로세스를 모두 종료하고 ExtractionTimeout을 발생시킨다.
+    다른 파일이 작업 자리를 모두 쓰고 있어 기다린 시간은 timeout에 포함하지 않는다.
+    """
+    if file_type in ("txt", "md"):
+        with open(file_path, "r", encoding="utf-8") as f:
+            yield from markdown_blocks(f.read())
+        return
+
+    if file_type not in ("pdf", "docx"):
+        return
+
+    if workers <= 0 or os.path.getsize(file_path) < min_process_bytes:
+        if file_type == "docx":
+            yield from extract_docx_blocks(file_path)
+        else:
+            with open(file_path, "rb") as file:
+                for page_number, page in enumerate(PyPDF2.PdfReader(file).pages, 1):
+                    yield {"type": "page", "page": page_number, "text": page.extract_text()}
+        return
+
+    context, slots = _process_context(workers)
+    deadline = time.monotonic() + timeout
+    running: List[_Shard] = []
+
+    def start(fn: Callable, *args, wait: bool = True) -> Optional[_Shard]:
+        nonlocal deadline
+        if not wait:
+            if not slots.acquire(blocking=False):
+                return None
+        else:
+            # 자리는 실행 중인 작업이 끝나거나 각자의 제한시간에 종료되면 반드시 비므로 기한 없이 대기
+            # (이 파일의 작업이 하나도 실행 중이 아닐 때만 기다리므로 대기 시간만큼 기한을 늦춤)
+            waited_from = time.monotonic()
+            slots.acquire()
+            deadline += time.monotonic() - waited_from
+        try:
+            shard = _Shard(context, fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        running.append(shard)
+        return shard
+
+    def finish(shard: _Shard) -> Any:
+        try:
+            return shard.result(deadline)
+        finally:
+            shard.stop()
+            running.remove(shard)
+            slots.release()
+
+    try:
+        if file_type == "docx":
+            yield from finish(start(extract_docx_blocks, file_path))
+            return
+
+        page_count = finish(start(pdf_page_count, file_path))
+        ranges = [
+            (begin, begin + pages_per_shard)
+            for begin in range(0, page_count, pages_per_shard)
+        ]
+        # 앞 범위부터 순서대로 내보내되, 그동안 뒤 범위를 최대 workers개까지 미리 추출
+        # (이미 실행 중인 작업이 있으면 빈 자리가 없을 때 기다리지 않음: 파일 간 교착 방지)
+        queue: List[_Shard] = []
+        next_range = 0
+        while queue or next_range < len(ranges):
+            while next_range < len(ranges) and len(queue) < workers:
+                shard = start(
+                    extract_pdf_pages, file_path, *ranges[next_range], wait=not queue
+                )
+                if shard is None:
+                    break
+                queue.append(shard)
+                next_range += 1
+            yield from finish(queue.pop(0))
+    finally:
+        # 제한시간 초과/오류/소비 중단 시 남은 작업 프로세스 정리
+        for shard in list(running):
+            shard.stop()
+            running.remove(shard)
+            slots.release()
@@ -0,0 +1,130 @@
+import re
+import json
+import threading
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import ahocorasick
+except ImportError:
+    # pyahocorasick이 없으면 정규식 하나로 대체 (결과는 같고 속도만 느림)
+    ahocorasick = None
+
+
+# 기본 장애 유형 키워드 (앞 유형일수록 동점 시 우선)
+DEFAULT_KEYWORDS: Dict[str, List[str]] = {
+    "네트워크 장애": ["네트워크", "network", "통신"],
+    "데이터베이스 장애": ["데이터베이스", "database", "db"],
+    "시스템 장애": ["서버", "server", "시스템"],
+    "보안 장애": ["방화벽", "firewall", "보안"],
+    "애플리케이션 장애": ["앱", "app", "애플리케이션"],
+}
+
+# 어떤 키워드도 없을 때의 유형
+DEFAULT_LABEL = "기타"
+
+# 영문/숫자 키워드는 앞이 영문/숫자가 아닐 때만 일치 ("db"가 "feedback"에 걸리지 않도록)
+# 뒤는 열어 두어 복수형/활용형("servers", "networking", "DBs")과 "application"도 일치
+# 한글 키워드는 조사가 붙으므로 부분 일치
+_ASCII_WORD = "A-Za-z0-9"
+
+
+def _is_ascii_word_char(ch: str) -> bool:
+    return ch.isascii() and ch.isalnum()
+
+
+class IncidentClassifier:
+    """모든 유형의 키워드를 오토마톤(없으면 정규식) 하나로 컴파일해 본문을 한 번만 훑는 장애 유형 분류기"""
+
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self.labels = list(keywords)
+        self._label_of: Dict[str, str] = {}
+        for label, words in keywords.items():
+            for word in words:
+                word = word.strip().lower()
+                if word:
+                    # 여러 유형에 같은 키워드가 있으면 앞 유형 기준
+                    self._label_of.setdefault(word, label)
+
+        # 본문을 한 번만 훑도록 모든 키워드를 오토마톤(또는 정규식) 하나로 컴파일
+        # 겹치는 키워드("앱"/"앱스토어" 등)는 긴 쪽으로 집계
+        self._automaton = None
+        self._pattern = None
+        if not self._label_of:
+            return
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for word in self._label_of:
+                self._automaton.add_word(word, word)
+            self._automaton.make_automaton()
+        else:
+            alternatives = []
+            for word in sorted(self._label_of, key=len, reverse=True):
+                pattern = re.escape(word)
+                if word.isascii():
+                    pattern = f"(?<![{_ASCII_WORD}]){pattern}"
+                alternatives.append(pattern)
+            self._pattern = re.compile("|".join(alternatives), re.IGNORECASE)
+
+    def classify(self, text: str) -> Dict[str, int]:
+        """유형별 키워드 일치 횟수 (일치 횟수 내림차순, 동점은 키워드 파일 순서)"""
+        counts: Dict[str, int] = {}
+        if not text:
+            return counts
+        for word in self._matches(text):
+            label = self._label_of[word]
+            counts[label] = counts.get(label, 0) + 1
+        return dict(
+            sorted(counts.items(), key=lambda item: (-item[1], self.labels.index(item[0])))
+        )
+
+    def _matches(self, text: str) -> Iterator[str]:
+        """본문에서 일치한 키워드(소문자)를 순서대로 내보냄"""
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                yield match.group(0).lower()
+            return
+        if self._automaton is None:
+            return
+        lowered = text.lower()
+        for end, word in self._automaton.iter_long(lowered):
+            if word.isascii():
+                start = end - len(word) + 1
+                if start > 0 and _is_ascii_word_char(lowered[start - 1]):
+                    continue
+            yield word
+
+    def primary_label(self, text: str) -> str:
+        """가장 많이 일치한 유형 (없으면 DEFAULT_LABEL)"""
+        counts = self.classify(text)
+        return next(iter(counts), DEFAULT_LABEL)
+
+
+def load_keywords(path: str) -> Dict[str, List[str]]:
+    """키워드 파일({"유형": ["키워드", ...]} 형식 JSON) 로드 (경로가 비어 있으면 기본 키워드)"""
+    if not path:
+        return DEFAULT_KEYWORDS
+    with open(path, "r", encoding="utf-8") as f:
+        keywords = json.load(f)
+    if not isinstance(keywords, dict) or not all(
+        isinstance(words, list) for words in keywords.values()
+    ):
+        raise ValueError(f"키워드 파일 형식 오류: {path}")
+    return keywords
+
+
+_CLASSIFIERS: Dict[str, IncidentClassifier] = {}
+_CLASSIFIERS_LOCK = threading.Lock()
+
+
+def get_incident_classifier(path: Optional[str] = None) -> IncidentClassifier:
+    """키워드 파일별 프로세스 공용 분류기 반환 (파일 로드 실패 시 기본 키워드 사용)"""
+    path = path or ""
+    with _CLASSIFIERS_LOCK:
+        if path not in _CLASSIFIERS:
+            try:
+                keywords = load_keywords(path)
+            except Exception as e:
+                print(f"장애 유형 키워드 파일 로드 중 오류: {e}")
+                keywords = DEFAULT_KEYWORDS
+            _CLASSIFIERS[path] = IncidentClassifier(keywords)
+        return _CLASSIFIERS[path]
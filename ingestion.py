@@ -0,0 +1,138 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Callable, Optional
+from vector_store import VectorStore
+
+
+class IngestionPipeline:
+    """여러 파일의 추출/분석/임베딩/Blob 업로드를 병렬 처리하고 인덱스 쓰기는 배치로 모아 수행"""
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        max_workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        skip_unchanged: bool = False,
+    ):
+        config = vector_store.azure_clients.config
+        self.vector_store = vector_store
+        self.max_workers = max(1, max_workers or config.INGEST_MAX_WORKERS)
+        self.batch_size = max(1, batch_size or config.INGEST_BATCH_SIZE)
+        # True면 같은 title/본문이 이미 인덱싱된 파일은 분석/임베딩 없이 건너뜀
+        self.skip_unchanged = skip_unchanged
+
+    def run(
+        self,
+        items: List[Dict[str, Any]],
+        on_progress: Optional[Callable[[Dict[str, Any], int, int], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """items(file_path, title, file_type)를 수집하고 파일별 결과 목록 반환
+
+        item에 content와 analysis(선택적으로 sections, document)가 있으면 추출/분석을 건너뛰고 재사용한다.
+        item의 fetch(선택)는 처리 직전 작업 스레드에서 호출되어 file_path를 준비하고,
+        blob_url(선택)이 있으면 Blob 업로드 없이 그 URL을 기록한다.
+        tags(선택)는 검색 필터용 시스템/서비스 태그 목록.
+        결과의 skipped는 변경 없는 파일이라 건너뛰었음을 뜻한다.
+
+        on_progress(result, done, total)는 호출한 스레드에서 실행되므로
+        Streamlit 위젯을 그대로 갱신해도 된다.
+
+        준비된 레코드(임베딩 포함)가 쌓이지 않도록 동시에 진행 중인 항목은 max_workers의
+        2배까지만 두고, 완료된 항목의 레코드는 배치로 올린 뒤 바로 놓는다.
+        """
+        total = len(items)
+        results: List[Dict[str, Any]] = []
+        pending: List[Dict[str, Any]] = []
+        pending_results: List[Dict[str, Any]] = []
+        done = 0
+
+        def report(result: Dict[str, Any]):
+            nonlocal done
+            done += 1
+            results.append(result)
+            if on_progress:
+                on_progress(result, done, total)
+
+        def flush():
+            if not pending:
+                return
+            uploaded_titles = set(self.vector_store.upload_batch(pending))
+            for result in pending_results:
+                if result["title"] not in uploaded_titles:
+                    result["success"] = False
+                    result["error"] = "인덱스 업로드 실패"
+                report(result)
+            pending.clear()
+            pending_results.clear()
+
+        def collect(future: Future, item: Dict[str, Any]):
+            result = {
+                "title": item["title"],
+                "success": False,
+                "skipped": False,
+                "error": "",
+            }
+            try:
+                records = future.result()
+            except Exception as e:
+                records = None
+                result["error"] = str(e)
+
+            if records is None:
+                result["error"] = result["error"] or "문서 처리 실패"
+                report(result)
+                return
+
+            result["success"] = True
+            if not records:
+                result["skipped"] = True
+                report(result)
+                return
+            pending.extend(records)
+            pending_results.append(result)
+            if len(pending_results) >= self.batch_size:
+                flush()
+
+        remaining = iter(items)
+        window = self.max_workers * 2
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight: Dict[Future, Dict[str, Any]] = {}
+
+            def submit_more():
+                while len(in_flight) < window:
+                    item = next(remaining, None)
+                    if item is None:
+                        return
+                    in_flight[executor.submit(self._prepare, item)] = item
+
+            submit_more()
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(future, in_flight.pop(future))
+                submit_more()
+
+        flush()
+        return results
+
+    def _prepare(self, item: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        """미리 분석된 항목은 분석 결과를 재사용하여 청크 레코드 생성"""
+        if item.get("content") and item.get("analysis"):
+            return self.vector_store.prepare_analyzed_document(
+                item["title"],
+                item["content"],
+                item["analysis"],
+                item.get("file_path"),
+                item.get("sections"),
+                document=item.get("document"),
+                tags=item.get("tags"),
+            )
+        if item.get("fetch"):
+            item["fetch"]()
+        return self.vector_store.prepare_document(
+            item["file_path"],
+            item["title"],
+            item["file_type"],
+            skip_if_unchanged=self.skip_unchanged,
+            blob_url=item.get("blob_url"),
+            tags=item.get("tags"),
+        )
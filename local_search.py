@@ -0,0 +1,640 @@
+import os
+import re
+import time
+import atexit
+import asyncio
+import json
+import math
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+
+# Azure AI Search 하이브리드 검색과 같은 RRF(Reciprocal Rank Fusion) 상수
+RRF_K = 60
+
+# BM25 대상 필드와 파라미터
+BM25_FIELDS = ["title", "content", "root_cause"]
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+KEY_FIELD = "id"
+VECTOR_FIELD = "content_vector"
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+class IndexingResult:
+    """SearchClient.upload_documents 결과와 같은 형태 (key, succeeded)"""
+
+    def __init__(self, key: str, succeeded: bool = True, error_message: str = ""):
+        self.key = key
+        self.succeeded = succeeded
+        self.error_message = error_message
+        self.status_code = 200 if succeeded else 400
+
+
+class LocalSearchClient:
+    """Azure SearchClient를 대체하는 로컬 검색 백엔드
+
+    - 벡터: NumPy 행렬(content_vector) 전수 코사인 유사도, 디스크에는 .npy로 저장하고 memory-map으로 로드
+    - 키워드: title/content/root_cause 대상 BM25
+    - 하이브리드: search_text와 vector_queries를 함께 주면 RRF로 순위 결합
+    - filter: OData 부분 집합(eq/ne/gt/ge/lt/le, and/or/not, search.in, any) 지원
+    - facets: "field", "field,count:N", 날짜 필드의 "field,interval:year|month|day" 지원
+    - order_by: "field asc|desc" 목록 (null은 오름차순에서 맨 앞)
+
+    변경은 메모리에 반영하고 디스크에는 flush_interval초에 한 번만 저장한다
+    (전체 파일을 다시 쓰므로 쓰기마다 저장하면 대량 수집이 O(N^2)).
+    남은 변경은 flush()/close() 또는 프로세스 정상 종료 시 저장된다.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 30.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._documents: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        # 추가 시 행렬 전체를 복사하지 않도록 여유 행을 둔 버퍼 (_vectors는 그 앞부분 view)
+        self._buffer: Optional[np.ndarray] = None
+        self._norms = None
+        self._bm25 = None
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._load()
+        atexit.register(self.flush)
+
+    # ---- 저장/로드 ----
+
+    def _documents_path(self) -> str:
+        return os.path.join(self.path, "documents.json")
+
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.npy")
+
+    def _load(self):
+        if not os.path.exists(self._documents_path()):
+            return
+        with open(self._documents_path(), "r", encoding="utf-8") as f:
+            self._documents = json.load(f)
+        self._rows = {doc[KEY_FIELD]: row for row, doc in enumerate(self._documents)}
+        if os.path.exists(self._vectors_path()):
+            self._vectors = np.load(self._vectors_path(), mmap_mode="r")
+
+    def _save(self):
+        os.makedirs(self.path, exist_ok=True)
+        documents_tmp = self._documents_path() + ".tmp"
+        with open(documents_tmp, "w", encoding="utf-8") as f:
+            json.dump(self._documents, f, ensure_ascii=False)
+        vectors_tmp = self._vectors_path() + ".tmp.npy"
+        np.save(vectors_tmp, np.ascontiguousarray(self._vectors))
+        os.replace(documents_tmp, self._documents_path())
+        os.replace(vectors_tmp, self._vectors_path())
+        # 저장 후에는 memory-map으로 다시 연결
+        self._vectors = np.load(self._vectors_path(), mmap_mode="r")
+        self._buffer = None
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def _changed(self):
+        """변경 표시 후 마지막 저장에서 flush_interval이 지났으면 저장"""
+        self._norms = None
+        self._bm25 = None
+        self._dirty = True
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self._save()
+
+    def flush(self):
+        """저장되지 않은 변경을 디스크에 기록"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def close(self):
+        self.flush()
+
+    # ---- 문서 변경 ----
+
+    def load_documents(self, documents: List[Dict[str, Any]], vectors: np.ndarray):
+        """색인 전체를 documents와 벡터 행렬(문서 순서, float32)로 한 번에 교체 (대량 적재용)"""
+        if len(documents) != vectors.shape[0]:
+            raise ValueError("문서 수와 벡터 행 수가 다릅니다.")
+        with self._lock:
+            self._documents = [
+                {k: v for k, v in document.items() if k != VECTOR_FIELD} for document in documents
+            ]
+            self._rows = {doc[KEY_FIELD]: row for row, doc in enumerate(self._documents)}
+            self._vectors = np.asarray(vectors, dtype=np.float32)
+            self._buffer = None
+            self._norms = None
+            self._bm25 = None
+            self._save()
+
+    def upload_documents(self, documents: List[Dict[str, Any]]) -> List[IndexingResult]:
+        return self._write(documents, merge=False)
+
+    def merge_or_upload_documents(
+        self, documents: List[Dict[str, Any]]
+    ) -> List[IndexingResult]:
+        return self._write(documents, merge=True)
+
+    def delete_documents(self, documents: List[Dict[str, Any]]) -> List[IndexingResult]:
+        with self._lock:
+            keys = {doc[KEY_FIELD] for doc in documents}
+            keep = [row for row, doc in enumerate(self._documents) if doc[KEY_FIELD] not in keys]
+            self._documents = [self._documents[row] for row in keep]
+            if len(self._vectors):
+                self._vectors = np.asarray(self._vectors)[keep]
+                self._buffer = None
+            self._rows = {doc[KEY_FIELD]: row for row, doc in enumerate(self._documents)}
+            self._changed()
+        return [IndexingResult(key) for key in keys]
+
+    def _write(self, documents: List[Dict[str, Any]], merge: bool) -> List[IndexingResult]:
+        with self._lock:
+            assignments = []
+            results = []
+            for document in documents:
+                document = dict(document)
+                key = document[KEY_FIELD]
+                vector = document.pop(VECTOR_FIELD, None)
+                row = self._rows.get(key)
+                if row is not None and merge:
+                    self._documents[row].update(document)
+                elif row is not None:
+                    self._documents[row] = document
+                else:
+                    row = len(self._documents)
+                    self._documents.append(document)
+                    self._rows[key] = row
+                if vector:
+                    assignments.append((row, vector))
+                results.append(IndexingResult(key))
+
+            self._vectors = self._resized_vectors(assignments)
+            self._changed()
+        return results
+
+    def _resized_vectors(self, assignments: List[tuple]) -> np.ndarray:
+        """문서 수에 맞춘 벡터 행렬에 (row, vector)를 한 번에 기록
+
+        버퍼가 모자랄 때만 2배로 늘려 복사하므로 추가는 분할 상환 O(배치 크기)이다.
+        새 문서 중 벡터가 없는 행은 0 벡터로 둔다.
+        """
+        current = self._vectors
+        dim = current.shape[1] if current.shape[1] else next(
+            (len(vector) for _, vector in assignments), 0
+        )
+        rows = len(self._documents)
+        buffer = self._buffer
+        if buffer is None or buffer.shape[1] != dim or buffer.shape[0] < rows:
+            # memory-map(읽기 전용)에서 처음 쓰거나 여유 행이 모자라면 새 버퍼로 복사
+            capacity = max(rows, 2 * current.shape[0], 1024)
+            buffer = np.zeros((capacity, dim), dtype=np.float32)
+            if current.shape[1]:
+                buffer[: current.shape[0]] = current
+            self._buffer = buffer
+        vectors = buffer[:rows]
+        if assignments:
+            positions = [row for row, _ in assignments]
+            vectors[positions] = np.asarray([vector for _, vector in assignments], dtype=np.float32)
+        return vectors
+
+    # ---- 조회 ----
+
+    def get_document(self, key: str, selected_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                raise KeyError(f"문서를 찾을 수 없습니다: {key}")
+            return self._project(row, selected_fields)
+
+    def get_document_count(self) -> int:
+        return len(self._documents)
+
+    def search(
+        self,
+        search_text: Optional[str] = None,
+        vector_queries: Optional[List[Any]] = None,
+        select: Optional[List[str]] = None,
+        top: Optional[int] = None,
+        filter: Optional[str] = None,
+        facets: Optional[List[str]] = None,
+        order_by: Optional[List[str]] = None,
+        **kwargs,
+    ) -> "SearchResults":
+        """Azure SearchClient.search와 같은 의미의 하이브리드 검색 결과 반환"""
+        with self._lock:
+            candidates = self._filter_rows(filter)
+            rankings = []
+
+            if search_text and search_text.strip() != "*":
+                rankings.append(self._bm25_ranking(search_text, candidates))
+
+            for query in vector_queries or []:
+                rankings.append(self._vector_ranking(query, candidates))
+
+            if not rankings:
+                scored = [(row, 1.0) for row in candidates]
+            elif len(rankings) == 1:
+                scored = rankings[0]
+            else:
+                fused: Dict[int, float] = defaultdict(float)
+                for ranking in rankings:
+                    for rank, (row, _) in enumerate(ranking, 1):
+                        fused[row] += 1.0 / (RRF_K + rank)
+                scored = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+            facet_results = self._facets([row for row, _ in scored], facets) if facets else None
+            for spec in reversed(order_by or []):
+                field, _, direction = spec.strip().partition(" ")
+                scored.sort(
+                    key=lambda item: _sort_key(self._documents[item[0]].get(field)),
+                    reverse=direction.strip().lower() == "desc",
+                )
+            if top is not None:
+                scored = scored[:top]
+            results = SearchResults(facet_results)
+            for row, score in scored:
+                result = self._project(row, select)
+                result["@search.score"] = score
+                results.append(result)
+            return results
+
+    def _facets(self, rows: List[int], specs: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """일치한 문서 전체 기준 필드 값별 건수 (컬렉션 필드는 항목별로 집계)"""
+        facets = {}
+        for spec in specs:
+            field, *options = [part.strip() for part in spec.split(",")]
+            params = dict(option.split(":", 1) for option in options if ":" in option)
+            counts: Counter = Counter()
+            for row in rows:
+                value = self._documents[row].get(field)
+                values = value if isinstance(value, list) else [value]
+                for item in values:
+                    if item is None:
+                        continue
+                    if "interval" in params:
+                        item = _date_bucket(item, params["interval"])
+                        if item is None:
+                            continue
+                    counts[item] += 1
+            if "interval" in params:
+                ordered = sorted(counts.items())
+            else:
+                ordered = sorted(counts.items(), key=lambda item: (-item[1], str(item[0])))
+                ordered = ordered[: int(params.get("count", 10))]
+            facets[field] = [{"value": value, "count": count} for value, count in ordered]
+        return facets
+
+    def _project(self, row: int, fields: Optional[List[str]]) -> Dict[str, Any]:
+        document = self._documents[row]
+        if fields is None:
+            return dict(document)
+        projected = {field: document.get(field) for field in fields if field != VECTOR_FIELD}
+        # 벡터는 명시적으로 선택한 경우에만 반환 (Azure의 retrievable 벡터 필드와 같음)
+        if VECTOR_FIELD in fields and row < self._vectors.shape[0]:
+            projected[VECTOR_FIELD] = np.asarray(self._vectors[row]).tolist()
+        return projected
+
+    def _filter_rows(self, expression: Optional[str]) -> List[int]:
+        rows = range(len(self._documents))
+        if not expression:
+            return list(rows)
+        predicate = ODataFilter(expression)
+        return [row for row in rows if predicate.matches(self._documents[row])]
+
+    def _vector_ranking(self, query: Any, candidates: List[int]) -> List[tuple]:
+        """코사인 유사도 기준 상위 k개 (row, score)"""
+        if isinstance(query, dict):
+            vector, k = query.get("vector"), query.get("k_nearest_neighbors")
+        else:
+            vector, k = getattr(query, "vector", None), getattr(query, "k_nearest_neighbors", None)
+        if not vector or not candidates or self._vectors.shape[0] == 0:
+            return []
+
+        if self._norms is None:
+            self._norms = np.linalg.norm(self._vectors, axis=1)
+        query_vector = np.asarray(vector, dtype=np.float32)
+        if len(candidates) == self._vectors.shape[0]:
+            # 필터가 없으면 memory-map 행렬을 복사 없이 그대로 사용
+            matrix, norms = self._vectors, self._norms
+        else:
+            matrix, norms = self._vectors[candidates], self._norms[candidates]
+        norms = norms * (np.linalg.norm(query_vector) or 1.0)
+        scores = (matrix @ query_vector) / np.where(norms == 0, 1.0, norms)
+
+        k = min(k or len(candidates), len(candidates))
+        top_positions = np.argpartition(-scores, k - 1)[:k]
+        top_positions = top_positions[np.argsort(-scores[top_positions])]
+        return [(candidates[i], float(scores[i])) for i in top_positions]
+
+    def _bm25_ranking(self, search_text: str, candidates: List[int]) -> List[tuple]:
+        """BM25 점수 기준 (row, score), 검색어가 하나라도 있는 문서만"""
+        if self._bm25 is None:
+            self._bm25 = _BM25Index(self._documents)
+        allowed = set(candidates)
+        scores = self._bm25.score(_tokenize(search_text))
+        ranking = [(row, score) for row, score in scores.items() if row in allowed]
+        ranking.sort(key=lambda item: item[1], reverse=True)
+        return ranking
+
+
+class SearchResults(list):
+    """SearchClient.search 결과처럼 순회하는 결과 목록 (get_facets 지원)"""
+
+    def __init__(self, facets: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        super().__init__()
+        self._facets = facets
+
+    def get_facets(self) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        return self._facets
+
+
+class _AsyncResults:
+    """aio SearchClient.search 결과처럼 async for로 순회하는 결과 목록"""
+
+    def __init__(self, results: SearchResults):
+        self._results = results
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def get_facets(self) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        return self._results.get_facets()
+
+    async def _iterate(self):
+        for result in self._results:
+            yield result
+
+
+class AsyncLocalSearchClient:
+    """azure.search.documents.aio.SearchClient와 같은 인터페이스 (연산은 스레드에서 수행)"""
+
+    def __init__(self, client: LocalSearchClient):
+        self.client = client
+
+    async def search(self, *args, **kwargs) -> _AsyncResults:
+        results = await asyncio.to_thread(self.client.search, *args, **kwargs)
+        return _AsyncResults(results)
+
+    async def upload_documents(self, documents: List[Dict[str, Any]]) -> List[IndexingResult]:
+        return await asyncio.to_thread(self.client.upload_documents, documents)
+
+    async def merge_or_upload_documents(
+        self, documents: List[Dict[str, Any]]
+    ) -> List[IndexingResult]:
+        return await asyncio.to_thread(self.client.merge_or_upload_documents, documents)
+
+    async def delete_documents(self, documents: List[Dict[str, Any]]) -> List[IndexingResult]:
+        return await asyncio.to_thread(self.client.delete_documents, documents)
+
+    async def get_document(self, key: str, selected_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.client.get_document, key, selected_fields)
+
+    async def get_document_count(self) -> int:
+        return await asyncio.to_thread(self.client.get_document_count)
+
+    async def close(self):
+        pass
+
+
+class _BM25Index:
+    """BM25_FIELDS를 합친 텍스트에 대한 역색인"""
+
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.lengths: List[int] = []
+        for row, document in enumerate(documents):
+            tokens = []
+            for field in BM25_FIELDS:
+                tokens.extend(_tokenize(document.get(field) or ""))
+            self.lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term][row] = tf
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def score(self, terms: List[str]) -> Dict[int, float]:
+        scores: Dict[int, float] = defaultdict(float)
+        total = len(self.lengths)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for row, tf in postings.items():
+                norm = 1 - BM25_B + BM25_B * self.lengths[row] / (self.average_length or 1.0)
+                scores[row] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        return scores
+
+
+class ODataFilter:
+    """Azure AI Search filter 식의 부분 집합 해석기
+
+    지원: eq ne gt ge lt le, and or not, 괄호, search.in(field, 'a,b', ','),
+    컬렉션 필드의 field/any(x: x eq 'v')
+    """
+
+    _TOKEN = re.compile(
+        r"\s*(?:(?P<string>'(?:[^']|'')*')|(?P<punct>[(),:/])"
+        r"|(?P<word>[A-Za-z_][\w.]*|[-+]?\d[\w:.+\-]*))"
+    )
+
+    def __init__(self, expression: str):
+        self.tokens = self._lex(expression)
+        self.pos = 0
+        self.tree = self._parse_or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"지원하지 않는 filter 식: {expression}")
+
+    def matches(self, document: Dict[str, Any]) -> bool:
+        return bool(self._eval(self.tree, document, {}))
+
+    # ---- 토큰/파서 ----
+
+    def _lex(self, expression: str) -> List[tuple]:
+        tokens, pos = [], 0
+        expression = expression.strip()
+        while pos < len(expression):
+            match = self._TOKEN.match(expression, pos)
+            if not match or match.end() == pos:
+                raise ValueError(f"지원하지 않는 filter 식: {expression}")
+            kind = match.lastgroup
+            tokens.append((kind, match.group(kind)))
+            pos = match.end()
+            while pos < len(expression) and expression[pos].isspace():
+                pos += 1
+        return tokens
+
+    def _peek(self, value: Optional[str] = None) -> Optional[tuple]:
+        if self.pos >= len(self.tokens):
+            return None
+        token = self.tokens[self.pos]
+        if value is not None and token[1].lower() != value:
+            return None
+        return token
+
+    def _take(self, value: Optional[str] = None) -> tuple:
+        token = self._peek(value)
+        if token is None:
+            raise ValueError(f"filter 식 해석 실패: '{value}' 필요")
+        self.pos += 1
+        return token
+
+    def _parse_or(self):
+        node = self._parse_and()
+        while self._peek("or"):
+            self._take()
+            node = ("or", node, self._parse_and())
+        return node
+
+    def _parse_and(self):
+        node = self._parse_not()
+        while self._peek("and"):
+            self._take()
+            node = ("and", node, self._parse_not())
+        return node
+
+    def _parse_not(self):
+        if self._peek("not"):
+            self._take()
+            return ("not", self._parse_not())
+        return self._parse_primary()
+
+    def _parse_primary(self):
+        if self._peek("("):
+            self._take("(")
+            node = self._parse_or()
+            self._take(")")
+            return node
+
+        if self._peek("search.in"):
+            self._take()
+            self._take("(")
+            field = self._take()[1]
+            self._take(",")
+            values = self._literal(self._take())
+            delimiter = ","
+            if self._peek(","):
+                self._take(",")
+                delimiter = self._literal(self._take())
+            self._take(")")
+            return ("in", field, [v.strip() for v in values.split(delimiter)])
+
+        field = self._take()[1]
+        if self._peek("/"):
+            self._take("/")
+            quantifier = self._take()[1].lower()
+            self._take("(")
+            variable = self._take()[1]
+            self._take(":")
+            condition = self._parse_or()
+            self._take(")")
+            return (quantifier, field, variable, condition)
+
+        operator = self._take()[1].lower()
+        if operator not in ("eq", "ne", "gt", "ge", "lt", "le"):
+            raise ValueError(f"지원하지 않는 연산자: {operator}")
+        return ("cmp", operator, field, self._literal(self._take()))
+
+    def _literal(self, token: tuple) -> Any:
+        kind, value = token
+        if kind == "string":
+            return value[1:-1].replace("''", "'")
+        lowered = value.lower()
+        if lowered in ("true", "false"):
+            return lowered == "true"
+        if lowered == "null":
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            pass
+        try:
+            return float(value)
+        except ValueError:
+            return _parse_datetime(value) or value
+
+    # ---- 평가 ----
+
+    def _eval(self, node, document: Dict[str, Any], variables: Dict[str, Any]) -> bool:
+        kind = node[0]
+        if kind == "or":
+            return self._eval(node[1], document, variables) or self._eval(node[2], document, variables)
+        if kind == "and":
+            return self._eval(node[1], document, variables) and self._eval(node[2], document, variables)
+        if kind == "not":
+            return not self._eval(node[1], document, variables)
+        if kind == "in":
+            return self._value(node[1], document, variables) in node[2]
+        if kind in ("any", "all"):
+            items = self._value(node[1], document, variables) or []
+            check = any if kind == "any" else all
+            return check(
+                self._eval(node[3], document, {**variables, node[2]: item}) for item in items
+            )
+
+        _, operator, field, expected = node
+        actual = self._value(field, document, variables)
+        if isinstance(expected, datetime) and isinstance(actual, str):
+            actual = _parse_datetime(actual)
+        if operator == "eq":
+            return actual == expected
+        if operator == "ne":
+            return actual != expected
+        if actual is None or expected is None:
+            return False
+        try:
+            return {
+                "gt": actual > expected,
+                "ge": actual >= expected,
+                "lt": actual < expected,
+                "le": actual <= expected,
+            }[operator]
+        except TypeError:
+            return False
+
+    def _value(self, name: str, document: Dict[str, Any], variables: Dict[str, Any]) -> Any:
+        if name in variables:
+            return variables[name]
+        return document.get(name)
+
+
+def _sort_key(value: Any) -> tuple:
+    """order_by 정렬 키 (null이 가장 작고, 날짜 문자열은 시각으로 비교)"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, str):
+        parsed = _parse_datetime(value)
+        if parsed is not None and parsed.tzinfo is not None:
+            return (1, parsed.timestamp())
+    return (1, value)
+
+
+def _parse_datetime(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _date_bucket(value: Any, interval: str) -> Optional[str]:
+    """날짜 값을 interval(year/month/day) 구간 시작 시각 문자열로 변환"""
+    if isinstance(value, str):
+        value = _parse_datetime(value)
+    if not isinstance(value, datetime):
+        return None
+    if interval == "year":
+        value = value.replace(month=1, day=1)
+    elif interval == "month":
+        value = value.replace(day=1)
+    elif interval != "day":
+        raise ValueError(f"지원하지 않는 facet interval: {interval}")
+    return value.replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
@@ -10,9 +10,11 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from vector_store import VectorStore
-from document_processor import DocumentProcessor
-from azure_client import AzureClients
+from ingestion import IngestionPipeline
+from document_processor import DocumentProcessor, ANALYSIS_FAILED
+from azure_client import get_azure_clients
 from config import Config
+from telemetry import start_metrics_server
 
 # 페이지 설정
 st.set_page_config(page_title="RAG 지식 생성", page_icon="📚", layout="wide")
@@ -42,6 +44,8 @@ def init_session_state():
         st.session_state["uploaded_files"] = []
     if "file_contents" not in st.session_state:
         st.session_state["file_contents"] = {}
+    if "file_analyses" not in st.session_state:
+        st.session_state["file_analyses"] = {}
     if "knowledge_generated" not in st.session_state:
         st.session_state["knowledge_generated"] = False
     if "vector_store" not in st.session_state:
@@ -53,10 +57,11 @@ def init_session_state():
 
 
 def initialize_azure_clients():
-    """Azure 클라이언트 초기화"""
+    """Azure 클라이언트 초기화 (프로세스 공용 인스턴스 사용)"""
     try:
-        config = Config()
-        azure_clients = AzureClients(config)
+        azure_clients = get_azure_clients(Config())
+        # Streamlit 프로세스의 메트릭 엔드포인트 (METRICS_PORT 설정 시, 프로세스당 1회)
+        start_metrics_server(azure_clients.config.METRICS_PORT)
         return azure_clients
     except Exception as e:
         st.error(f"Azure 클라이언트 초기화 실패: {str(e)}")
@@ -64,7 +69,11 @@ def initialize_azure_clients():
 
 
 def process_uploaded_file(uploaded_file, doc_processor):
-    """업로드된 파일 처리 - DocumentProcessor 사용"""
+    """업로드된 파일 처리 - DocumentProcessor 사용
+
+    지식베이스 생성 시 재사용할 수 있도록 추출 본문과 분석 결과를
+    session_state["file_analyses"]에 함께 보관한다.
+    """
     if uploaded_file is None:
         return None
 
@@ -77,8 +86,10 @@ def process_uploaded_file(uploaded_file, doc_processor):
         # 파일 확장자 확인
         file_extension = uploaded_file.name.split(".")[-1].lower()
 
-        # DocumentProcessor를 사용하여 텍스트 추출
-        content = doc_processor.extract_text_from_file(temp_file_path, file_extension)
+        # DocumentProcessor를 사용하여 구조화 문서(제목/문단/표) 추출 후 섹션 단위로 변환
+        structure = doc_processor.extract_document(temp_file_path, file_extension)
+        sections = doc_processor.document_sections(structure)
+        content = "\n".join(section["text"] for section in sections)
 
         analysis = doc_processor.analyze_incident_report(content)
         KST = timezone(timedelta(hours=9))
@@ -100,6 +111,15 @@ def process_uploaded_file(uploaded_file, doc_processor):
         # 임시 파일 삭제
         os.unlink(temp_file_path)
 
+        # 분석에 실패한 경우 지식베이스 생성 시 다시 분석하도록 보관하지 않음
+        if analysis["document_summary"] != ANALYSIS_FAILED:
+            st.session_state["file_analyses"][uploaded_file.name] = {
+                "content": content,
+                "analysis": analysis,
+                "sections": sections,
+                "document": structure,
+            }
+
         return document
     except Exception as e:
         st.error(f"파일 처리 중 오류: {str(e)}")
@@ -121,8 +141,8 @@ def save_uploaded_file_to_temp(uploaded_file):
         return None
 
 
-def generate_knowledge_base():
-    """지식베이스 생성 - VectorStore 사용"""
+def generate_knowledge_base(tags=None):
+    """지식베이스 생성 - VectorStore 사용 (tags: 모든 파일에 기록할 시스템/서비스 태그)"""
     if not st.session_state["file_contents"]:
         st.error("업로드된 파일이 없습니다.")
         return
@@ -146,47 +166,62 @@ def generate_knowledge_base():
         )
         st.session_state["vector_store"] = vector_store
 
-        success_count = 0
         total_files = len(st.session_state["file_contents"])
 
-        # 각 파일을 벡터 스토어에 추가
-        for filename, content in st.session_state["file_contents"].items():
-            with st.spinner(f"{filename} 파일을 지식베이스에 추가 중..."):
-                # 파일 확장자 확인
-                file_extension = filename.split(".")[-1].lower()
-
-                if file_extension not in ["docx", "pdf"]:
-                    st.warning(f"{filename}: 지원하지 않는 파일 형식입니다.")
-                    continue
-
-                # 임시 파일로 저장
-                temp_file_path = save_uploaded_file_to_temp(
-                    next(
-                        f
-                        for f in st.session_state["uploaded_files"]
-                        if f.name == filename
-                    )
+        # 파일별 수집 대상 준비 (임시 파일 저장)
+        items = []
+        for filename in st.session_state["file_contents"]:
+            # 파일 확장자 확인
+            file_extension = filename.split(".")[-1].lower()
+
+            if file_extension not in ["docx", "pdf"]:
+                st.warning(f"{filename}: 지원하지 않는 파일 형식입니다.")
+                continue
+
+            # 임시 파일로 저장
+            temp_file_path = save_uploaded_file_to_temp(
+                next(
+                    f
+                    for f in st.session_state["uploaded_files"]
+                    if f.name == filename
+                )
+            )
+            if temp_file_path:
+                # 미리보기 단계의 추출/분석 결과 재사용
+                preanalyzed = st.session_state["file_analyses"].get(filename, {})
+                items.append(
+                    {
+                        "file_path": temp_file_path,
+                        "title": filename,
+                        "file_type": file_extension,
+                        "content": preanalyzed.get("content"),
+                        "analysis": preanalyzed.get("analysis"),
+                        "sections": preanalyzed.get("sections"),
+                        "document": preanalyzed.get("document"),
+                        "tags": tags,
+                    }
                 )
 
-                if temp_file_path:
-                    try:
-                        # VectorStore의 add_document 함수 사용
-                        success = vector_store.add_document(
-                            file_path=temp_file_path,
-                            title=filename,
-                            file_type=file_extension,
-                        )
+        # 병렬 수집 진행 상황 표시
+        progress_bar = st.progress(0.0, text="지식베이스에 추가 중...")
 
-                        if success:
-                            success_count += 1
+        def on_progress(result, done, total):
+            progress_bar.progress(
+                done / total, text=f"{done}/{total} 파일 처리 완료"
+            )
+            if not result["success"]:
+                st.error(f"❌ {result['title']} 처리 중 오류: {result['error']}")
 
-                        # 임시 파일 삭제
-                        os.unlink(temp_file_path)
+        try:
+            results = IngestionPipeline(vector_store).run(items, on_progress)
+        finally:
+            # 임시 파일 삭제
+            for item in items:
+                if os.path.exists(item["file_path"]):
+                    os.unlink(item["file_path"])
 
-                    except Exception as e:
-                        st.error(f"❌ {filename} 처리 중 오류: {str(e)}")
-                        if os.path.exists(temp_file_path):
-                            os.unlink(temp_file_path)
+        succeeded = [result["title"] for result in results if result["success"]]
+        success_count = len(succeeded)
 
         # 결과 표시
         if success_count > 0:
@@ -205,9 +240,18 @@ def generate_knowledge_base():
             **생성된 지식베이스 정보:**
             - 성공적으로 처리된 파일 수: {success_count}개
             - 총 텍스트 길이: {total_chars:,}자
-            - 성공한 파일 목록: {', '.join([f for f in st.session_state["file_contents"].keys()][:success_count])}
+            - 성공한 파일 목록: {', '.join(succeeded)}
             """
             )
+
+            # LLM 캐시 적중 현황 표시
+            cache = st.session_state["doc_processor"].cache
+            if cache:
+                stats = cache.stats()
+                st.caption(
+                    f"LLM 캐시: 적중 {stats['hits']}회 / 미적중 {stats['misses']}회 "
+                    f"(적중률 {stats['hit_rate']:.0%})"
+                )
         else:
             st.error("❌ 모든 파일 처리에 실패했습니다.")
 
@@ -264,6 +308,7 @@ with st.sidebar:
             with col_b:
                 if st.button("삭제", key=f"delete_{i}"):
                     del st.session_state["file_contents"][filename]
+                    st.session_state["file_analyses"].pop(filename, None)
                     st.session_state["uploaded_files"] = [
                         f
                         for f in st.session_state["uploaded_files"]
@@ -275,11 +320,16 @@ with st.sidebar:
     st.header("🔧 지식베이스 생성")
 
     if st.session_state["file_contents"]:
+        tags_input = st.text_input(
+            "시스템/서비스 태그",
+            placeholder="예: 결제, PG",
+            help="쉼표로 구분하며, 챗봇 검색 조건에서 태그로 사례를 좁힐 수 있습니다.",
+        )
         if st.button(
             "🚀 지식데이터 생성하기", type="primary", use_container_width=True
         ):
             with st.spinner("지식베이스를 생성 중..."):
-                generate_knowledge_base()
+                generate_knowledge_base(tags_input.split(","))
     else:
         st.info("📁 파일을 업로드한 후 지식데이터를 생성할 수 있습니다.")
 
@@ -291,6 +341,7 @@ with st.sidebar:
         if st.button("🔄 지식베이스 초기화", use_container_width=True):
             st.session_state["uploaded_files"] = []
             st.session_state["file_contents"] = {}
+            st.session_state["file_analyses"] = {}
             st.session_state["knowledge_generated"] = False
             st.session_state["vector_store"] = None
             st.rerun()
@@ -0,0 +1,346 @@
+"""분석 프롬프트/임베딩 모델 변경분만 다시 계산하는 증분 재인덱싱
+
+    python reindex.py --workers 8
+    python reindex.py --dry-run
+    python reindex.py --rechunk
+
+레코드의 analysis_prompt_version, embedding_model을 현재 값과 비교해
+- 프롬프트 버전이 다르면 원본 파일을 다시 분석해 summary/root_cause/emergency_actions만 갱신
+- 임베딩 모델이 다르면 청크 본문은 그대로 두고 content_vector만 다시 생성
+한다. 청크 분할 설정(CHUNK_*)이나 추출 형식이 바뀐 경우는 --rechunk로 모든 보고서의 청크를
+다시 만든다 (분석 결과는 프롬프트 버전이 같으면 그대로 유지).
+
+원본 본문은 Blob 옆에 저장된 구조화 문서(*.structure.json)에서 읽고, 없으면 원본 파일을
+한 번 다시 추출해 구조화 문서를 저장한다. title_hash가 없는 이전 레코드는 실행 시 먼저 채운다.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse, unquote
+
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+from config import Config
+from azure_client import get_azure_clients
+from document_processor import (
+    DocumentProcessor,
+    ANALYSIS_FAILED,
+    ANALYSIS_PROMPT_VERSION,
+    embedding_signature,
+)
+from vector_store import VectorStore, hash_text, join_chunk_records
+from chunker import chunk_sections
+from telemetry import span
+
+
+# 재인덱싱 판단/재계산에 필요한 필드 (벡터 제외)
+REINDEX_FIELDS = [
+    "id",
+    "parent_id",
+    "chunk_index",
+    "chunk_heading",
+    "chunk_offset",
+    "title",
+    "content",
+    "file_path",
+    "analysis_prompt_version",
+    "embedding_model",
+]
+
+# 청크 재분할 시 새 청크 레코드로 옮기는 보고서 단위 필드
+REPORT_FIELDS = [
+    "title",
+    "summary",
+    "incident_type",
+    "root_cause",
+    "emergency_actions",
+    "file_path",
+    "upload_date",
+    "tags",
+    "title_hash",
+    "parent_id",
+    "analysis_prompt_version",
+]
+
+
+class Reindexer:
+    """변경된 입력에 해당하는 필드만 다시 계산해 merge_or_upload로 갱신"""
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        max_workers: Optional[int] = None,
+        rechunk: bool = False,
+    ):
+        config = vector_store.azure_clients.config
+        self.config = config
+        self.vector_store = vector_store
+        self.doc_processor = vector_store.doc_processor
+        self.azure_clients = vector_store.azure_clients
+        self.prompt_version = ANALYSIS_PROMPT_VERSION
+        # 차원을 줄여 쓰면 "모델@차원" (차원만 바꿔도 재임베딩 대상)
+        self.embedding_model = embedding_signature(config)
+        self.max_workers = max(1, max_workers or config.INGEST_MAX_WORKERS)
+        # True면 모든 보고서의 청크를 구조화 문서에서 다시 분할/임베딩
+        self.rechunk = rechunk
+
+    def plan(self) -> List[str]:
+        """재인덱싱 대상 보고서 id 목록"""
+        if self.rechunk:
+            return self.vector_store.list_parent_ids()
+        return self.vector_store.find_stale_parent_ids(
+            self.prompt_version, self.embedding_model
+        )
+
+    def run(
+        self,
+        parent_ids: List[str],
+        on_progress: Optional[Callable[[Dict[str, Any], int, int], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """보고서별로 병렬 재계산, on_progress(result, done, total)는 호출한 스레드에서 실행"""
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.reindex_document, pid) for pid in parent_ids]
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                if on_progress:
+                    on_progress(result, done, len(parent_ids))
+        return results
+
+    def reindex_document(self, parent_id: str) -> Dict[str, Any]:
+        """보고서 1건 재계산 (결과: parent_id, title, reanalyzed, reembedded, rechunked, success, error)"""
+        result = {
+            "parent_id": parent_id,
+            "title": "",
+            "reanalyzed": False,
+            "reembedded": False,
+            "rechunked": False,
+            "success": False,
+            "error": "",
+        }
+        with span("reindex_document") as current:
+            try:
+                if self.rechunk:
+                    self._rechunk_document(parent_id, result)
+                    result["success"] = True
+                    return result
+
+                chunks = self.vector_store.get_chunks(parent_id, REINDEX_FIELDS)
+                result["title"] = chunks[0].get("title") or ""
+                updates: List[Dict[str, Any]] = [{"id": chunk["id"]} for chunk in chunks]
+
+                if any(c.get("analysis_prompt_version") != self.prompt_version for c in chunks):
+                    analysis = self.doc_processor.analyze_incident_report(
+                        self._source_content(chunks)
+                    )
+                    if analysis["document_summary"] == ANALYSIS_FAILED:
+                        raise RuntimeError("문서 분석 실패")
+                    for update in updates:
+                        update.update(
+                            summary=analysis["document_summary"],
+                            root_cause=analysis["incident_symptoms_and_causes"],
+                            emergency_actions=analysis["emergency_actions"],
+                            analysis_prompt_version=self.prompt_version,
+                        )
+                    result["reanalyzed"] = True
+
+                if any(c.get("embedding_model") != self.embedding_model for c in chunks):
+                    embeddings = self.doc_processor.generate_embeddings(
+                        [
+                            f"{chunk.get('title')}\n{chunk.get('chunk_heading') or ''}\n{chunk.get('content') or ''}"
+                            for chunk in chunks
+                        ]
+                    )
+                    if not all(embeddings):
+                        raise RuntimeError("임베딩 생성 실패")
+                    for update, embedding in zip(updates, embeddings):
+                        update.update(
+                            content_vector=embedding, embedding_model=self.embedding_model
+                        )
+                    result["reembedded"] = True
+
+                if result["reanalyzed"] or result["reembedded"]:
+                    succeeded = set(self.vector_store.merge_records(updates))
+                    if len(succeeded) < len(updates):
+                        raise RuntimeError("인덱스 갱신 실패")
+                result["success"] = True
+
+            except Exception as e:
+                result["error"] = str(e)
+                current.set(error=type(e).__name__)
+
+            finally:
+                current.set(
+                    reanalyzed=result["reanalyzed"],
+                    reembedded=result["reembedded"],
+                    rechunked=result["rechunked"],
+                )
+            return result
+
+    def _rechunk_document(self, parent_id: str, result: Dict[str, Any]):
+        """구조화 문서에서 청크를 다시 분할/임베딩해 보고서의 청크 레코드를 교체"""
+        chunks = self.vector_store.get_chunks(
+            parent_id, sorted(set(REINDEX_FIELDS + REPORT_FIELDS))
+        )
+        title = chunks[0].get("title") or ""
+        result["title"] = title
+
+        document = self._source_document(chunks)
+        if document is None:
+            raise RuntimeError("원본 문서를 읽을 수 없음")
+        sections = self.doc_processor.document_sections(document)
+        content = "\n".join(section["text"] for section in sections)
+
+        report_fields = {field: chunks[0].get(field) for field in REPORT_FIELDS}
+        report_fields["parent_id"] = parent_id
+        report_fields["incident_type"] = self.doc_processor.extract_incident_type(content)
+        if report_fields["analysis_prompt_version"] != self.prompt_version:
+            analysis = self.doc_processor.analyze_incident_report(content)
+            if analysis["document_summary"] == ANALYSIS_FAILED:
+                raise RuntimeError("문서 분석 실패")
+            report_fields.update(
+                summary=analysis["document_summary"],
+                root_cause=analysis["incident_symptoms_and_causes"],
+                emergency_actions=analysis["emergency_actions"],
+                analysis_prompt_version=self.prompt_version,
+            )
+            result["reanalyzed"] = True
+
+        new_chunks = chunk_sections(
+            sections, self.config.CHUNK_MAX_TOKENS, self.config.CHUNK_OVERLAP_TOKENS
+        )
+        if not new_chunks:
+            raise RuntimeError("본문이 비어 있음")
+        embeddings = self.doc_processor.generate_embeddings(
+            [f"{title}\n{chunk['heading']}\n{chunk['text']}" for chunk in new_chunks]
+        )
+        if not all(embeddings):
+            raise RuntimeError("임베딩 생성 실패")
+
+        records = [
+            {
+                "id": f"{parent_id}_{index}",
+                "content": chunk["text"],
+                "chunk_heading": chunk["heading"],
+                "content_vector": embedding,
+                "chunk_index": index,
+                "chunk_offset": chunk["offset"],
+                **report_fields,
+                # 변경 없는 파일 판단(is_indexed)이 새 추출 형식 기준으로 동작하도록 갱신
+                "content_hash": hash_text(content),
+                "embedding_model": self.embedding_model,
+            }
+            for index, (chunk, embedding) in enumerate(zip(new_chunks, embeddings))
+        ]
+        succeeded = self.vector_store.replace_chunks(
+            records, [chunk["id"] for chunk in chunks]
+        )
+        if len(succeeded) < len(records):
+            raise RuntimeError("인덱스 갱신 실패")
+        result["reembedded"] = True
+        result["rechunked"] = True
+
+    def _source_content(self, chunks: List[Dict[str, Any]]) -> str:
+        """분석 입력 본문 (구조화 문서 기준, 원본이 없으면 청크 본문을 이어 붙임)"""
+        document = self._source_document(chunks)
+        if document is not None:
+            content = "\n".join(
+                section["text"] for section in self.doc_processor.document_sections(document)
+            )
+            if content:
+                return content
+        return join_chunk_records(chunks)
+
+    def _source_document(self, chunks: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Blob 옆의 구조화 문서, 없으면 원본 파일을 다시 추출해 저장 (원본도 없으면 None)"""
+        blob_url = chunks[0].get("file_path")
+        file_type = (chunks[0].get("title") or "").rsplit(".", 1)[-1].lower()
+        if not blob_url or file_type not in ("docx", "pdf", "md", "txt"):
+            return None
+
+        document = self.doc_processor.load_document_structure(blob_url)
+        if document is not None:
+            return document
+
+        parsed_url = urlparse(blob_url)
+        container_name, _, blob_name = parsed_url.path.lstrip("/").partition("/")
+        blob_client = self.azure_clients.blob_client.get_blob_client(
+            container=container_name, blob=unquote(blob_name)
+        )
+        with tempfile.NamedTemporaryFile(suffix=f".{file_type}", delete=False) as f:
+            temp_path = f.name
+            blob_client.download_blob().readinto(f)
+        try:
+            document = self.doc_processor.extract_document(temp_path, file_type)
+        finally:
+            os.unlink(temp_path)
+        if not document["blocks"]:
+            return None
+        # 다음 재인덱싱부터는 원본을 다시 파싱하지 않도록 저장
+        self.doc_processor.upload_document_structure(blob_url, document)
+        return document
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="변경분 재인덱싱")
+    parser.add_argument("--workers", type=int, default=Config.INGEST_MAX_WORKERS, help="동시 처리 보고서 수")
+    parser.add_argument("--dry-run", action="store_true", help="대상 건수만 출력")
+    parser.add_argument("--rechunk", action="store_true", help="모든 보고서의 청크를 구조화 문서에서 다시 분할")
+    args = parser.parse_args()
+
+    azure_clients = get_azure_clients(Config())
+    # 새 필드(analysis_prompt_version 등)가 인덱스에 없을 수 있으므로 스키마 먼저 갱신
+    azure_clients.provision_search_index()
+    vector_store = VectorStore(azure_clients, DocumentProcessor(azure_clients))
+    reindexer = Reindexer(vector_store, max_workers=args.workers, rechunk=args.rechunk)
+
+    if not args.dry_run:
+        # title_hash 도입 전 레코드는 제목으로 찾을 수 없어 재업로드 시 중복이 남으므로 먼저 채움
+        backfilled = vector_store.backfill_title_hashes()
+        if backfilled:
+            print(f"title_hash 없는 레코드 {backfilled}건 갱신")
+
+    parent_ids = reindexer.plan()
+    print(
+        f"재인덱싱 대상 {len(parent_ids)}건 "
+        f"(분석 프롬프트 v{reindexer.prompt_version}, 임베딩 모델 {reindexer.embedding_model})"
+    )
+    if args.dry_run or not parent_ids:
+        return 0
+
+    start = time.perf_counter()
+
+    def on_progress(result, done, total):
+        changed = [
+            name
+            for name, flag in (
+                ("재분할", result["rechunked"]),
+                ("재분석", result["reanalyzed"]),
+                ("재임베딩", result["reembedded"]),
+            )
+            if flag
+        ]
+        status = ",".join(changed) if result["success"] else f"실패: {result['error']}"
+        print(f"[{done}/{total}] {result['title'] or result['parent_id']} ({status})")
+
+    results = reindexer.run(parent_ids, on_progress)
+    elapsed = time.perf_counter() - start
+    failures = [result for result in results if not result["success"]]
+    print(
+        f"\n완료: 재분할 {sum(r['rechunked'] for r in results if r['success'])}건, "
+        f"재분석 {sum(r['reanalyzed'] for r in results if r['success'])}건, "
+        f"재임베딩 {sum(r['reembedded'] for r in results if r['success'])}건, "
+        f"실패 {len(failures)}건 / {elapsed:.1f}초"
+    )
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
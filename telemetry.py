@@ -0,0 +1,152 @@
+import json
+import time
+import uuid
+import threading
+import contextvars
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional
+from config import Config
+
+
+# 현재 실행 중인 span (같은 질의/문서 처리의 하위 단계를 trace_id로 묶음)
+_CURRENT_SPAN: contextvars.ContextVar = contextvars.ContextVar(
+    "telemetry_span", default=None
+)
+
+_LOCK = threading.Lock()
+_STATS: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+_METRICS_SERVER: Optional[ThreadingHTTPServer] = None
+
+
+class Span:
+    """단계 하나의 측정 정보 (set()으로 토큰 수, 캐시 적중 여부 등 속성 추가)"""
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        parent = _CURRENT_SPAN.get()
+        self.name = name
+        self.attributes = dict(attributes)
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent = parent.name if parent else None
+        self.duration_ms = 0.0
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+def current_span() -> Span:
+    """현재 실행 중인 span (없으면 기록되지 않는 임시 span)"""
+    return _CURRENT_SPAN.get() or Span("detached", {})
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """with 블록 소요시간과 속성을 기록"""
+    current = Span(name, attributes)
+    token = _CURRENT_SPAN.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.set(error=type(e).__name__)
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - start) * 1000
+        _CURRENT_SPAN.reset(token)
+        _record(current)
+
+
+def record_span(name: str, duration_ms: float, **attributes):
+    """with 블록으로 감쌀 수 없는 단계(스트리밍 등)의 측정값 기록"""
+    current = Span(name, attributes)
+    current.duration_ms = duration_ms
+    _record(current)
+
+
+def _record(current: Span):
+    attributes = current.attributes
+    with _LOCK:
+        stats = _STATS[current.name]
+        stats["calls"] += 1
+        stats["duration_ms"] += current.duration_ms
+        if "error" in attributes:
+            stats["errors"] += 1
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if attributes.get(kind):
+                stats[kind] += attributes[kind]
+        if "cache_hit" in attributes:
+            stats["cache_hits" if attributes["cache_hit"] else "cache_misses"] += 1
+
+        if Config.METRICS_JSONL_PATH:
+            event = {
+                "ts": time.time(),
+                "trace_id": current.trace_id,
+                "span": current.name,
+                "parent": current.parent,
+                "duration_ms": round(current.duration_ms, 3),
+                **attributes,
+            }
+            try:
+                with open(Config.METRICS_JSONL_PATH, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(event, ensure_ascii=False, default=str) + "\n")
+            except OSError as e:
+                print(f"메트릭 기록 중 오류: {e}")
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    """단계별 누적 통계 (호출 수, 소요시간 합계, 토큰 수, 캐시 적중/미적중)"""
+    with _LOCK:
+        return {name: dict(stats) for name, stats in _STATS.items()}
+
+
+def render_prometheus() -> str:
+    """누적 통계를 Prometheus text 형식으로 변환"""
+    metrics = [
+        ("rag_stage_calls_total", "calls", "단계 호출 수"),
+        ("rag_stage_errors_total", "errors", "단계 오류 수"),
+        ("rag_stage_duration_ms_total", "duration_ms", "단계 누적 소요시간(ms)"),
+        ("rag_stage_prompt_tokens_total", "prompt_tokens", "프롬프트 토큰 수"),
+        ("rag_stage_completion_tokens_total", "completion_tokens", "생성 토큰 수"),
+        ("rag_stage_cache_hits_total", "cache_hits", "캐시 적중 수"),
+        ("rag_stage_cache_misses_total", "cache_misses", "캐시 미적중 수"),
+    ]
+    stats = snapshot()
+    lines = []
+    for metric, key, help_text in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for name, values in sorted(stats.items()):
+            if key in values:
+                lines.append(f'{metric}{{stage="{name}"}} {values[key]:g}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port: int):
+    """/metrics 엔드포인트를 백그라운드 스레드로 1회 기동"""
+    global _METRICS_SERVER
+    with _LOCK:
+        if _METRICS_SERVER is not None or not port:
+            return
+        try:
+            _METRICS_SERVER = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+        except OSError as e:
+            print(f"메트릭 서버 기동 중 오류: {e}")
+            return
+    threading.Thread(target=_METRICS_SERVER.serve_forever, daemon=True).start()
@@ -0,0 +1,40 @@
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chunker import chunk_sections, join_chunks
+
+
+def test_join_keeps_identical_boundary_lines_without_overlap():
+    # 앞 섹션 끝 줄과 다음 섹션 첫 줄이 같지만 겹침이 아닌 경우에도 두 줄 모두 유지
+    sections = [
+        {"heading": "A", "text": "first section body\nSAME"},
+        {"heading": "B", "text": "SAME\nsecond section body"},
+    ]
+    chunks = chunk_sections(sections, max_tokens=8, overlap_tokens=4)
+
+    assert len(chunks) == 2
+    assert join_chunks(chunks) == "first section body\nSAME\nSAME\nsecond section body"
+
+
+def test_join_removes_overlap_exactly():
+    text = "\n".join(f"paragraph {index}" + " word" * 6 for index in range(12))
+    chunks = chunk_sections([{"heading": "", "text": text}], max_tokens=40, overlap_tokens=15)
+
+    assert len(chunks) > 2
+    assert any(
+        chunk["offset"] < previous["offset"] + len(previous["text"])
+        for previous, chunk in zip(chunks, chunks[1:])
+    )
+    assert join_chunks(chunks) == text
+
+
+def test_join_does_not_add_newlines_inside_split_paragraphs():
+    text = "가나다라마바사아자차카타파하" * 30 + "\n\n다음 문단"
+    chunks = chunk_sections([{"heading": "", "text": text}], max_tokens=20, overlap_tokens=0)
+
+    assert len(chunks) > 2
+    for chunk in chunks:
+        assert chunk["text"] == text[chunk["offset"] : chunk["offset"] + len(chunk["text"])]
+    assert join_chunks(chunks) == text
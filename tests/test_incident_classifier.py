@@ -0,0 +1,40 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import incident_classifier
+from incident_classifier import DEFAULT_KEYWORDS, DEFAULT_LABEL, IncidentClassifier
+
+
+@pytest.fixture(params=["automaton", "regex"])
+def classifier(request, monkeypatch):
+    if request.param == "automaton":
+        if incident_classifier.ahocorasick is None:
+            pytest.skip("pyahocorasick 미설치")
+    else:
+        monkeypatch.setattr(incident_classifier, "ahocorasick", None)
+    return IncidentClassifier(DEFAULT_KEYWORDS)
+
+
+@pytest.mark.parametrize(
+    "text, label",
+    [
+        ("web servers were down", "시스템 장애"),
+        ("networking outage", "네트워크 장애"),
+        ("MySQL databases replication lag", "데이터베이스 장애"),
+        ("mobile apps crashed", "애플리케이션 장애"),
+        ("DBs failing", "데이터베이스 장애"),
+        ("application error", "애플리케이션 장애"),
+        ("서버가 응답하지 않음", "시스템 장애"),
+    ],
+)
+def test_inflected_keywords(classifier, text, label):
+    assert classifier.primary_label(text) == label
+
+
+def test_keyword_inside_longer_word_does_not_match(classifier):
+    # "db"가 단어 중간("feedback")에서 일치하면 안 됨
+    assert classifier.primary_label("customer feedback form") == DEFAULT_LABEL
@@ -0,0 +1,53 @@
+from typing import Tuple
+
+try:
+    import tiktoken
+
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    # tiktoken이 없으면 근사치 사용
+    _ENCODING = None
+
+
+def count_tokens(text: str) -> int:
+    """텍스트 토큰 수 계산 (tiktoken 미설치 시 ASCII 4자당 1토큰, 그 외 1자당 1토큰으로 근사)"""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """최대 토큰 수에 맞게 텍스트 뒷부분 자르기"""
+    return split_at_tokens(text, max_tokens)[0]
+
+
+def split_at_tokens(text: str, max_tokens: int) -> Tuple[str, str]:
+    """텍스트를 최대 토큰 수 이내의 앞부분과 나머지로 분리 (head + tail == text)
+
+    토큰 경계가 한글 등 멀티바이트 문자 중간에 걸리면 그 토큰을 빼고 문자 경계에서 자른다
+    (잘린 바이트가 U+FFFD로 디코딩되어 앞부분에 섞이고 뒷부분에서 글자가 사라지는 것 방지).
+    """
+    if max_tokens <= 0:
+        return "", text
+    if count_tokens(text) <= max_tokens:
+        return text, ""
+    if _ENCODING is not None:
+        tokens = _ENCODING.encode(text, disallowed_special=())
+        for cut in range(max_tokens, 0, -1):
+            head = _ENCODING.decode(tokens[:cut])
+            if text.startswith(head):
+                return head, text[len(head):]
+        return "", text
+
+    # 근사치 기준 이진 탐색으로 자를 위치 결정
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low], text[low:]
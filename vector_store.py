@@ -1,12 +1,167 @@
 import os
+import asyncio
 import base64
+import hashlib
 from datetime import datetime, timezone, timedelta
 import uuid
-from typing import List, Dict, Any
-from azure_client import AzureClients
-from document_processor import DocumentProcessor
+from typing import List, Dict, Any, Optional, Callable
+from azure_client import AzureClients, iter_index_documents
+from document_processor import DocumentProcessor, ANALYSIS_PROMPT_VERSION, embedding_signature
+from cache import LRUCache
+from chunker import chunk_sections, join_chunks
+from telemetry import span, current_span
+from config import Config
 from urllib.parse import urlparse, quote, unquote
-from azure.storage.blob import generate_blob_sas, BlobSasPermissions
+from azure.storage.blob import (
+    generate_blob_sas,
+    generate_container_sas,
+    BlobSasPermissions,
+    ContainerSasPermissions,
+)
+
+
+# 검색 결과 필드 구성 (chat: 답변 컨텍스트용, full: 문서 전체 보기용)
+SELECT_PROFILES = {
+    "chat": [
+        "id",
+        "parent_id",
+        "chunk_index",
+        "title",
+        "incident_type",
+        "summary",
+        "root_cause",
+        "emergency_actions",
+        "file_path",
+        "upload_date",
+        "tags",
+    ],
+}
+SELECT_PROFILES["full"] = SELECT_PROFILES["chat"] + ["content", "chunk_offset"]
+
+# 전체 보기 시 한 보고서에서 가져올 최대 청크 수 (검색 기본 top=50 보다 크게)
+_MAX_CHUNKS_PER_DOCUMENT = 1000
+
+# 인덱스 업로드 1회 요청당 최대 레코드 수 (요청 크기 제한 대응)
+_MAX_RECORDS_PER_REQUEST = 200
+
+# 정규화된 질의 -> 임베딩 (Streamlit 세션 간 공유)
+_QUERY_EMBEDDING_CACHE = LRUCache(
+    Config.QUERY_EMBEDDING_CACHE_SIZE, Config.QUERY_EMBEDDING_CACHE_TTL
+)
+
+# (account, container[, blob]) -> SAS 토큰 (만료 전 갱신 여유를 남기고 재사용)
+_SAS_CACHE = LRUCache(
+    Config.SAS_CACHE_SIZE,
+    max(0, Config.SAS_EXPIRY_SECONDS - Config.SAS_REFRESH_MARGIN_SECONDS),
+)
+
+
+# 문서 삭제/재인덱싱 시 호출되는 콜백 (답변 캐시 무효화 등)
+_INVALIDATION_LISTENERS: List[Callable[[List[str]], None]] = []
+
+
+def add_invalidation_listener(listener: Callable[[List[str]], None]):
+    """문서 id 목록이 삭제/재인덱싱될 때 호출할 콜백 등록"""
+    if listener not in _INVALIDATION_LISTENERS:
+        _INVALIDATION_LISTENERS.append(listener)
+
+
+def _notify_invalidated(doc_ids: List[str]):
+    for listener in _INVALIDATION_LISTENERS:
+        try:
+            listener(doc_ids)
+        except Exception as e:
+            print(f"캐시 무효화 중 오류: {e}")
+
+
+def hash_text(text: str) -> str:
+    """중복 판별용 SHA-256 해시"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# 검색 필터 선택지로 보여줄 필드 (건수는 보고서 단위)
+FACET_FIELDS = ["incident_type", "tags"]
+
+KST = timezone(timedelta(hours=9))
+
+
+def _odata_string(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _odata_datetime(value: Any) -> str:
+    """date/datetime/ISO 문자열을 OData DateTimeOffset 리터럴(UTC)로 변환 (날짜만 있으면 KST 자정)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=KST)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def build_search_filter(filters: Optional[Dict[str, Any]]) -> Optional[str]:
+    """검색 조건을 OData filter 식으로 변환 (조건이 없으면 None)
+
+    filters 키:
+      - incident_types: 장애 유형 목록 (하나라도 일치)
+      - tags: 시스템/서비스 태그 목록 (하나라도 일치)
+      - date_from, date_to: 등록일 범위 (date/datetime/ISO 문자열, date_to의 날짜는 그날 끝까지 포함)
+    """
+    if not filters:
+        return None
+    clauses = []
+    incident_types = [value for value in filters.get("incident_types") or [] if value]
+    if incident_types:
+        clauses.append(
+            "search.in(incident_type, "
+            f"{_odata_string('|'.join(incident_types))}, '|')"
+        )
+    tags = [value for value in filters.get("tags") or [] if value]
+    if tags:
+        clauses.append(f"tags/any(t: search.in(t, {_odata_string('|'.join(tags))}, '|'))")
+    if filters.get("date_from"):
+        clauses.append(f"upload_date ge {_odata_datetime(filters['date_from'])}")
+    date_to = filters.get("date_to")
+    if date_to:
+        if isinstance(date_to, str):
+            date_only = "T" not in date_to
+            date_to = datetime.fromisoformat(date_to)
+        else:
+            date_only = not isinstance(date_to, datetime)
+        if date_only:
+            # 날짜만 주어지면 그날 끝까지 (다음 날 자정 전)
+            next_day = datetime(date_to.year, date_to.month, date_to.day) + timedelta(days=1)
+            clauses.append(f"upload_date lt {_odata_datetime(next_day)}")
+        else:
+            clauses.append(f"upload_date le {_odata_datetime(date_to)}")
+    return " and ".join(clauses) or None
+
+
+def join_chunk_records(chunks: List[Dict[str, Any]]) -> str:
+    """청크 레코드(chunk_index 순) 본문을 원문으로 복원
+
+    chunk_offset으로 앞 청크와 겹친 부분을 정확히 한 번만 포함한다.
+    chunk_offset 도입 전 레코드는 겹침 구간을 알 수 없으므로 줄바꿈으로만 연결한다 (reindex.py로 재분할 가능).
+    """
+    if all(chunk.get("chunk_offset") is not None for chunk in chunks):
+        return join_chunks(
+            [
+                {"offset": chunk["chunk_offset"], "text": chunk.get("content") or ""}
+                for chunk in chunks
+            ]
+        )
+    return "\n".join(chunk.get("content") or "" for chunk in chunks)
+
+
+def normalize_tags(tags: Optional[List[str]]) -> List[str]:
+    """태그 목록 정리 (공백 제거, 빈 값/중복 제외, 순서 유지)"""
+    return list(dict.fromkeys(tag.strip() for tag in tags or [] if tag and tag.strip()))
+
+
+def normalize_query(query: str) -> str:
+    """질의 캐시 키용 정규화 (공백 정리, 소문자화)"""
+    return " ".join(query.split()).lower()
 
 
 class VectorStore:
@@ -15,83 +170,307 @@ class VectorStore:
         self.doc_processor = doc_processor
         self.search_client = azure_clients.search_client
 
+    def find_ids_by_title(self, title: str) -> List[str]:
+        """title 해시 필터로 기존 문서 id 조회
+
+        다른 프로세스(일괄 수집, 재인덱싱, 다른 API 워커)도 인덱스를 바꾸므로 캐시하지 않고
+        매번 인덱스에 조회한다. title_hash가 없는 이전 레코드는 backfill_title_hashes()로 채운다.
+        """
+        results = self.search_client.search(
+            search_text="*",
+            filter=f"title_hash eq '{hash_text(title)}'",
+            select=["id"],
+        )
+        return [doc["id"] for doc in results]
+
+    def delete_documents_by_title(self, title: str) -> int:
+        """동일 title 문서 삭제 후 삭제 건수 반환"""
+        ids_to_delete = self.find_ids_by_title(title)
+        if ids_to_delete:
+            self.search_client.delete_documents([{"id": id_} for id_ in ids_to_delete])
+            _notify_invalidated(ids_to_delete)
+            print(f"기존 '{title}' 문서 {len(ids_to_delete)}건 삭제")
+        return len(ids_to_delete)
+
+    def is_indexed(self, title: str, content: str) -> bool:
+        """같은 title/본문 해시의 문서가 이미 인덱스에 있는지 확인"""
+        results = self.search_client.search(
+            search_text="*",
+            filter=(
+                f"title_hash eq '{hash_text(title)}' "
+                f"and content_hash eq '{hash_text(content)}'"
+            ),
+            select=["id"],
+            top=1,
+        )
+        return any(True for _ in results)
+
+    def backfill_title_hashes(self, batch_size: int = 1000) -> int:
+        """title_hash가 없는 이전 레코드에 title 해시를 채움 (1회성), 갱신 건수 반환
+
+        채우지 않으면 같은 제목을 다시 올려도 이전 레코드를 찾지 못해 중복이 남는다.
+        갱신한 레코드는 필터에서 빠지므로 건너뛰기(skip) 없이 남은 것이 없을 때까지 반복한다.
+        """
+        updated = 0
+        while True:
+            results = self.search_client.search(
+                search_text="*",
+                filter="title_hash eq null",
+                select=["id", "title"],
+                top=batch_size,
+            )
+            records = [
+                {"id": doc["id"], "title_hash": hash_text(doc.get("title") or "")}
+                for doc in results
+            ]
+            if not records:
+                return updated
+            succeeded_ids = self.merge_records(records)
+            updated += len(succeeded_ids)
+            if len(succeeded_ids) < len(records):
+                print(f"title_hash 갱신 실패 {len(records) - len(succeeded_ids)}건")
+                return updated
+
+    def _invalidate_uploaded(self, documents: List[Dict[str, Any]]):
+        """업로드된 문서 id의 캐시된 답변 무효화"""
+        _notify_invalidated([document["id"] for document in documents])
+
     def add_document(self, file_path: str, title: str, file_type: str) -> bool:
         """문서를 벡터 스토어에 추가 (동일 title 존재 시 기존 데이터 삭제 후 추가)"""
-        try:
-            # 기존 동일 title 문서 삭제
-            existing_docs = self.search_client.search(
-                search_text="*", select=["id", "title"]
-            )
+        records = self.prepare_document(file_path, title, file_type)
+        if records is None:
+            return False
+        return bool(self.upload_batch(records))
 
-            ids_to_delete = [
-                doc["id"] for doc in existing_docs if doc["title"] == title
-            ]
-            if ids_to_delete:
-                self.search_client.delete_documents(
-                    [{"id": id_} for id_ in ids_to_delete]
-                )
-                print(f"기존 '{title}' 문서 {len(ids_to_delete)}건 삭제")
+    def add_analyzed_document(
+        self,
+        title: str,
+        content: str,
+        analysis: Dict[str, str],
+        file_path: Optional[str] = None,
+        sections: Optional[List[Dict[str, str]]] = None,
+    ) -> bool:
+        """이미 추출/분석된 문서를 벡터 스토어에 추가 (재추출/재분석 없음)"""
+        records = self.prepare_analyzed_document(
+            title, content, analysis, file_path, sections
+        )
+        if records is None:
+            return False
+        return bool(self.upload_batch(records))
 
-            # 텍스트 추출
-            content = self.doc_processor.extract_text_from_file(file_path, file_type)
+    def prepare_document(
+        self,
+        file_path: str,
+        title: str,
+        file_type: str,
+        skip_if_unchanged: bool = False,
+        blob_url: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """텍스트 추출, 분석, 임베딩, Blob 업로드를 거쳐 청크 단위 인덱스 레코드 생성
+
+        skip_if_unchanged=True면 같은 title/본문이 이미 인덱싱된 경우 분석 없이 빈 목록 반환.
+        blob_url이 있으면 (이미 Blob에 있는 파일) 업로드하지 않고 그 URL을 사용한다.
+        tags는 검색 필터용 시스템/서비스 태그.
+        """
+        with span("ingest_document", title=title, file_type=file_type):
+            return self._prepare_document(
+                file_path, title, file_type, skip_if_unchanged, blob_url, tags
+            )
+
+    def _prepare_document(
+        self,
+        file_path: str,
+        title: str,
+        file_type: str,
+        skip_if_unchanged: bool,
+        blob_url: Optional[str],
+        tags: Optional[List[str]],
+    ) -> Optional[List[Dict[str, Any]]]:
+        try:
+            # 구조화 문서 추출 (제목/문단/표/페이지)
+            document = self.doc_processor.extract_document(file_path, file_type)
+            sections = self.doc_processor.document_sections(document)
+            content = "\n".join(section["text"] for section in sections)
             if not content:
-                return False
+                return None
+
+            if skip_if_unchanged and self.is_indexed(title, content):
+                current_span().set(unchanged=True)
+                return []
 
             # 문서 분석
             analysis = self.doc_processor.analyze_incident_report(content)
 
-            # 전체 텍스트에 대한 임베딩 생성
-            full_text = f"{title}\n{content}\n{analysis['document_summary']}"
-            embedding = self.doc_processor.generate_embedding(full_text)
+        except Exception as e:
+            print(f"문서 준비 중 오류: {e}")
+            return None
 
-            if not embedding:
-                return False
+        return self.prepare_analyzed_document(
+            title, content, analysis, file_path, sections, blob_url, document, tags
+        )
 
-            # Blob Storage에 업로드
-            blob_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{title}"
-            blob_url = self.doc_processor.upload_to_blob_storage(file_path, blob_name)
+    def prepare_analyzed_document(
+        self,
+        title: str,
+        content: str,
+        analysis: Dict[str, str],
+        file_path: Optional[str] = None,
+        sections: Optional[List[Dict[str, str]]] = None,
+        blob_url: Optional[str] = None,
+        document: Optional[Dict[str, Any]] = None,
+        tags: Optional[List[str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """추출된 본문과 분석 결과로 청크별 임베딩/Blob 업로드 후 인덱스 레코드 생성
 
-            KST = timezone(timedelta(hours=9))
-            # 검색 인덱스에 문서 추가
-            document = {
-                "id": str(uuid.uuid4()),
+        모든 청크 레코드는 같은 parent_id(원본 보고서 id)와 보고서 단위 메타데이터를 가진다.
+        sections가 없으면 document(구조화 문서)에서, 둘 다 없으면 본문 전체를 하나의 섹션으로 보고 분할한다.
+        document가 있으면 원본 Blob 옆에 함께 저장해 재인덱싱 시 재파싱 없이 사용한다.
+        """
+        with span("prepare_records", title=title) as current:
+            records = self._prepare_analyzed_document(
+                title, content, analysis, file_path, sections, blob_url, document, tags
+            )
+            current.set(chunks=len(records) if records else 0)
+            return records
+
+    def _prepare_analyzed_document(
+        self,
+        title: str,
+        content: str,
+        analysis: Dict[str, str],
+        file_path: Optional[str] = None,
+        sections: Optional[List[Dict[str, str]]] = None,
+        blob_url: Optional[str] = None,
+        document: Optional[Dict[str, Any]] = None,
+        tags: Optional[List[str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        try:
+            if not content:
+                return None
+
+            if sections is None and document is not None:
+                sections = self.doc_processor.document_sections(document)
+
+            config = self.azure_clients.config
+            chunks = chunk_sections(
+                sections or [{"heading": "", "text": content}],
+                config.CHUNK_MAX_TOKENS,
+                config.CHUNK_OVERLAP_TOKENS,
+            )
+            if not chunks:
+                return None
+
+            # 청크별 임베딩을 묶음 요청으로 생성
+            embeddings = self.doc_processor.generate_embeddings(
+                [f"{title}\n{chunk['heading']}\n{chunk['text']}" for chunk in chunks]
+            )
+            if not all(embeddings):
+                return None
+
+            # Blob Storage에 업로드 (이미 Blob에 있는 파일은 그대로 사용)
+            blob_url = blob_url or ""
+            if file_path and not blob_url:
+                blob_name = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{title}"
+                blob_url = self.doc_processor.upload_to_blob_storage(
+                    file_path, blob_name
+                )
+            if blob_url and document and document["blocks"]:
+                self.doc_processor.upload_document_structure(blob_url, document)
+
+            parent_id = str(uuid.uuid4())
+            report_fields = {
                 "title": title,
-                "content": content,
                 "summary": analysis["document_summary"],
                 "incident_type": self._extract_incident_type(content),
                 "root_cause": analysis["incident_symptoms_and_causes"],
                 "emergency_actions": analysis["emergency_actions"],
-                "content_vector": embedding,
                 "file_path": blob_url,
                 "upload_date": datetime.now(KST).isoformat(),
+                "tags": normalize_tags(tags),
+                "title_hash": hash_text(title),
+                "content_hash": hash_text(content),
+                "parent_id": parent_id,
+                # 재인덱싱 판단용 (분석 프롬프트/임베딩 모델이 바뀐 레코드만 다시 계산)
+                "analysis_prompt_version": ANALYSIS_PROMPT_VERSION,
+                "embedding_model": embedding_signature(config),
             }
+            return [
+                {
+                    "id": f"{parent_id}_{index}",
+                    "content": chunk["text"],
+                    "chunk_heading": chunk["heading"],
+                    "content_vector": embedding,
+                    "chunk_index": index,
+                    "chunk_offset": chunk["offset"],
+                    **report_fields,
+                }
+                for index, (chunk, embedding) in enumerate(zip(chunks, embeddings))
+            ]
 
-            self.search_client.upload_documents([document])
-            return True
+        except Exception as e:
+            print(f"문서 준비 중 오류: {e}")
+            return None
+
+    def upload_batch(self, records: List[Dict[str, Any]]) -> List[str]:
+        """준비된 청크 레코드들을 묶음 요청으로 인덱싱 (동일 title 기존 문서는 삭제), 성공한 title 목록 반환"""
+        if not records:
+            return []
+        try:
+            # 배치 내 동일 title은 마지막 보고서의 레코드만 유지
+            latest_parent = {record["title"]: record["parent_id"] for record in records}
+            records = [
+                record
+                for record in records
+                if latest_parent[record["title"]] == record["parent_id"]
+            ]
+
+            for title in latest_parent:
+                self.delete_documents_by_title(title)
+
+            succeeded_ids = set()
+            for start in range(0, len(records), _MAX_RECORDS_PER_REQUEST):
+                batch = records[start : start + _MAX_RECORDS_PER_REQUEST]
+                with span("index_upload", records=len(batch)):
+                    results = self.search_client.upload_documents(batch)
+                succeeded_ids.update(
+                    result.key for result in results if result.succeeded
+                )
+
+            uploaded = [record for record in records if record["id"] in succeeded_ids]
+            self._invalidate_uploaded(uploaded)
+
+            # 보고서의 모든 청크가 성공한 경우만 성공으로 집계
+            failed_titles = {
+                record["title"] for record in records if record["id"] not in succeeded_ids
+            }
+            return [title for title in latest_parent if title not in failed_titles]
 
         except Exception as e:
             print(f"문서 추가 중 오류: {e}")
-            return False
+            return []
 
     def _extract_incident_type(self, content: str) -> str:
         """장애 유형 추출"""
-        content_lower = content.lower()
-
-        if any(word in content_lower for word in ["네트워크", "network", "통신"]):
-            return "네트워크 장애"
-        elif any(word in content_lower for word in ["데이터베이스", "database", "db"]):
-            return "데이터베이스 장애"
-        elif any(word in content_lower for word in ["서버", "server", "시스템"]):
-            return "시스템 장애"
-        elif any(word in content_lower for word in ["방화벽", "firewall", "보안"]):
-            return "보안 장애"
-        elif any(word in content_lower for word in ["앱", "app", "애플리케이션"]):
-            return "애플리케이션 장애"
-        else:
-            return "기타"
+        return self.doc_processor.extract_incident_type(content)
 
     def _generate_sas_url(self, blob_url: str) -> str:
         """Generate SAS URL for blob access"""
+        return self._generate_sas_urls([blob_url])[0]
+
+    def _generate_sas_urls(self, blob_urls: List[str]) -> List[str]:
+        """검색 결과 전체의 SAS URL을 한 번에 생성 (캐시된 토큰 재사용)"""
+        with span("sas", count=len(blob_urls)) as current:
+            signed, hits = [], 0
+            for blob_url in blob_urls:
+                url, cache_hit = self._sign_blob_url(blob_url)
+                signed.append(url)
+                hits += cache_hit
+            current.set(cache_hit=hits == len(blob_urls), cache_hits=hits)
+            return signed
+
+    def _sign_blob_url(self, blob_url: str) -> tuple:
+        """(SAS URL, 캐시 적중 여부) 반환 (실패 시 원본 URL)"""
         try:
             # blob_url에서 container와 blob_name 추출
             parsed_url = urlparse(blob_url)
@@ -103,82 +482,348 @@ class VectorStore:
             blob_name = unquote("/".join(path_parts[1:]))
             account_name = parsed_url.hostname.split(".")[0]
 
-            # 디버깅을 위한 로그
-            print(f"Container: {container_name}")
-            print(f"Blob name: {blob_name}")
-            print(f"Account: {account_name}")
-
-            # SAS 토큰 생성 (1시간 유효)
-            sas_token = generate_blob_sas(
-                account_name=account_name,
-                container_name=container_name,
-                blob_name=blob_name,
-                account_key=self.azure_clients.config.AZURE_STORAGE_KEY,
-                permission=BlobSasPermissions(read=True),
-                expiry=datetime.utcnow() + timedelta(hours=1),
-            )
+            config = self.azure_clients.config
+            container_mode = config.SAS_MODE == "container"
+            if container_mode:
+                key = (account_name, container_name)
+            else:
+                key = (account_name, container_name, blob_name)
+
+            sas_token = _SAS_CACHE.get(key)
+            cache_hit = sas_token is not None
+            if not cache_hit:
+                expiry = datetime.utcnow() + timedelta(seconds=config.SAS_EXPIRY_SECONDS)
+                if container_mode:
+                    sas_token = generate_container_sas(
+                        account_name=account_name,
+                        container_name=container_name,
+                        account_key=config.AZURE_STORAGE_KEY,
+                        permission=ContainerSasPermissions(read=True),
+                        expiry=expiry,
+                    )
+                else:
+                    sas_token = generate_blob_sas(
+                        account_name=account_name,
+                        container_name=container_name,
+                        blob_name=blob_name,
+                        account_key=config.AZURE_STORAGE_KEY,
+                        permission=BlobSasPermissions(read=True),
+                        expiry=expiry,
+                    )
+                _SAS_CACHE.set(key, sas_token)
 
             # URL 생성 - blob_name은 이미 디코딩되어 있으므로 다시 인코딩
             encoded_blob_name = quote(blob_name, safe="")
             base_url = f"https://{account_name}.blob.core.windows.net/{container_name}/{encoded_blob_name}"
-            return f"{base_url}?{sas_token}"
+            return f"{base_url}?{sas_token}", cache_hit
 
         except Exception as e:
             print(f"SAS URL 생성 중 오류: {e}")
             print(f"Original URL: {blob_url}")
-            return blob_url
+            return blob_url, False
+
+    def embed_query(self, query: str) -> List[float]:
+        """질의 임베딩 생성 (정규화된 질의 기준 LRU 캐시 재사용)"""
+        key = (
+            embedding_signature(self.azure_clients.config),
+            normalize_query(query),
+        )
+        with span("query_embedding") as current:
+            embedding = _QUERY_EMBEDDING_CACHE.get(key)
+            current.set(cache_hit=embedding is not None)
+            if embedding is None:
+                embedding = self.doc_processor.generate_embedding(normalize_query(query))
+                if embedding:
+                    _QUERY_EMBEDDING_CACHE.set(key, embedding)
+            return embedding
+
+    async def embed_query_async(self, query: str) -> List[float]:
+        """embed_query의 비동기 버전 (같은 LRU 캐시 사용)"""
+        key = (
+            embedding_signature(self.azure_clients.config),
+            normalize_query(query),
+        )
+        with span("query_embedding") as current:
+            embedding = _QUERY_EMBEDDING_CACHE.get(key)
+            current.set(cache_hit=embedding is not None)
+            if embedding is None:
+                embedding = await self.doc_processor.generate_embedding_async(
+                    normalize_query(query)
+                )
+                if embedding:
+                    _QUERY_EMBEDDING_CACHE.set(key, embedding)
+            return embedding
 
     def search_similar_documents(
-        self, query: str, top_k: int = 5
+        self,
+        query: str,
+        top_k: int = 5,
+        profile: str = "chat",
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """유사한 문서 검색 (청크 단위로 검색 후 원본 보고서 단위로 묶어 상위 top_k 반환)
+
+        profile은 SELECT_PROFILES의 키로, 기본 "chat"은 본문(content)을 가져오지 않는다.
+        본문이 필요하면 get_full_document(parent_id)로 따로 조회한다.
+        filters(build_search_filter 참고)가 있으면 조건에 맞는 보고서 안에서만 검색한다.
+        """
+        filter_expression = build_search_filter(filters)
+        with span(
+            "search", top_k=top_k, profile=profile, filtered=filter_expression is not None
+        ) as current:
+            results = self._search_similar_documents(query, top_k, profile, filter_expression)
+            current.set(results=len(results))
+            return results
+
+    def _search_similar_documents(
+        self, query: str, top_k: int, profile: str, filter_expression: Optional[str]
     ) -> List[Dict[str, Any]]:
-        """유사한 문서 검색"""
         try:
             # 쿼리 임베딩 생성
-            query_embedding = self.doc_processor.generate_embedding(query)
+            query_embedding = self.embed_query(query)
             if not query_embedding:
                 return []
 
-            # 벡터 검색 수행
-            results = self.search_client.search(
-                search_text=query,
-                vector_queries=[
-                    {
-                        "vector": query_embedding,
-                        "k_nearest_neighbors": top_k,
-                        "fields": "content_vector",
-                        "kind": "vector",
-                    }
-                ],
-                select=[
-                    "id",
-                    "title",
-                    "incident_type",
-                    "content",
-                    "summary",
-                    "root_cause",
-                    "emergency_actions",
-                    "file_path",
-                    "upload_date",
-                ],
-                top=top_k,
-            )
-
-            # 검색 결과를 리스트로 변환하고 SAS URL 생성
-            search_results = []
-            for result in results:
-                result_dict = dict(result)
-                if result_dict.get("file_path"):
-                    result_dict["file_path"] = self._generate_sas_url(
-                        result_dict["file_path"]
+            # 벡터 검색 수행 (응답은 순회 시점에 받으므로 목록으로 변환하며 측정)
+            with span("search_request"):
+                results = list(
+                    self.search_client.search(
+                        **self._search_request(
+                            query, query_embedding, top_k, profile, filter_expression
+                        )
                     )
-                search_results.append(result_dict)
+                )
 
+            search_results = self._collapse_results(results, top_k)
+            self._sign_results(search_results)
             return search_results
 
         except Exception as e:
             print(f"검색 중 오류: {e}")
+            current_span().set(error=type(e).__name__)
             return []
 
+    async def search_similar_documents_async(
+        self,
+        query: str,
+        top_k: int = 5,
+        profile: str = "chat",
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """search_similar_documents의 비동기 버전 (SAS 서명은 스레드에서 수행)"""
+        filter_expression = build_search_filter(filters)
+        with span(
+            "search", top_k=top_k, profile=profile, filtered=filter_expression is not None
+        ) as current:
+            try:
+                query_embedding = await self.embed_query_async(query)
+                if not query_embedding:
+                    return []
+
+                with span("search_request"):
+                    response = await self.azure_clients.async_search_client.search(
+                        **self._search_request(
+                            query, query_embedding, top_k, profile, filter_expression
+                        )
+                    )
+                    results = [result async for result in response]
+
+                search_results = self._collapse_results(results, top_k)
+                await asyncio.to_thread(self._sign_results, search_results)
+                current.set(results=len(search_results))
+                return search_results
+
+            except Exception as e:
+                print(f"검색 중 오류: {e}")
+                current.set(error=type(e).__name__)
+                return []
+
+    def _search_request(
+        self,
+        query: str,
+        query_embedding: List[float],
+        top_k: int,
+        profile: str,
+        filter_expression: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """하이브리드 검색 요청 파라미터 (동기/비동기 경로 공용)"""
+        # 같은 보고서의 청크가 여러 개 잡힐 수 있으므로 넉넉히 가져온 뒤 묶음
+        candidates = top_k * max(1, self.azure_clients.config.CHUNK_SEARCH_OVERSAMPLE)
+        request = {
+            "search_text": query,
+            "vector_queries": [
+                {
+                    "vector": query_embedding,
+                    "k_nearest_neighbors": candidates,
+                    "fields": "content_vector",
+                    "kind": "vector",
+                }
+            ],
+            "select": SELECT_PROFILES[profile],
+            "top": candidates,
+        }
+        if filter_expression:
+            # 필터를 먼저 적용한 뒤 최근접 이웃을 찾아 k개를 조건에 맞는 청크로만 채움
+            request["filter"] = filter_expression
+            request["vector_filter_mode"] = "preFilter"
+        return request
+
+    def _collapse_results(self, results, top_k: int) -> List[Dict[str, Any]]:
+        """청크 검색 결과를 보고서 단위로 묶어 상위 top_k 반환 (최고 점수 청크 유지)"""
+        search_results = []
+        seen_parents = set()
+        for result in results:
+            result_dict = dict(result)
+            # 청크 도입 전 레코드는 자기 자신을 원본으로 취급
+            parent_id = result_dict.get("parent_id") or result_dict["id"]
+            if parent_id in seen_parents:
+                continue
+            seen_parents.add(parent_id)
+            result_dict["parent_id"] = parent_id
+            search_results.append(result_dict)
+            if len(search_results) >= top_k:
+                break
+        return search_results
+
+    def _sign_results(self, search_results: List[Dict[str, Any]]):
+        """검색 결과의 file_path를 SAS URL로 일괄 교체"""
+        linked = [doc for doc in search_results if doc.get("file_path")]
+        signed_urls = self._generate_sas_urls([doc["file_path"] for doc in linked])
+        for doc, signed_url in zip(linked, signed_urls):
+            doc["file_path"] = signed_url
+
+    def get_facets(
+        self, filters: Optional[Dict[str, Any]] = None, count: int = 50
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """검색 필터 선택지 (FACET_FIELDS별 값과 보고서 건수, 건수 내림차순)"""
+        # 보고서마다 첫 청크(청크 도입 전 레코드 포함)만 세어 청크 수가 아닌 보고서 수로 집계
+        expression = "(chunk_index eq 0 or chunk_index eq null)"
+        filter_expression = build_search_filter(filters)
+        if filter_expression:
+            expression += f" and {filter_expression}"
+        with span("facets"):
+            results = self.search_client.search(
+                search_text="*",
+                filter=expression,
+                facets=[f"{field},count:{count}" for field in FACET_FIELDS],
+                top=0,
+            )
+            facets = results.get_facets() or {}
+        return {
+            field: [
+                {"value": facet["value"], "count": facet["count"]}
+                for facet in facets.get(field, [])
+            ]
+            for field in FACET_FIELDS
+        }
+
+    def get_chunks(
+        self, parent_id: str, fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """보고서의 청크 레코드 목록 (chunk_index 순, 없으면 KeyError 등 조회 예외 발생)"""
+        fields = fields or SELECT_PROFILES["full"]
+        escaped_id = parent_id.replace("'", "''")
+        chunks = list(
+            self.search_client.search(
+                search_text="*",
+                filter=f"parent_id eq '{escaped_id}'",
+                select=fields,
+                top=_MAX_CHUNKS_PER_DOCUMENT,
+            )
+        )
+        if not chunks:
+            # 청크 도입 전 레코드는 id 자체가 보고서 id
+            chunks = [self.search_client.get_document(key=parent_id, selected_fields=fields)]
+
+        chunks = [dict(chunk) for chunk in chunks]
+        chunks.sort(key=lambda chunk: chunk.get("chunk_index") or 0)
+        return chunks
+
+    def get_full_document(self, parent_id: str) -> Optional[Dict[str, Any]]:
+        """보고서 전체 보기용 조회 (청크 본문을 순서대로 이어 붙여 content 구성)"""
+        with span("get_full_document"):
+            try:
+                chunks = self.get_chunks(parent_id)
+                document = dict(chunks[0])
+                document["content"] = self._full_content(document, chunks)
+                if document.get("file_path"):
+                    document["file_path"] = self._generate_sas_url(
+                        document["file_path"]
+                    )
+                return document
+
+            except Exception as e:
+                print(f"문서 조회 중 오류: {e}")
+                current_span().set(error=type(e).__name__)
+                return None
+
+    def _full_content(
+        self, document: Dict[str, Any], chunks: List[Dict[str, Any]]
+    ) -> str:
+        """보고서 전체 본문 (구조화 문서가 있으면 그 섹션으로, 없으면 청크의 겹친 부분을 빼고 연결)"""
+        if document.get("file_path"):
+            structure = self.doc_processor.load_document_structure(document["file_path"])
+            if structure is not None:
+                return "\n".join(
+                    section["text"]
+                    for section in self.doc_processor.document_sections(structure)
+                )
+        return join_chunk_records(chunks)
+
+    def find_stale_parent_ids(self, prompt_version: str, embedding_model: str) -> List[str]:
+        """분석 프롬프트 버전이나 임베딩 모델이 현재와 다른 보고서 id 목록"""
+        return self._parent_ids(
+            f"analysis_prompt_version ne '{prompt_version}' "
+            f"or embedding_model ne '{embedding_model}'"
+        )
+
+    def list_parent_ids(self) -> List[str]:
+        """인덱스의 전체 보고서 id 목록"""
+        return self._parent_ids(None)
+
+    def _parent_ids(self, filter: Optional[str]) -> List[str]:
+        results = iter_index_documents(self.search_client, ["id", "parent_id"], filter)
+        parent_ids = []
+        seen = set()
+        for result in results:
+            parent_id = result.get("parent_id") or result["id"]
+            if parent_id not in seen:
+                seen.add(parent_id)
+                parent_ids.append(parent_id)
+        return parent_ids
+
+    def merge_records(self, records: List[Dict[str, Any]]) -> List[str]:
+        """레코드의 일부 필드만 갱신 (merge_or_upload), 성공한 id 목록 반환"""
+        succeeded_ids: List[str] = []
+        for start in range(0, len(records), _MAX_RECORDS_PER_REQUEST):
+            batch = records[start : start + _MAX_RECORDS_PER_REQUEST]
+            with span("index_merge", records=len(batch)):
+                results = self.search_client.merge_or_upload_documents(batch)
+            succeeded_ids.extend(result.key for result in results if result.succeeded)
+        _notify_invalidated(succeeded_ids)
+        return succeeded_ids
+
+    def replace_chunks(
+        self, records: List[Dict[str, Any]], old_ids: List[str]
+    ) -> List[str]:
+        """보고서의 청크 레코드를 새로 분할한 레코드로 교체, 성공한 id 목록 반환
+
+        새 레코드를 모두 올린 뒤에만 old_ids 중 새 레코드에 없는 id를 삭제한다.
+        """
+        succeeded_ids: List[str] = []
+        for start in range(0, len(records), _MAX_RECORDS_PER_REQUEST):
+            batch = records[start : start + _MAX_RECORDS_PER_REQUEST]
+            with span("index_upload", records=len(batch)):
+                results = self.search_client.upload_documents(batch)
+            succeeded_ids.extend(result.key for result in results if result.succeeded)
+
+        new_ids = {record["id"] for record in records}
+        stale_ids = [id_ for id_ in old_ids if id_ not in new_ids]
+        if stale_ids and len(succeeded_ids) == len(records):
+            self.search_client.delete_documents([{"id": id_} for id_ in stale_ids])
+        _notify_invalidated(succeeded_ids + stale_ids)
+        return succeeded_ids
+
     def index_docx_to_azure_ai_search(self, file_path: str, title: str):
         """DOCX 문서를 Azure AI Search에 기본 임베딩/청킹 옵션으로 인덱싱"""
         try:
@@ -189,26 +834,23 @@ class VectorStore:
                 return False
 
             # 기존 동일 title 문서 삭제
-            existing_docs = self.search_client.search(
-                search_text="*", select=["id", "title"]
-            )
-            ids_to_delete = [
-                doc["id"] for doc in existing_docs if doc["title"] == title
-            ]
-            if ids_to_delete:
-                self.search_client.delete_documents(
-                    [{"id": id_} for id_ in ids_to_delete]
-                )
-                print(f"기존 '{title}' 문서 {len(ids_to_delete)}건 삭제")
+            self.delete_documents_by_title(title)
 
             # Azure AI Search의 기본 임베딩/청킹 사용 (여기서는 단일 문서로 업로드)
+            document_id = str(uuid.uuid4())
             document = {
-                "id": str(uuid.uuid4()),
+                "id": document_id,
+                "parent_id": document_id,
+                "chunk_index": 0,
+                "chunk_offset": 0,
                 "title": title,
                 "content": content,
                 "upload_date": datetime.now(timezone(timedelta(hours=9))).isoformat(),
+                "title_hash": hash_text(title),
+                "content_hash": hash_text(content),
             }
             self.search_client.upload_documents([document])
+            self._invalidate_uploaded([document])
             print(f"DOCX 문서 '{title}'가 Azure AI Search에 인덱싱되었습니다.")
             return True
         except Exception as e: